@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.index_versions import list_versions
+from app.services.nlp_service import nlp_service
+from app.config import settings
+from app.utils.database import get_database
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+async def index_document_counts(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """Index'lere girmesi gereken (embedding'li, ilanlarda aktif) doküman sayıları"""
+    query = {"embedding": {"$exists": True}}
+    return {
+        "cv_index": await db.cvs.count_documents(query),
+        "job_index": await db.jobs.count_documents({**query, "is_active": True})
+    }
+
+@router.get("/indexes/versions", response_model=dict)
+async def get_index_versions():
+    """Yayınlanmış, aktif ve önceki index sürümlerini listeler"""
+    return {
+        **nlp_service.get_version_info(),
+        "versions": list_versions(settings.FAISS_INDEX_PATH)
+    }
+
+@router.post("/indexes/reload", response_model=dict)
+async def reload_indexes(
+    version: Optional[str] = Query(None, description="Yüklenecek sürüm (boşsa en yenisi)"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Yeni index sürümünü arka planda yükler, MongoDB ile doğrular ve trafiği ona geçirir"""
+    try:
+        counts = await index_document_counts(db)
+        return await run_in_threadpool(nlp_service.reload_indexes, version, counts)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index reload error: {str(e)}")
+
+@router.post("/indexes/rollback", response_model=dict)
+async def rollback_indexes():
+    """Önceki index sürümüne geri döner"""
+    try:
+        return await run_in_threadpool(nlp_service.rollback_indexes)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index rollback error: {str(e)}")
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
@@ -7,7 +8,9 @@ from datetime import datetime
 from app.models.cv import CVModel, CVCreate, CVResponse
 from app.services.cv_parser import CVParser
 from app.services.nlp_service import nlp_service
+from app.services.skill_index import cv_skill_index
 from app.utils.database import get_database
+from app.utils.embedding_codec import encode_embedding
 
 router = APIRouter(prefix="/api/cv", tags=["CV"])
 cv_parser = CVParser()
@@ -33,12 +36,12 @@ async def upload_cv(
         
         # Embedding oluştur
         full_text = f"{parsed_data['summary'] or ''} {' '.join(parsed_data['skills'])} {parsed_data['raw_text']}"
-        embedding = nlp_service.create_embedding(full_text)
+        embedding = await nlp_service.create_embedding_async(full_text)
         
         # CV modelini oluştur
         cv_data = {
             **parsed_data,
-            'embedding': embedding,
+            'embedding': encode_embedding(embedding),
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -47,8 +50,9 @@ async def upload_cv(
         result = await db.cvs.insert_one(cv_data)
         cv_id = str(result.inserted_id)
         
-        # FAISS index'e ekle
-        nlp_service.add_cv_to_index(cv_id, embedding)
+        # FAISS index'e ekle (log fsync'le yazılır, event loop bloklanmasın)
+        await run_in_threadpool(nlp_service.add_cv_to_index, cv_id, embedding)
+        cv_skill_index.add(cv_id, parsed_data['skills'])
         
         return {
             "message": "CV uploaded and processed successfully",
@@ -134,12 +138,12 @@ async def update_cv(
         
         # Embedding güncelle
         full_text = f"{cv_update.summary or ''} {' '.join(cv_update.skills)} {cv_update.raw_text}"
-        embedding = nlp_service.create_embedding(full_text)
+        embedding = await nlp_service.create_embedding_async(full_text)
         
         # Güncelleme verisi
         update_data = {
             **cv_update.dict(),
-            'embedding': embedding,
+            'embedding': encode_embedding(embedding),
             'updated_at': datetime.utcnow()
         }
         
@@ -149,6 +153,10 @@ async def update_cv(
             {"$set": update_data}
         )
         
+        # FAISS index'i güncelle
+        await run_in_threadpool(nlp_service.update_cv_in_index, cv_id, embedding)
+        cv_skill_index.add(cv_id, cv_update.skills)
+        
         return {"message": "CV updated successfully", "cv_id": cv_id}
         
     except HTTPException:
@@ -177,6 +185,10 @@ async def delete_cv(
         # İlgili match'leri de sil
         await db.matches.delete_many({"cv_id": cv_id})
         
+        # FAISS index'den kaldır
+        await run_in_threadpool(nlp_service.remove_cv_from_index, cv_id)
+        cv_skill_index.remove(cv_id)
+        
         return {"message": "CV deleted successfully", "cv_id": cv_id}
         
     except HTTPException:
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from datetime import datetime
 
 from app.models.job_posting import JobPosting, JobCreate, JobUpdate, JobResponse
-from app.services.nlp_service import nlp_service
+from app.services.nlp_service import JOB_FILTER_FIELDS, nlp_service
+from app.services.skill_index import job_skill_index
 from app.utils.database import get_database
+from app.utils.embedding_codec import decode_embedding, encode_embedding
 
 router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
 
@@ -22,13 +25,13 @@ async def create_job(
                   f"{' '.join(job_data.requirements)} {' '.join(job_data.skills_required)}"
         
         # Embedding oluştur
-        embedding = nlp_service.create_embedding(raw_text)
+        embedding = await nlp_service.create_embedding_async(raw_text)
         
         # Job modelini oluştur
         job_dict = {
             **job_data.dict(),
             'raw_text': raw_text,
-            'embedding': embedding,
+            'embedding': encode_embedding(embedding),
             'is_active': True,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
@@ -38,8 +41,9 @@ async def create_job(
         result = await db.jobs.insert_one(job_dict)
         job_id = str(result.inserted_id)
         
-        # FAISS index'e ekle
-        nlp_service.add_job_to_index(job_id, embedding)
+        # FAISS index'e filtre alanlarıyla birlikte ekle (log fsync'le yazılır, event loop bloklanmasın)
+        await run_in_threadpool(nlp_service.add_job_to_index, job_id, embedding, job_dict)
+        job_skill_index.add(job_id, job_data.skills_required)
         
         return {
             "message": "Job created successfully",
@@ -140,23 +144,49 @@ async def update_job(
         update_data = {k: v for k, v in job_update.dict().items() if v is not None}
         
         if update_data:
+            updated_job = {**existing_job, **update_data}
+            
             # Eğer içerik değişti ise embedding güncelle
             content_fields = ['title', 'description', 'requirements', 'skills_required']
             if any(field in update_data for field in content_fields):
                 # Güncellenmiş verilerle raw text oluştur
-                updated_job = {**existing_job, **update_data}
                 raw_text = f"{updated_job.get('title', '')} {updated_job.get('company', '')} " + \
                           f"{updated_job.get('description', '')} " + \
                           f"{' '.join(updated_job.get('requirements', []))} " + \
                           f"{' '.join(updated_job.get('skills_required', []))}"
                 
                 # Yeni embedding oluştur
-                new_embedding = nlp_service.create_embedding(raw_text)
+                new_embedding = await nlp_service.create_embedding_async(raw_text)
                 update_data['raw_text'] = raw_text
-                update_data['embedding'] = new_embedding
-                
-                # FAISS index'i güncelle
-                nlp_service.update_job_in_index(job_id, new_embedding)
+                update_data['embedding'] = encode_embedding(new_embedding)
+            else:
+                new_embedding = None
+            
+            # FAISS index'inde sadece aktif ilanlar tutulur
+            is_active = updated_job.get('is_active', True)
+            if not is_active:
+                await run_in_threadpool(nlp_service.remove_job_from_index, job_id)
+            elif new_embedding is not None:
+                await run_in_threadpool(nlp_service.update_job_in_index, job_id, new_embedding, updated_job)
+            elif 'is_active' in update_data and not existing_job.get('is_active', True):
+                # Yeniden aktifleşen ilan mevcut embedding'iyle index'e eklenir
+                if existing_job.get('embedding') is not None:
+                    await run_in_threadpool(nlp_service.update_job_in_index, job_id,
+                                            decode_embedding(existing_job['embedding']), updated_job)
+            # Lokasyon gibi filtre alanları değiştiyse index'teki öznitelikleri güncelle
+            elif any(field in update_data for field in JOB_FILTER_FIELDS):
+                if not await run_in_threadpool(nlp_service.update_job_attributes, job_id, updated_job) \
+                        and existing_job.get('embedding') is not None:
+                    # Index'te olmayan (eski) ilan mevcut embedding'iyle eklenir
+                    await run_in_threadpool(nlp_service.update_job_in_index, job_id,
+                                            decode_embedding(existing_job['embedding']), updated_job)
+            
+            # Beceri index'inde sadece aktif ilanlar tutulur
+            if 'skills_required' in update_data or 'is_active' in update_data:
+                if updated_job.get('is_active', True):
+                    job_skill_index.add(job_id, updated_job.get('skills_required', []))
+                else:
+                    job_skill_index.remove(job_id)
             
             # updated_at alanını güncelle
             update_data['updated_at'] = datetime.utcnow()
@@ -211,8 +241,9 @@ async def delete_job(
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        # FAISS index'den kaldır
-        nlp_service.remove_job_from_index(job_id)
+        # Index'ten çıkar (vektör compaction'a kadar tombstone olarak kalır)
+        await run_in_threadpool(nlp_service.remove_job_from_index, job_id)
+        job_skill_index.remove(job_id)
         
         return {
             "message": "Job deleted successfully",
@@ -229,42 +260,44 @@ async def search_jobs(
     query: str = Query(..., description="Arama sorgusu"),
     limit: int = Query(10, ge=1, le=50, description="Maksimum sonuç sayısı"),
     threshold: float = Query(0.7, ge=0.0, le=1.0, description="Benzerlik eşiği"),
+    location: Optional[str] = Query(None, description="Lokasyon (şehir)"),
+    employment_type: Optional[str] = Query(None, description="İstihdam türü"),
+    experience_level: Optional[str] = Query(None, description="Deneyim seviyesi"),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Doğal dil işleme ile iş ilanlarını arar"""
     try:
         # Query için embedding oluştur
-        query_embedding = nlp_service.create_embedding(query)
-        
-        # FAISS ile benzer job'ları bul
-        similar_job_ids, similarities = nlp_service.search_similar_jobs(
-            query_embedding, 
-            k=limit * 2  # Filtre sonrası yeterli sonuç olması için
+        query_embedding = await nlp_service.create_embedding_async(query)
+        
+        # Benzerliği threshold'u geçen aktif job'ları bul (filtreler index içinde uygulanır);
+        # arama CPU'da çalışır, event loop bloklanmasın
+        similar_jobs = await run_in_threadpool(
+            nlp_service.range_search_jobs,
+            query_embedding,
+            threshold=threshold,
+            max_results=limit,
+            filters={
+                "location": location,
+                "employment_type": employment_type,
+                "experience_level": experience_level
+            }
         )
-        
-        # Threshold'u geçenleri filtrele
-        filtered_results = [
-            (job_id, similarity) for job_id, similarity in zip(similar_job_ids, similarities)
-            if similarity >= threshold
-        ]
+        filtered_results = [(match['job_id'], match['similarity_score']) for match in similar_jobs]
         
         if not filtered_results:
             return []
         
-        # Job ID'leri al
-        job_ids = [ObjectId(job_id) for job_id, _ in filtered_results[:limit]]
-        
-        # MongoDB'den job'ları çek
-        jobs = await db.jobs.find({
-            "_id": {"$in": job_ids},
-            "is_active": True
-        }).to_list(length=limit)
+        # MongoDB'den job detaylarını çek
+        job_ids = [ObjectId(job_id) for job_id, _ in filtered_results]
+        # Index'ten çıkarılamamış pasif ilanlar burada da elenir
+        jobs = await db.jobs.find({"_id": {"$in": job_ids}, "is_active": True}).to_list(length=limit)
         
         # Sonuçları similarity skoruna göre sırala
         job_dict = {str(job['_id']): job for job in jobs}
         sorted_jobs = []
         
-        for job_id, similarity in filtered_results[:limit]:
+        for job_id, similarity in filtered_results:
             if job_id in job_dict:
                 job = job_dict[job_id]
                 job_response = JobResponse(
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import numpy as np
 from ..services.matching_service import MatchingService
+from ..services.nlp_service import nlp_service
 from ..models.match import MatchResult
+from ..utils.database import get_database
+from ..utils.embedding_codec import decode_embedding
 
 router = APIRouter(prefix="/api/matching", tags=["matching"])
 
@@ -19,9 +26,18 @@ class JobMatchRequest(BaseModel):
     threshold: Optional[float] = 0.7
     max_results: Optional[int] = 10
 
+# Tek istekte aranabilecek en fazla CV / iş ilanı
+BULK_MATCH_MAX_QUERIES = 1000
+
+class BulkMatchRequest(BaseModel):
+    cv_ids: Optional[List[str]] = Field(None, max_length=BULK_MATCH_MAX_QUERIES)    # CV -> işler
+    job_ids: Optional[List[str]] = Field(None, max_length=BULK_MATCH_MAX_QUERIES)   # İş -> CV'ler
+    threshold: float = Field(0.0, ge=-1.0, le=1.0)
+    max_results: int = Field(10, ge=1, le=100)
+
 # Dependency injection için
-def get_matching_service():
-    return MatchingService()
+def get_matching_service(db: AsyncIOMotorDatabase = Depends(get_database)):
+    return MatchingService(db)
 
 @router.post("/cv-to-jobs", response_model=List[MatchResult])
 async def match_cv_to_jobs(
@@ -32,10 +48,12 @@ async def match_cv_to_jobs(
     Belirli bir CV için en uygun iş ilanlarını bulur
     
     Algoritma:
-    1. CV'yi vektörleştirir (TF-IDF veya BERT embeddings)
-    2. İş ilanları ile cosine similarity hesaplar
-    3. Threshold'u geçen sonuçları döner
+    1. CV'nin embedding'i ve becerileri MongoDB'den çekilir
+    2. Adaylar FAISS ve beceri index'inden bulunur (job_ids verildiyse onlarla sınırlı)
+    3. Adaylar tek sorguda yüklenip toplu skorlanır, overall_score'u threshold'u geçenler döner
     """
+    if not ObjectId.is_valid(request.cv_id):
+        raise HTTPException(status_code=400, detail="Invalid CV ID")
     try:
         matches = await matching_service.find_matching_jobs(
             cv_id=request.cv_id,
@@ -44,6 +62,8 @@ async def match_cv_to_jobs(
             max_results=request.max_results
         )
         return matches
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -55,6 +75,8 @@ async def match_job_to_cvs(
     """
     Belirli bir iş ilanı için en uygun CV'leri bulur
     """
+    if not ObjectId.is_valid(request.job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
     try:
         matches = await matching_service.find_matching_cvs(
             job_id=request.job_id,
@@ -63,18 +85,75 @@ async def match_job_to_cvs(
             max_results=request.max_results
         )
         return matches
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk", response_model=dict)
+async def bulk_match(
+    request: BulkMatchRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Çok sayıda CV (ya da iş ilanı) için en benzer iş ilanlarını (CV'leri)
+    tek FAISS aramasında bulur. cv_ids ya da job_ids'den biri verilmelidir.
+    """
+    if bool(request.cv_ids) == bool(request.job_ids):
+        raise HTTPException(status_code=400, detail="Provide either cv_ids or job_ids")
+    
+    query_ids = request.cv_ids or request.job_ids
+    collection, id_field, match_field = (db.cvs, "cv_id", "job_id") if request.cv_ids else (db.jobs, "job_id", "cv_id")
+    invalid_ids = [query_id for query_id in query_ids if not ObjectId.is_valid(query_id)]
+    if invalid_ids:
+        raise HTTPException(status_code=400, detail=f"Invalid IDs: {', '.join(invalid_ids[:10])}")
+    
+    try:
+        # Embedding'leri tek sorguda çek
+        docs = await collection.find(
+            {"_id": {"$in": [ObjectId(query_id) for query_id in query_ids]}},
+            {"embedding": 1}
+        ).to_list(length=len(query_ids))
+        embeddings = {str(doc["_id"]): decode_embedding(doc.get("embedding")) for doc in docs}
+        found_ids = [query_id for query_id in dict.fromkeys(query_ids)
+                     if embeddings.get(query_id) is not None and len(embeddings[query_id]) > 0]
+        
+        matches = []
+        if found_ids:
+            vectors = np.vstack([embeddings[query_id] for query_id in found_ids])
+            search = nlp_service.search_similar_jobs_batch if request.cv_ids else nlp_service.search_similar_cvs_batch
+            # Arama CPU'da çalışır, event loop bloklanmasın
+            matches = await run_in_threadpool(search, vectors, request.max_results)
+        
+        return {
+            "results": [
+                {
+                    id_field: query_id,
+                    "matches": [
+                        {match_field: match[match_field], "similarity_score": match["similarity_score"]}
+                        for match in query_matches if match["similarity_score"] >= request.threshold
+                    ]
+                }
+                for query_id, query_matches in zip(found_ids, matches)
+            ],
+            "missing": sorted(set(query_ids) - set(found_ids))
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk matching error: {str(e)}")
+
 @router.get("/batch-process")
-async def batch_process_all():
+async def batch_process_all(
+    top_k: Optional[int] = Query(None, ge=1, le=200, description="CV başına saklanan eşleşme"),
+    min_score: Optional[float] = Query(None, ge=0.0, le=1.0, description="Minimum overall skor"),
+    matching_service: MatchingService = Depends(get_matching_service)
+):
     """
-    Tüm CV'ler ve iş ilanları için toplu eşleştirme yapar
-    Büyük veri setleri için optimize edilmiş
+    Tüm CV'ler ve aktif iş ilanları için toplu eşleştirme yapar.
+    CV blokları ilan tile'larına karşı matris çarpımıyla skorlanır, bellek
+    kullanımı veri boyutundan bağımsızdır; sonuçta hız bilgisi döner.
     """
     try:
-        matching_service = MatchingService()
-        result = await matching_service.batch_process_all_matches()
+        result = await matching_service.batch_process_all_matches(top_k=top_k, min_score=min_score)
         return {"message": "Batch processing completed", "processed": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -15,7 +15,71 @@ class Settings:
     
     # NLP Models
     SENTENCE_TRANSFORMER_MODEL: str = os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+    # Encoder backend: torch (fp32), torch-int8 (dinamik quantize), onnx (ONNX Runtime)
+    ENCODER_BACKEND: str = os.getenv("ENCODER_BACKEND", "torch")
+    ENCODER_MODEL_PATH: str = os.getenv("ENCODER_MODEL_PATH", "")  # Boşsa SENTENCE_TRANSFORMER_MODEL
+    ONNX_MODEL_PATH: str = os.getenv("ONNX_MODEL_PATH", "")  # Boşsa <model>/onnx/model.onnx
+    ENCODER_NUM_THREADS: int = int(os.getenv("ENCODER_NUM_THREADS", "0"))
+    # Index öncesi boyut indirgeme: none, pca (korpus üzerinde eğitilir), truncate (Matryoshka modeller)
+    EMBEDDING_REDUCTION: str = os.getenv("EMBEDDING_REDUCTION", "none")
+    EMBEDDING_REDUCED_DIM: int = int(os.getenv("EMBEDDING_REDUCED_DIM", "128"))
     FAISS_INDEX_PATH: str = os.getenv("FAISS_INDEX_PATH", "./data/faiss_indexes/")
+    # Index tipi: flat, ivf, hnsw. Index Flat başlar, canlı vektör sayısı eşiği geçince
+    # arka planda bu tipte yeniden kurulur (0 = yükseltme yok)
+    FAISS_INDEX_TYPE: str = os.getenv("FAISS_INDEX_TYPE", "ivf")
+    FAISS_PROMOTION_THRESHOLD: int = int(os.getenv("FAISS_PROMOTION_THRESHOLD", "100000"))
+    FAISS_IVF_NLIST: int = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = ~4 * sqrt(n)
+    FAISS_IVF_NPROBE: int = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+    FAISS_HNSW_M: int = int(os.getenv("FAISS_HNSW_M", "32"))
+    FAISS_HNSW_EF_CONSTRUCTION: int = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+    FAISS_HNSW_EF_SEARCH: int = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+    # Index başına bellek bütçesi (MB); aşılırsa sqfp16 / sq8 / ivfpq codec'ine geçilir, 0 = sınırsız
+    FAISS_MEMORY_BUDGET_MB: int = int(os.getenv("FAISS_MEMORY_BUDGET_MB", "0"))
+    FAISS_PQ_M: int = int(os.getenv("FAISS_PQ_M", "0"))  # 0 = boyut / 8
+    # Tam vektörleri diskte tut; kayıplı codec'te en iyi adaylar bunlarla yeniden skorlanır
+    FAISS_KEEP_FULL_VECTORS: bool = os.getenv("FAISS_KEEP_FULL_VECTORS", "False").lower() == "true"
+    FAISS_RERANK_FACTOR: int = int(os.getenv("FAISS_RERANK_FACTOR", "4"))
+    # IVF snapshot'larını mmap ile salt okunur aç (aynı makinedeki worker'lar page cache'i paylaşır)
+    FAISS_MMAP_INDEXES: bool = os.getenv("FAISS_MMAP_INDEXES", "False").lower() == "true"
+    # FAISS değişiklikleri önce log'a yazılır, tam index arka planda checkpoint'lenir
+    FAISS_CHECKPOINT_MAX_PENDING: int = int(os.getenv("FAISS_CHECKPOINT_MAX_PENDING", "1000"))
+    FAISS_CHECKPOINT_INTERVAL_SECONDS: float = float(os.getenv("FAISS_CHECKPOINT_INTERVAL_SECONDS", "60"))
+    FAISS_WAL_FSYNC: bool = os.getenv("FAISS_WAL_FSYNC", "True").lower() == "true"
+    # Silinen/güncellenen vektörlerin oranı bunu aşınca index arka planda compact edilir (0 = kapalı)
+    FAISS_COMPACTION_TOMBSTONE_RATIO: float = float(os.getenv("FAISS_COMPACTION_TOMBSTONE_RATIO", "0.2"))
+    # Offline kurulan index sürümleri (FAISS_INDEX_PATH/versions) yoklanır, yeni sürüme restart'sız geçilir
+    FAISS_WATCH_INDEX_VERSIONS: bool = os.getenv("FAISS_WATCH_INDEX_VERSIONS", "False").lower() == "true"
+    FAISS_VERSION_POLL_SECONDS: float = float(os.getenv("FAISS_VERSION_POLL_SECONDS", "30"))
+    # Önceki sürüm geri dönüş (rollback) için bellekte tutulur ve yazmalar ona da uygulanır
+    FAISS_KEEP_PREVIOUS_VERSION: bool = os.getenv("FAISS_KEEP_PREVIOUS_VERSION", "True").lower() == "true"
+    # Yeni sürümün vektör sayısı MongoDB'deki doküman sayısından en fazla bu oranda sapabilir
+    FAISS_RELOAD_COUNT_TOLERANCE: float = float(os.getenv("FAISS_RELOAD_COUNT_TOLERANCE", "0.01"))
+    # Model ve index'leri startup'ta arka planda yükle (False ise ilk istekte yüklenir)
+    NLP_WARMUP_ON_STARTUP: bool = os.getenv("NLP_WARMUP_ON_STARTUP", "True").lower() == "true"
+    
+    # Embedding micro-batching
+    EMBEDDING_BATCHING_ENABLED: bool = os.getenv("EMBEDDING_BATCHING_ENABLED", "True").lower() == "true"
+    EMBEDDING_MAX_BATCH_SIZE: int = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+    EMBEDDING_MAX_WAIT_MS: float = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+    # Tek forward pass'teki text sayısı (uzunluk kovaları bu boyutta)
+    EMBEDDING_ENCODE_BATCH_SIZE: int = int(os.getenv("EMBEDDING_ENCODE_BATCH_SIZE", "32"))
+    # Async endpoint'lerin encode için kullandığı thread havuzu (0 = otomatik)
+    EMBEDDING_EXECUTOR_WORKERS: int = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "0"))
+    
+    # Embedding cache (bellek LRU + FAISS_INDEX_PATH altında SQLite)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_DISK_ENABLED: bool = os.getenv("EMBEDDING_CACHE_DISK_ENABLED", "True").lower() == "true"
+    EMBEDDING_CACHE_DISK_MAX_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ITEMS", "1000000"))
+    
+    # MongoDB'de embedding formatı: float32 / float16 (paketli Binary) veya array (BSON double dizisi)
+    EMBEDDING_STORAGE_FORMAT: str = os.getenv("EMBEDDING_STORAGE_FORMAT", "float32")
+    
+    # Toplu eşleştirme (tüm CV'ler x aktif ilanlar): CV başına saklanan eşleşme ve blok boyutları
+    MATCH_BATCH_TOP_K: int = int(os.getenv("MATCH_BATCH_TOP_K", "20"))
+    MATCH_BATCH_MIN_SCORE: float = float(os.getenv("MATCH_BATCH_MIN_SCORE", "0.0"))
+    MATCH_BATCH_CV_BLOCK_SIZE: int = int(os.getenv("MATCH_BATCH_CV_BLOCK_SIZE", "512"))
+    MATCH_BATCH_JOB_TILE_SIZE: int = int(os.getenv("MATCH_BATCH_JOB_TILE_SIZE", "2048"))
     
     # File Upload
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))
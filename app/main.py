@@ -1,15 +1,19 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 import uvicorn
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
 # API routes import
 from .api.cv_routes import router as cv_router
 from .api.job_routes import router as job_router
 from .api.matching_routes import router as matching_router
+from .api.admin_routes import index_document_counts, router as admin_router
+from .services.nlp_service import nlp_service
+from .services.skill_index import cv_skill_index, job_skill_index, load_skill_indexes
 
 # Database connection
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -34,6 +38,19 @@ async def lifespan(app: FastAPI):
     # Database'i app state'e ekle
     app.state.database = database
     
+    # NLP servisi - model ve index'ler import sırasında değil, burada yüklenir
+    app.state.nlp_service = nlp_service
+    loop = asyncio.get_running_loop()
+    if settings.NLP_WARMUP_ON_STARTUP:
+        app.state.nlp_warmup = loop.run_in_executor(None, nlp_service.warm_up)
+    # Beceri ters index'i arka planda MongoDB'den doldurulur
+    app.state.skill_index_load = asyncio.create_task(load_skill_indexes(database))
+    if settings.FAISS_WATCH_INDEX_VERSIONS:
+        # Yeni index sürümleri restart'sız yüklenir; sayılar watcher thread'inden Motor ile alınır
+        nlp_service.start_version_watcher(
+            lambda: asyncio.run_coroutine_threadsafe(index_document_counts(database), loop).result(timeout=60)
+        )
+    
     print("🚀 TalentMatch NLP API başlatıldı!")
     print(f"📊 Database: {settings.DATABASE_NAME}")
     print(f"🌐 Docs: http://localhost:8000/docs")
@@ -41,6 +58,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    nlp_service.shutdown()
     if client:
         client.close()
     print("👋 Uygulama kapatıldı")
@@ -87,6 +105,7 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 app.include_router(cv_router)
 app.include_router(job_router)
 app.include_router(matching_router)
+app.include_router(admin_router)
 
 # Ana sayfa
 @app.get("/", response_class=HTMLResponse)
@@ -171,6 +190,30 @@ async def health_check():
         "message": "TalentMatch NLP API is running!"
     }
 
+# Readiness endpoint
+@app.get("/ready")
+async def readiness_check():
+    """
+    Model ve FAISS index'leri yüklendiğinde 200, aksi halde 503 döner
+    """
+    readiness = nlp_service.get_readiness()
+    status_code = 200 if readiness['ready'] else 503
+    return JSONResponse(status_code=status_code, content=readiness)
+
+# Metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    """
+    Embedding servisi ve FAISS index'lerinin çalışma zamanı sayaçları
+    """
+    return {
+        "embedding": nlp_service.get_embedding_stats(),
+        "index": nlp_service.get_index_stats(),
+        "skill_index": {
+            index.name: index.get_stats() for index in (cv_skill_index, job_skill_index)
+        }
+    }
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
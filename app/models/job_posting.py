@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
+from app.utils.embedding_codec import EmbeddingVector
+from app.utils.skill_vocabulary import skill_vocabulary
 
 class JobPosting(BaseModel):
     id: Optional[str] = Field(alias="_id")
@@ -15,10 +18,20 @@ class JobPosting(BaseModel):
     employment_type: Optional[str] = "Full-time"  # Full-time, Part-time, Contract
     experience_level: Optional[str] = None  # Entry, Mid, Senior
     raw_text: str
-    embedding: Optional[List[float]] = None
+    embedding: Optional[EmbeddingVector] = None
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Kodlanmış beceri id'leri, hangi beceri listesinden üretildikleriyle birlikte
+    _skill_ids: Optional[Tuple[Tuple[str, ...], np.ndarray]] = PrivateAttr(default=None)
+    
+    @property
+    def skill_ids(self) -> np.ndarray:
+        """Gerekli becerilerin sözlük id'leri (sıralı, tekrarsız); beceriler değişmedikçe bir kez kodlanır"""
+        skills = tuple(self.skills_required)
+        if self._skill_ids is None or self._skill_ids[0] != skills:
+            self._skill_ids = (skills, skill_vocabulary.encode(skills))
+        return self._skill_ids[1]
     
     class Config:
         populate_by_name = True
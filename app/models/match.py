@@ -34,6 +34,9 @@ class MatchCreate(BaseModel):
     missing_skills: List[str] = []
     match_details: Optional[Dict] = None
 
+class MatchResult(MatchCreate):
+    """Eşleştirme endpoint'lerinin döndüğü (kaydedilmemiş) sonuç"""
+
 class MatchResponse(BaseModel):
     id: str
     cv_id: str
@@ -0,0 +1,367 @@
+"""
+Tüm CV'leri tüm aktif iş ilanlarına karşı skorlayan bloklu eşleştirme motoru
+(gece çalışan toplu eşleştirme için).
+
+Akış:
+1. Aktif ilanlar MongoDB'den bir kez okunur, sabit boyutlu tile'lar halinde
+   geçici dizine yazılır (normalize embedding'ler, beceri id'leri, deneyim)
+2. CV'ler bloklar halinde okunur; her blok tüm ilan tile'larına karşı matris
+   çarpımıyla skorlanır (calculate_detailed_match ile aynı skorlar)
+3. CV başına en iyi top_k eşleşme her tile sonrası birleştirilerek tutulur
+4. Blok sonuçları matches koleksiyonuna sırasız (unordered) bulk upsert ile
+   yazılır, yazma bir sonraki bloğun skorlanmasıyla paralel yürür
+
+Bellekte aynı anda bir CV bloğu, bir ilan tile'ı ve blok x top_k sonuç
+bulunur; kullanım koleksiyon boyutundan bağımsızdır.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.models.match import MatchCreate
+from app.services.matching_service import EXPERIENCE_LEVEL_MAP
+from app.utils.embedding_codec import decode_embedding
+from app.utils.skill_vocabulary import skill_vocabulary
+
+CV_FIELDS = {"skills": 1, "experience": 1, "embedding": 1}
+JOB_FIELDS = {"skills_required": 1, "experience_level": 1, "embedding": 1}
+# Toplu eşleştirmenin yazdığı dokümanlar; silme sadece bunlara uygulanır
+MATCH_SOURCE = "batch"
+
+def _normalized_rows(embeddings: List, dimension: int) -> np.ndarray:
+    """Birim uzunluklu embedding matrisi; embedding'i olmayan / boyutu farklı satırlar 0"""
+    matrix = np.zeros((len(embeddings), dimension), dtype=np.float32)
+    for row, embedding in enumerate(embeddings):
+        if embedding is not None and len(embedding) == dimension:
+            matrix[row] = embedding
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+def _embedding_dimension(embeddings: List) -> int:
+    return next((len(embedding) for embedding in embeddings if embedding is not None and len(embedding)), 0)
+
+async def _chunks(cursor, size: int):
+    """Async cursor'dan size'lık doküman listeleri"""
+    chunk = []
+    async for document in cursor:
+        chunk.append(document)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class JobTile:
+    """Bir ilan tile'ının skorlamada kullanılan kolonları"""
+
+    def __init__(self, ids: np.ndarray, embeddings: np.ndarray, skill_ids: np.ndarray,
+                 skill_offsets: np.ndarray, skills_count: np.ndarray, required: np.ndarray,
+                 levels: np.ndarray):
+        self.ids = ids
+        self.embeddings = embeddings
+        self.skill_ids = skill_ids
+        self.skill_offsets = skill_offsets
+        self.skills_count = skills_count
+        self.required = required
+        self.levels = levels
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_documents(cls, documents: List[Dict]) -> "JobTile":
+        embeddings = [decode_embedding(document.get('embedding')) for document in documents]
+        skill_ids = [skill_vocabulary.encode(document.get('skills_required', [])) for document in documents]
+        lengths = np.fromiter((len(ids) for ids in skill_ids), dtype=np.int64, count=len(skill_ids))
+        return cls(
+            ids=np.array([str(document['_id']) for document in documents]),
+            embeddings=_normalized_rows(embeddings, _embedding_dimension(embeddings)),
+            skill_ids=np.concatenate(skill_ids) if lengths.sum() else np.zeros(0, dtype=np.int32),
+            skill_offsets=np.concatenate([[0], np.cumsum(lengths)]),
+            skills_count=np.array([len(document.get('skills_required', [])) for document in documents]),
+            required=np.array([EXPERIENCE_LEVEL_MAP.get(document.get('experience_level'), 1)
+                               for document in documents], dtype=np.float32),
+            levels=np.array([document.get('experience_level') or '' for document in documents])
+        )
+
+    def save(self, path: str):
+        np.savez(path, ids=self.ids, embeddings=self.embeddings, skill_ids=self.skill_ids,
+                 skill_offsets=self.skill_offsets, skills_count=self.skills_count,
+                 required=self.required, levels=self.levels)
+
+    @classmethod
+    def load(cls, path: str) -> "JobTile":
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def job_skill_ids(self, row: int) -> np.ndarray:
+        return self.skill_ids[self.skill_offsets[row]:self.skill_offsets[row + 1]]
+
+class CVBlock:
+    """Skorlanan CV bloğu"""
+
+    def __init__(self, documents: List[Dict]):
+        embeddings = [decode_embedding(document.get('embedding')) for document in documents]
+        self.ids = [str(document['_id']) for document in documents]
+        self.dimension = _embedding_dimension(embeddings)
+        self.embeddings = _normalized_rows(embeddings, self.dimension)
+        self.skill_ids = [skill_vocabulary.encode(document.get('skills', [])) for document in documents]
+        self.skills_count = [len(document.get('skills', [])) for document in documents]
+        self.experience = np.array([len(document.get('experience', [])) for document in documents],
+                                   dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class BatchMatchingEngine:
+    """
+    Bloklu all-pairs eşleştirme: CV blokları x ilan tile'ları, CV başına sınırlı top_k
+    """
+
+    def __init__(self, service, db, top_k: int = 20, min_score: float = 0.0,
+                 cv_block_size: int = 512, job_tile_size: int = 2048,
+                 progress: Optional[Callable[[Dict], None]] = None):
+        self.service = service
+        self.db = db
+        self.top_k = top_k
+        self.min_score = min_score
+        self.cv_block_size = cv_block_size
+        self.job_tile_size = job_tile_size
+        self.progress = progress or self._print_progress
+        self._tiles: List[str] = []
+        self._state = {}
+
+    async def run(self) -> Dict:
+        """Tüm CV'leri skorlar, yazılan eşleşme sayısı ve hız bilgisini döner"""
+        loop = asyncio.get_running_loop()
+        # MongoDB tarihleri milisaniye hassasiyetinde saklar
+        run_at = datetime.utcnow()
+        run_at = run_at.replace(microsecond=run_at.microsecond // 1000 * 1000)
+        await self.db.matches.create_index([("cv_id", 1), ("job_id", 1)])
+
+        with tempfile.TemporaryDirectory(prefix="match-tiles-") as directory:
+            jobs = await self._spill_jobs(directory)
+            self._state = {
+                'cvs': 0,
+                'jobs': jobs,
+                'total_cvs': await self.db.cvs.count_documents({}),
+                'pairs': 0,
+                'matches': 0,
+                'started': time.perf_counter()
+            }
+
+            # Bir blok yazılırken sonraki blok skorlanır; numpy işi event loop dışında
+            pending_write = None
+            cursor = self.db.cvs.find({}, CV_FIELDS).batch_size(self.cv_block_size)
+            async for documents in _chunks(cursor, self.cv_block_size):
+                block = await loop.run_in_executor(None, CVBlock, documents)
+                results = await loop.run_in_executor(None, self.score_block, block)
+                if pending_write is not None:
+                    await pending_write
+                pending_write = asyncio.ensure_future(self._write_block(block, results, run_at))
+            if pending_write is not None:
+                await pending_write
+
+        elapsed = time.perf_counter() - self._state['started']
+        return {
+            'cvs': self._state['cvs'],
+            'jobs': jobs,
+            'pairs_scored': self._state['pairs'],
+            'matches_written': self._state['matches'],
+            'elapsed_seconds': elapsed,
+            'pairs_per_sec': self._state['pairs'] / elapsed if elapsed > 0 else 0.0
+        }
+
+    async def _spill_jobs(self, directory: str) -> int:
+        """Aktif ilanları tile dosyalarına yazar, ilan sayısını döner"""
+        loop = asyncio.get_running_loop()
+        self._tiles = []
+        count = 0
+        cursor = self.db.jobs.find({"is_active": True}, JOB_FIELDS).batch_size(self.job_tile_size)
+        async for documents in _chunks(cursor, self.job_tile_size):
+            path = os.path.join(directory, f"tile_{len(self._tiles):06d}.npz")
+            await loop.run_in_executor(None, self._spill_tile, documents, path)
+            self._tiles.append(path)
+            count += len(documents)
+        return count
+
+    @staticmethod
+    def _spill_tile(documents: List[Dict], path: str):
+        """Tile'ı kurar ve diske yazar (executor'da çalışır)"""
+        JobTile.from_documents(documents).save(path)
+
+    def score_block(self, block: CVBlock) -> List[List[MatchCreate]]:
+        """
+        Bloğu tüm tile'lara karşı skorlar; CV başına overall_score'u min_score
+        üstündeki en iyi top_k eşleşme (skor sırasında)
+        """
+        # CV başına en iyi top_k: overall_score ve ilanın (tile * tile boyu + satır) numarası
+        best_scores = np.full((len(block), self.top_k), -np.inf, dtype=np.float32)
+        best_jobs = np.full((len(block), self.top_k), -1, dtype=np.int64)
+        for tile_number, path in enumerate(self._tiles):
+            tile = JobTile.load(path)
+            overall = self._score_tile(block, tile)
+            jobs = np.broadcast_to(tile_number * self.job_tile_size + np.arange(len(tile)), overall.shape)
+            best_scores, best_jobs = self._merge_top_k(best_scores, best_jobs, overall, jobs)
+            self._state['pairs'] += overall.size
+        return self._results(block, best_scores, best_jobs)
+
+    def _score_tile(self, block: CVBlock, tile: JobTile) -> np.ndarray:
+        """Blok x tile overall_score matrisi (min_score altı -inf)"""
+        weights = self.service.weights
+        overall = weights['skill_match_score'] * self._skill_scores(block, tile)
+        overall += weights['experience_match_score'] * self.service._batch_experience_match(
+            block.experience[:, None], tile.required[None, :]
+        )
+        if block.dimension and block.dimension == tile.embeddings.shape[1]:
+            overall += weights['similarity_score'] * np.maximum(block.embeddings @ tile.embeddings.T, 0.0)
+        overall[overall < self.min_score] = -np.inf
+        return overall
+
+    @staticmethod
+    def _skill_scores(block: CVBlock, tile: JobTile) -> np.ndarray:
+        """
+        CV x ilan gerekli beceri oranı. Tile'ın beceri sözlüğü üzerinde CV üyelik
+        matrisi kurulur; ilanın becerilerine denk gelen sütunlar ilan başına toplanır.
+        """
+        scores = np.zeros((len(block), len(tile)), dtype=np.float32)
+        lengths = np.diff(tile.skill_offsets)
+        if not len(tile.skill_ids):
+            return scores
+        vocabulary = np.unique(tile.skill_ids)
+        member = np.zeros((len(block), len(vocabulary)), dtype=np.float32)
+        cv_lengths = [len(ids) for ids in block.skill_ids]
+        if sum(cv_lengths):
+            flat = np.concatenate([ids for ids in block.skill_ids if len(ids)])
+            owners = np.repeat(np.arange(len(block)), cv_lengths)
+            positions = np.minimum(np.searchsorted(vocabulary, flat), len(vocabulary) - 1)
+            known = vocabulary[positions] == flat
+            member[owners[known], positions[known]] = 1.0
+        columns = member[:, np.searchsorted(vocabulary, tile.skill_ids)]
+        # Boş olmayan ilanların beceri aralıkları ardışıktır
+        nonempty = np.flatnonzero(lengths > 0)
+        matched = np.add.reduceat(columns, tile.skill_offsets[nonempty], axis=1)
+        scores[:, nonempty] = matched / lengths[nonempty]
+        return scores
+
+    def _merge_top_k(self, best_scores: np.ndarray, best_jobs: np.ndarray,
+                     scores: np.ndarray, jobs: np.ndarray):
+        """Mevcut top_k ile tile skorlarını birleştirip CV başına en iyi top_k'yı tutar"""
+        scores = np.concatenate([best_scores, scores], axis=1)
+        jobs = np.concatenate([best_jobs, jobs], axis=1)
+        keep = np.argpartition(-scores, self.top_k - 1, axis=1)[:, :self.top_k]
+        return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(jobs, keep, axis=1)
+
+    def _results(self, block: CVBlock, best_scores: np.ndarray, best_jobs: np.ndarray) -> List[List[MatchCreate]]:
+        """
+        Seçilen çiftlerin skor bileşenleri ve beceri listeleri (sadece seçilen
+        ilanların tile'ları bir kez daha okunur)
+        """
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_jobs = np.take_along_axis(best_jobs, order, axis=1)
+        valid = np.isfinite(best_scores)
+        tiles = np.where(valid, best_jobs // self.job_tile_size, -1)
+
+        results: List[List[MatchCreate]] = [[] for _ in range(len(block))]
+        cv_skills = [set(ids.tolist()) for ids in block.skill_ids]
+        for tile_number in np.unique(tiles[valid]).tolist():
+            tile = JobTile.load(self._tiles[tile_number])
+            rows, ranks = np.nonzero(tiles == tile_number)
+            job_rows = best_jobs[rows, ranks] % self.job_tile_size
+            # Benzerlik ve deneyim skorları tile'daki tüm seçilen çiftler için birlikte
+            similarity = np.zeros(len(rows), dtype=np.float32)
+            if block.dimension and block.dimension == tile.embeddings.shape[1]:
+                similarity = np.maximum(np.einsum('ij,ij->i', block.embeddings[rows], tile.embeddings[job_rows]), 0.0)
+            experience = self.service._batch_experience_match(block.experience[rows], tile.required[job_rows])
+            for row, rank, job_row, similarity_score, experience_score in zip(
+                    rows.tolist(), ranks.tolist(), job_rows.tolist(), similarity.tolist(), experience.tolist()):
+                results[row].append((rank, self._match(block, row, cv_skills[row], tile, job_row,
+                                                       similarity_score, experience_score)))
+        return [[match for _, match in sorted(matches, key=lambda item: item[0])] for matches in results]
+
+    def _match(self, block: CVBlock, row: int, cv_skills: Set[int], tile: JobTile, job_row: int,
+               similarity_score: float, experience_match_score: float) -> MatchCreate:
+        """Bir CV - ilan çifti için MatchCreate (calculate_detailed_match ile aynı alanlar)"""
+        weights = self.service.weights
+        job_skill_ids = tile.job_skill_ids(job_row).tolist()
+        matched = [skill_id for skill_id in job_skill_ids if skill_id in cv_skills]
+        missing = [skill_id for skill_id in job_skill_ids if skill_id not in cv_skills]
+        skill_match_score = len(matched) / len(job_skill_ids) if job_skill_ids else 0.0
+        return MatchCreate(
+            cv_id=block.ids[row],
+            job_id=str(tile.ids[job_row]),
+            similarity_score=similarity_score,
+            skill_match_score=skill_match_score,
+            experience_match_score=experience_match_score,
+            overall_score=(weights['similarity_score'] * similarity_score +
+                           weights['skill_match_score'] * skill_match_score +
+                           weights['experience_match_score'] * experience_match_score),
+            matched_skills=skill_vocabulary.decode(matched),
+            missing_skills=skill_vocabulary.decode(missing),
+            match_details={
+                'cv_skills_count': block.skills_count[row],
+                'job_skills_count': int(tile.skills_count[job_row]),
+                'matched_skills_count': len(matched),
+                'cv_experience_count': int(block.experience[row]),
+                'job_experience_level': str(tile.levels[job_row]) or None
+            }
+        )
+
+    async def _write_block(self, block: CVBlock, results: List[List[MatchCreate]], run_at: datetime):
+        """
+        Blok sonuçlarını upsert eder, bloktaki CV'lerin bu çalışmada bulunmayan
+        eski toplu eşleşmelerini siler (diğer akışların eşleşmelerine dokunulmaz)
+        """
+        operations = [
+            UpdateOne(
+                {'cv_id': match.cv_id, 'job_id': match.job_id, 'source': MATCH_SOURCE},
+                {'$set': {**match.model_dump(), 'updated_at': run_at},
+                 '$setOnInsert': {'created_at': run_at}},
+                upsert=True
+            )
+            for matches in results for match in matches
+        ]
+        if operations:
+            await self.db.matches.bulk_write(operations, ordered=False)
+        await self.db.matches.delete_many({
+            'cv_id': {'$in': block.ids},
+            'source': MATCH_SOURCE,
+            'updated_at': {'$ne': run_at}
+        })
+
+        state = self._state
+        state['cvs'] += len(block)
+        state['matches'] += len(operations)
+        elapsed = time.perf_counter() - state['started']
+        self.progress({
+            'done': state['cvs'],
+            'total': state['total_cvs'],
+            'jobs': state['jobs'],
+            'matches': state['matches'],
+            'pairs_per_sec': state['pairs'] / elapsed if elapsed > 0 else 0.0
+        })
+
+    @staticmethod
+    def _print_progress(progress: Dict):
+        print(f"📊 matches: {progress['done']}/{progress['total']} CVs x {progress['jobs']} jobs, "
+              f"{progress['matches']} matches ({progress['pairs_per_sec']:.0f} pairs/sec)")
+
+def create_engine(service, db, **kwargs) -> BatchMatchingEngine:
+    """Ayarlardaki blok boyutları ve top_k ile motor (kwargs ayarları ezer)"""
+    options = {
+        'top_k': settings.MATCH_BATCH_TOP_K,
+        'min_score': settings.MATCH_BATCH_MIN_SCORE,
+        'cv_block_size': settings.MATCH_BATCH_CV_BLOCK_SIZE,
+        'job_tile_size': settings.MATCH_BATCH_JOB_TILE_SIZE,
+        **{name: value for name, value in kwargs.items() if value is not None}
+    }
+    return BatchMatchingEngine(service, db, **options)
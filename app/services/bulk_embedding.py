@@ -0,0 +1,386 @@
+"""
+Toplu embedding pipeline'ı - model değişikliğinden sonra cvs/jobs
+koleksiyonlarını yeniden embed etmek için.
+
+Akış:
+1. MongoDB'den _id sırasına göre cursor batch'leri halinde okunur
+2. Batch'ler N worker process'e dağıtılır (her birinde ayrı model kopyası)
+3. Vektörler sırasız (unordered) bulk write ile geri yazılır
+4. Her batch sonrası son _id checkpoint'e yazılır, kesilirse kaldığı yerden devam eder
+
+Kullanım:
+    python -m app.services.bulk_embedding --collection cvs --workers 4 --rebuild-index
+    python -m app.services.bulk_embedding --rebuild-index-only
+
+Index'ler her zaman FAISS_INDEX_PATH/versions altında yeni bir sürüm olarak
+kurulur; çalışan API'ler sürümü doğrulayıp CURRENT'ı kendileri günceller.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.encoders import encoder_model_key, encoder_model_path
+from app.utils.embedding_codec import decode_embedding, encode_embedding
+
+COLLECTIONS = ('cvs', 'jobs')
+INDEX_NAMES = {'cvs': 'cv', 'jobs': 'job'}
+
+def cv_embedding_text(doc: Dict) -> str:
+    """CV dokümanından embedding text'i (upload_cv ile aynı)"""
+    return f"{doc.get('summary') or ''} {' '.join(doc.get('skills') or [])} {doc.get('raw_text') or ''}"
+
+def job_embedding_text(doc: Dict) -> str:
+    """Job dokümanından embedding text'i (create_job ile aynı)"""
+    if doc.get('raw_text'):
+        return doc['raw_text']
+    return f"{doc.get('title') or ''} {doc.get('company') or ''} {doc.get('description') or ''} " + \
+           f"{' '.join(doc.get('requirements') or [])} {' '.join(doc.get('skills_required') or [])}"
+
+TEXT_BUILDERS = {
+    'cvs': (cv_embedding_text, ['summary', 'skills', 'raw_text']),
+    'jobs': (job_embedding_text, ['raw_text', 'title', 'company', 'description',
+                                  'requirements', 'skills_required'])
+}
+
+THREAD_ENV_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# Worker process'e ait encoder (process başına bir kez yüklenir)
+_worker_encoder = None
+
+def _spawn_pool(context, processes: int, threads: int, initargs: tuple):
+    """
+    Worker pool'unu thread env değişkenleri ayarlıyken başlatır
+    Spawn'da child bu modülü (dolayısıyla numpy/BLAS'ı) initializer'dan önce
+    import eder; değişkenler ancak parent ortamından miras alınırsa etkili olur
+    """
+    previous = {variable: os.environ.get(variable) for variable in THREAD_ENV_VARIABLES}
+    for variable in THREAD_ENV_VARIABLES:
+        os.environ[variable] = str(threads)
+    try:
+        # Pool tüm worker'ları constructor'da başlatır
+        return context.Pool(processes=processes, initializer=_init_worker, initargs=initargs)
+    finally:
+        for variable, value in previous.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+def _init_worker(backend: str, model_path: str, onnx_path: Optional[str], threads: int):
+    """Worker process'i başlatır: modeli sabit thread sayısıyla yükler"""
+    global _worker_encoder
+    from app.services.encoders import create_encoder
+    _worker_encoder = create_encoder(backend, model_path, onnx_path=onnx_path, num_threads=threads)
+
+def _encode_chunk(texts: List[str]) -> np.ndarray:
+    """Worker'da bir batch text'i encode eder"""
+    from app.services.encoders import normalize_embeddings
+
+    prepared = [_worker_encoder.prepare(text) for text in texts]
+    embeddings = _worker_encoder.encode_bucketed(prepared, batch_size=settings.EMBEDDING_ENCODE_BATCH_SIZE)
+    return normalize_embeddings(embeddings).astype(np.float32)
+
+class BulkEmbeddingPipeline:
+    """
+    Bir koleksiyonun tüm dokümanlarını çok process'li olarak yeniden embed eder
+    """
+
+    def __init__(self, collection: str, workers: int = 0, batch_size: int = 256,
+                 threads_per_worker: int = 1, checkpoint_path: Optional[str] = None,
+                 mongodb_url: Optional[str] = None, database_name: Optional[str] = None,
+                 query: Optional[Dict] = None, progress: Optional[Callable[[Dict], None]] = None):
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection} (options: {', '.join(COLLECTIONS)})")
+
+        self.collection_name = collection
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(1, threads_per_worker))
+        self.batch_size = batch_size
+        self.threads_per_worker = threads_per_worker
+        self.mongodb_url = mongodb_url or settings.MONGODB_URL
+        self.database_name = database_name or settings.DATABASE_NAME
+        self.query = query or {}
+        self.progress = progress or self._print_progress
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            settings.FAISS_INDEX_PATH, f"bulk_embedding_{collection}.checkpoint.json"
+        )
+
+        self.model_path = encoder_model_path()
+        self.model_key = encoder_model_key()
+        self._state = {}
+
+    def run(self, resume: bool = True) -> Dict:
+        """Pipeline'ı çalıştırır, işlenen doküman sayısı ve hız bilgisini döner"""
+        from pymongo import MongoClient
+
+        checkpoint = self._load_checkpoint() if resume else None
+        last_id = checkpoint['last_id'] if checkpoint else None
+
+        client = MongoClient(self.mongodb_url)
+        collection = client[self.database_name][self.collection_name]
+        build_text, fields = TEXT_BUILDERS[self.collection_name]
+
+        query = dict(self.query)
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+
+        self._state = {
+            'previously_processed': checkpoint['processed'] if checkpoint else 0,
+            'done': 0,
+            'modified': 0,
+            'total': collection.count_documents(query),
+            'started': time.perf_counter()
+        }
+
+        context = multiprocessing.get_context("spawn")
+        pool = _spawn_pool(
+            context, self.workers, self.threads_per_worker,
+            (settings.ENCODER_BACKEND, self.model_path,
+             settings.ONNX_MODEL_PATH or None, self.threads_per_worker)
+        )
+        try:
+            cursor = collection.find(query, {field: 1 for field in fields}) \
+                .sort('_id', 1).batch_size(self.batch_size)
+
+            # Sıradaki batch'ler; bellek sınırlı kalsın diye en fazla 2 * workers beklemede
+            pending = deque()
+            for chunk in self._chunks(cursor):
+                ids = [doc['_id'] for doc in chunk]
+                texts = [build_text(doc) for doc in chunk]
+                pending.append((ids, pool.apply_async(_encode_chunk, (texts,))))
+
+                while len(pending) >= 2 * self.workers:
+                    self._write_oldest(collection, pending)
+
+            while pending:
+                self._write_oldest(collection, pending)
+        except BaseException:
+            # Bekleyen batch'ler bitmeden worker'lar durdurulur
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+            client.close()
+
+        elapsed = time.perf_counter() - self._state['started']
+        done = self._state['done']
+        return {
+            'collection': self.collection_name,
+            'processed': self._state['previously_processed'] + done,
+            'processed_in_run': done,
+            'modified': self._state['modified'],
+            'elapsed_seconds': elapsed,
+            'docs_per_sec': done / elapsed if elapsed > 0 else 0.0
+        }
+
+    def _chunks(self, cursor):
+        chunk = []
+        for doc in cursor:
+            chunk.append(doc)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _write_oldest(self, collection, pending: deque):
+        """
+        En eski batch'in sonucunu bekler, MongoDB'ye yazar ve checkpoint'i ilerletir.
+        Batch'ler sırayla yazıldığı için checkpoint'teki _id'ye kadar her şey tamamdır.
+        """
+        from pymongo import UpdateOne
+
+        ids, result = pending.popleft()
+        embeddings = result.get()
+        operations = [
+            UpdateOne({'_id': doc_id}, {'$set': {
+                'embedding': encode_embedding(embedding),
+                'embedding_model': self.model_key
+            }})
+            for doc_id, embedding in zip(ids, embeddings)
+        ]
+        bulk_result = collection.bulk_write(operations, ordered=False)
+
+        state = self._state
+        state['done'] += len(ids)
+        state['modified'] += bulk_result.modified_count
+        self._save_checkpoint(ids[-1], state['previously_processed'] + state['done'])
+
+        elapsed = time.perf_counter() - state['started']
+        self.progress({
+            'collection': self.collection_name,
+            'done': state['done'],
+            'total': state['total'],
+            'docs_per_sec': state['done'] / elapsed if elapsed > 0 else 0.0
+        })
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            from bson import ObjectId
+
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            # Farklı model ile başlatılmış bir checkpoint'ten devam edilmez
+            if checkpoint.get('model') != self.model_key:
+                return None
+            checkpoint['last_id'] = ObjectId(checkpoint['last_id'])
+            return checkpoint
+        except Exception as e:
+            print(f"Checkpoint read error: {e}")
+            return None
+
+    def _save_checkpoint(self, last_id, processed: int):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({
+                'last_id': str(last_id),
+                'processed': processed,
+                'model': self.model_key,
+                'updated_at': time.time()
+            }, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        """Tamamlanan çalışmanın checkpoint'ini siler"""
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    @staticmethod
+    def _print_progress(progress: Dict):
+        print(f"📊 {progress['collection']}: {progress['done']}/{progress['total']} "
+              f"({progress['docs_per_sec']:.1f} docs/sec)")
+
+def iter_embedding_batches(collection, batch_size: int = 1000, query: Optional[Dict] = None,
+                           attributes: Optional[Callable[[Dict], Dict]] = None,
+                           fields: Iterable[str] = ()):
+    """
+    Koleksiyondaki embedding'leri (id'ler, vektörler) batch'leri halinde okur.
+    attributes verilirse (id'ler, vektörler, öznitelikler) döner; fields okunacak alanlardır.
+    """
+    query = dict(query or {})
+    query['embedding'] = {'$exists': True}
+    projection = {'embedding': 1, **{field: 1 for field in fields}}
+    cursor = collection.find(query, projection).sort('_id', 1).batch_size(batch_size)
+
+    ids, vectors, extras = [], [], []
+    for doc in cursor:
+        embedding = decode_embedding(doc['embedding'])
+        if embedding is None or len(embedding) == 0:
+            continue
+        ids.append(str(doc['_id']))
+        vectors.append(embedding)
+        if attributes is not None:
+            extras.append(attributes(doc))
+        if len(ids) >= batch_size:
+            yield (ids, np.vstack(vectors), extras) if attributes is not None else (ids, np.vstack(vectors))
+            ids, vectors, extras = [], [], []
+    if ids:
+        yield (ids, np.vstack(vectors), extras) if attributes is not None else (ids, np.vstack(vectors))
+
+def index_batches(source, collection: str, batch_size: int = 1000):
+    """Koleksiyonun index'e girecek (id'ler, vektörler[, öznitelikler]) batch'leri"""
+    from app.services.nlp_service import JOB_FILTER_FIELDS, job_index_attributes
+
+    if collection == 'jobs':
+        # Index'e sadece aktif ilanlar girer
+        return iter_embedding_batches(source, batch_size, query={'is_active': True},
+                                      attributes=job_index_attributes, fields=JOB_FILTER_FIELDS)
+    return iter_embedding_batches(source, batch_size)
+
+def build_index_version(database, batch_size: int = 1000, service=None) -> str:
+    """
+    database'deki cvs ve jobs embedding'lerinden FAISS_INDEX_PATH/versions
+    altında yeni bir index sürümü kurar. Index'ler çevrimdışı, bağımsız
+    VectorIndex'ler olarak kurulur; çalışan index'lere, log'larına ve
+    CURRENT'a dokunulmaz. Sürüm adını döner.
+    """
+    from datetime import datetime
+    from app.services.index_versions import new_version, version_path, write_manifest
+
+    if service is None:
+        from app.services.nlp_service import nlp_service as service
+
+    version = new_version(settings.FAISS_INDEX_PATH)
+    directory = version_path(settings.FAISS_INDEX_PATH, version)
+    indexes = {}
+    for collection in COLLECTIONS:
+        batches = index_batches(database[collection], collection, batch_size)
+        index = service.build_index(INDEX_NAMES[collection], batches, directory)
+        indexes[index.name] = {'count': index.ntotal, 'index_type': index.index_type}
+        index.close()
+    # Manifest en son yazılır, yarım sürümler yüklenmez
+    write_manifest(directory, {
+        'version': version,
+        'created_at': datetime.utcnow().isoformat(),
+        'model': encoder_model_path(),
+        'reduction': settings.EMBEDDING_REDUCTION,
+        'dimension': service.index_dimension,
+        'indexes': indexes
+    })
+    return version
+
+def publish_index_version(batch_size: int = 1000, mongodb_url: Optional[str] = None,
+                          database_name: Optional[str] = None) -> str:
+    """
+    cvs ve jobs index'lerini MongoDB'den yeni bir sürüm olarak kurar.
+    Çalışan API'ler sürümü restart'sız yükler (watcher ya da
+    /api/admin/indexes/reload). Sürüm adını döner.
+    """
+    from pymongo import MongoClient
+
+    client = MongoClient(mongodb_url or settings.MONGODB_URL)
+    try:
+        return build_index_version(client[database_name or settings.DATABASE_NAME], batch_size)
+    finally:
+        client.close()
+
+def run_bulk_embedding(collection: str, resume: bool = True, **kwargs) -> Dict:
+    """Koleksiyonu yeniden embed eder, bittiğinde checkpoint'i temizler"""
+    pipeline = BulkEmbeddingPipeline(collection, **kwargs)
+    result = pipeline.run(resume=resume)
+    pipeline.clear_checkpoint()
+    return result
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk re-embedding of cvs/jobs collections")
+    parser.add_argument("--collection", choices=COLLECTIONS + ('all',), default="all")
+    parser.add_argument("--workers", type=int, default=0, help="0 = CPU sayısı / threads-per-worker")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--no-resume", action="store_true", help="Checkpoint'i yok say, baştan başla")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="Embedding sonrası FAISS index'lerini yeni bir sürüm olarak kur")
+    parser.add_argument("--rebuild-index-only", action="store_true",
+                        help="Embed etmeden sadece FAISS index'lerini yeni bir sürüm olarak kur")
+    parser.add_argument("--publish-version", action="store_true", help="--rebuild-index ile aynı")
+    args = parser.parse_args()
+
+    collections = COLLECTIONS if args.collection == "all" else (args.collection,)
+    if not args.rebuild_index_only:
+        for name in collections:
+            result = run_bulk_embedding(
+                name,
+                resume=not args.no_resume,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                threads_per_worker=args.threads_per_worker
+            )
+            print(f"✅ {name}: {result['processed_in_run']} doküman, "
+                  f"{result['docs_per_sec']:.1f} docs/sec, {result['elapsed_seconds']:.1f}s")
+    if args.rebuild_index or args.rebuild_index_only or args.publish_version:
+        # Sürüm iki index'i birlikte içerir
+        version = publish_index_version()
+        print(f"✅ FAISS index sürümü {version} yayınlandı")
@@ -0,0 +1,138 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from app.services.encoders import normalize_embeddings
+
+class DimensionReducer(ABC):
+    """
+    Embedding'leri index'e eklemeden / aramadan önce daha düşük boyuta indirir
+    Çıktı yeniden normalize edilir, inner product yine cosine similarity olur
+    """
+
+    name = "none"
+
+    def __init__(self, input_dim: int, output_dim: int):
+        if output_dim > input_dim:
+            raise ValueError(f"Reduced dimension {output_dim} exceeds model dimension {input_dim}")
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    @abstractmethod
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, input_dim) vektörleri normalize edilmiş (n, output_dim) matrise indirir"""
+
+class TruncationReducer(DimensionReducer):
+    """
+    Matryoshka tarzı eğitilmiş modeller için ilk output_dim boyutu alır
+    (bu modellerde önemli bilgi ilk boyutlarda toplanır)
+    """
+
+    name = "truncate"
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.input_dim)
+        return normalize_embeddings(np.ascontiguousarray(vectors[:, :self.output_dim]))
+
+class PCAReducer(DimensionReducer):
+    """Kendi korpusumuz üzerinde eğitilen PCA dönüşümü (faiss.PCAMatrix)"""
+
+    name = "pca"
+
+    def __init__(self, input_dim: int, output_dim: int, path: Optional[str] = None):
+        super().__init__(input_dim, output_dim)
+        self.path = path
+        self.matrix = faiss.PCAMatrix(input_dim, output_dim)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.matrix.is_trained
+
+    def train(self, vectors: np.ndarray):
+        """PCA'yı örnek embedding'ler üzerinde eğitir ve kaydeder"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.input_dim)
+        if len(vectors) < self.output_dim:
+            raise ValueError(f"PCA training needs at least {self.output_dim} vectors, got {len(vectors)}")
+        self.matrix.train(vectors)
+        if self.path:
+            self.save(self.path)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.input_dim)
+        return normalize_embeddings(self.matrix.apply_py(vectors))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        faiss.write_VectorTransform(self.matrix, temp_path)
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Kayıtlı dönüşümü yükler, boyutlar uymuyorsa False döner"""
+        if not os.path.exists(path):
+            return False
+        matrix = faiss.read_VectorTransform(path)
+        if matrix.d_in != self.input_dim or matrix.d_out != self.output_dim:
+            print(f"PCA transform dimension mismatch: {matrix.d_in}->{matrix.d_out}, "
+                  f"expected {self.input_dim}->{self.output_dim}")
+            return False
+        self.matrix = matrix
+        return True
+
+REDUCTION_METHODS = ('none', TruncationReducer.name, PCAReducer.name)
+
+def pca_path(index_path: str, input_dim: int, output_dim: int) -> str:
+    """PCA dönüşümünün index dosyalarının yanındaki yolu"""
+    return os.path.join(index_path, f"pca_{input_dim}x{output_dim}.vt")
+
+def create_reducer(method: str, input_dim: int, output_dim: int,
+                   index_path: str) -> Optional[DimensionReducer]:
+    """Ayarlara göre reducer oluşturur; 'none' veya hedef boyut modelinkine eşitse None"""
+    if method not in REDUCTION_METHODS:
+        raise ValueError(f"Unknown reduction method: {method} (options: {', '.join(REDUCTION_METHODS)})")
+    if method == 'none' or output_dim <= 0 or output_dim >= input_dim:
+        return None
+    if method == TruncationReducer.name:
+        return TruncationReducer(input_dim, output_dim)
+
+    reducer = PCAReducer(input_dim, output_dim, path=pca_path(index_path, input_dim, output_dim))
+    reducer.load(reducer.path)
+    return reducer
+
+if __name__ == "__main__":
+    import argparse
+    from pymongo import MongoClient
+    from app.config import settings
+    from app.services.nlp_service import nlp_service
+    from app.utils.embedding_codec import decode_embedding
+
+    parser = argparse.ArgumentParser(description="PCA dimension reduction training")
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_REDUCED_DIM)
+    parser.add_argument("--sample-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    client = MongoClient(settings.MONGODB_URL)
+    database = client[settings.DATABASE_NAME]
+    samples = []
+    for collection in ('cvs', 'jobs'):
+        pipeline = [
+            {'$match': {'embedding': {'$exists': True}}},
+            {'$sample': {'size': args.sample_size // 2}},
+            {'$project': {'embedding': 1}}
+        ]
+        samples.extend(decode_embedding(doc['embedding']) for doc in database[collection].aggregate(pipeline))
+    client.close()
+
+    input_dim = nlp_service.dimension
+    reducer = PCAReducer(input_dim, args.dim,
+                         path=pca_path(settings.FAISS_INDEX_PATH, input_dim, args.dim))
+    reducer.train(np.vstack(samples))
+    print(f"✅ PCA {input_dim} -> {args.dim} eğitildi ({len(samples)} vektör): {reducer.path}")
+    print("⚠️ Index boyutu değişti, FAISS index'lerini yeniden oluşturun")
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+class EmbeddingCache:
+    """
+    İçerik adresli, iki katmanlı embedding cache'i
+
+    1. katman: süreç içi LRU (max_memory_items ile sınırlı)
+    2. katman: SQLite tabanlı disk deposu (restart sonrası da kullanılır)
+
+    Anahtar, temizlenmiş text ile namespace'in (model adı vb.) SHA-256
+    özetidir; model değişince eski kayıtlar kendiliğinden geçersiz olur.
+
+    Oluşturma I/O yapmaz; disk katmanı open() ile ya da ilk get / put'ta açılır.
+    """
+
+    def __init__(self, namespace: str, max_memory_items: int = 10000,
+                 disk_path: Optional[str] = None, max_disk_items: int = 0):
+        self.namespace = namespace
+        self.max_memory_items = max(0, max_memory_items)
+        self.max_disk_items = max(0, max_disk_items)  # 0 = sınırsız
+        self.disk_path = disk_path
+
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._disk_opened = False
+        self._disk_items = 0
+
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'disk_errors': 0
+        }
+
+    def open(self):
+        """Disk katmanını açar (açılmışsa bir şey yapmaz)"""
+        with self._disk_lock:
+            if self._disk is None and self.disk_path:
+                self._open_disk(self.disk_path)
+            self._disk_opened = True
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Disk bağlantısı; ilk kullanımda açılır, açılamadıysa ya da kapatıldıysa None"""
+        if not self._disk_opened:
+            self.open()
+        return self._disk
+
+    def make_key(self, text: str) -> bytes:
+        """Text ve namespace'ten cache anahtarı üretir"""
+        digest = hashlib.sha256()
+        digest.update(self.namespace.encode('utf-8'))
+        digest.update(b'\x00')
+        digest.update(text.encode('utf-8'))
+        return digest.digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Cache'teki embedding'i döner, yoksa None"""
+        key = self.make_key(text)
+
+        with self._memory_lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return embedding
+
+        embedding = self._disk_get(key)
+        if embedding is not None:
+            self._memory_put(key, embedding)
+            with self._memory_lock:
+                self._stats['disk_hits'] += 1
+            return embedding
+
+        with self._memory_lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, text: str, embedding: np.ndarray):
+        """Embedding'i her iki katmana da yazar"""
+        key = self.make_key(text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self._memory_put(key, embedding)
+        self._disk_put(key, embedding)
+
+    def clear(self):
+        """Tüm kayıtları siler"""
+        with self._memory_lock:
+            self._memory.clear()
+        if self._connection() is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM embeddings")
+                self._disk.commit()
+                self._disk_items = 0
+
+    def close(self):
+        """Disk bağlantısını kapatır"""
+        with self._disk_lock:
+            self._disk_opened = True
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def get_stats(self) -> Dict:
+        """Hit/miss/eviction sayaçlarını döner"""
+        with self._memory_lock:
+            stats = dict(self._stats)
+            stats['memory_items'] = len(self._memory)
+        stats['disk_enabled'] = self._disk is not None
+        stats['disk_items'] = self._disk_items
+        stats['max_memory_items'] = self.max_memory_items
+        stats['max_disk_items'] = self.max_disk_items
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _memory_put(self, key: bytes, embedding: np.ndarray):
+        if self.max_memory_items == 0:
+            return
+        with self._memory_lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+                self._stats['memory_evictions'] += 1
+
+    def _open_disk(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key BLOB PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._disk.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_created_at ON embeddings(created_at)"
+            )
+            self._disk.commit()
+            self._disk_items = self._disk.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        except Exception as e:
+            print(f"Embedding cache disk open error: {e}")
+            self._disk = None
+
+    def _disk_get(self, key: bytes) -> Optional[np.ndarray]:
+        if self._connection() is None:
+            return None
+        try:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"Embedding cache disk read error: {e}")
+            self._stats['disk_errors'] += 1
+            return None
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _disk_put(self, key: bytes, embedding: np.ndarray):
+        if self._connection() is None:
+            return
+        try:
+            with self._disk_lock:
+                cursor = self._disk.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    (key, embedding.tobytes(), time.time())
+                )
+                self._disk_items += cursor.rowcount
+
+                # Disk sınırı aşıldıysa en eski kayıtları sil
+                if self.max_disk_items and self._disk_items > self.max_disk_items:
+                    overflow = self._disk_items - self.max_disk_items
+                    cursor = self._disk.execute(
+                        "DELETE FROM embeddings WHERE key IN ("
+                        "SELECT key FROM embeddings ORDER BY created_at LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._disk_items -= cursor.rowcount
+                    self._stats['disk_evictions'] += cursor.rowcount
+                self._disk.commit()
+        except Exception as e:
+            print(f"Embedding cache disk write error: {e}")
+            self._stats['disk_errors'] += 1
@@ -0,0 +1,352 @@
+import json
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+class SentenceEncoder(ABC):
+    """
+    Sentence embedding backend'lerinin ortak arayüzü
+    Tüm backend'ler yerel model dosyalarından yüklenir ve CPU'da çalışır
+    (encode / dimension'ı uygulamayan alt sınıf oluşturulamaz)
+    """
+
+    name = "base"
+    tokenizer = None
+    max_seq_length = 256
+
+    # Bir token'ın karakter cinsinden kaba üst sınırı (ön kesim için)
+    MAX_CHARS_PER_TOKEN = 10
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Text listesini (n, dimension) float32 matrise çevirir"""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Embedding boyutu"""
+
+    @property
+    def max_chars(self) -> int:
+        """Token limitini kesin olarak aşan karakter sayısı"""
+        return self.max_seq_length * self.MAX_CHARS_PER_TOKEN
+
+    def prepare(self, text: str) -> str:
+        """Text'i temizler ve token limitinde keser (encode öncesi)"""
+        # Model token limitinin çok ötesindeki kısmı regex'lere sokma
+        # (boşluk/satır sonları sonradan silineceği için iki kat pay bırak)
+        max_chars = self.max_chars * 2
+        if len(text) > max_chars:
+            text = text[:max_chars]
+        # Gereksiz karakterleri temizle
+        text = re.sub(r'\n+', ' ', text)
+        text = re.sub(r'\s+', ' ', text)
+        text = text.strip()
+        # Modelin zaten atacağı token'ları kes
+        return self.truncate(text)
+
+    def truncate(self, text: str) -> str:
+        """
+        Text'i modelin token limitinde keser
+        Model bu token'ları zaten atacağı için tokenize/encode maliyeti boşa gider
+        """
+        if self.tokenizer is None or not getattr(self.tokenizer, "is_fast", False):
+            return text[:self.max_chars]
+
+        # [CLS] ve [SEP] için 2 token ayır
+        limit = max(1, self.max_seq_length - 2)
+        encoded = self.tokenizer(
+            text, add_special_tokens=False, truncation=True,
+            max_length=limit, return_offsets_mapping=True
+        )
+        offsets = encoded["offset_mapping"]
+        if len(offsets) < limit:
+            return text
+        return text[:offsets[-1][1]]
+
+    def encode_bucketed(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Text'leri uzunluğa göre sıralayıp benzer uzunluktakileri aynı batch'te
+        encode eder, sonucu orijinal sıraya geri koyar.
+        Kısa sorgular uzun CV'lerin boyuna kadar padding'lenmez.
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        embeddings = None
+        for start in range(0, len(texts), batch_size):
+            bucket = order[start:start + batch_size]
+            encoded = self.encode([texts[i] for i in bucket], batch_size=len(bucket))
+            if embeddings is None:
+                embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            embeddings[bucket] = encoded
+        return embeddings
+
+class TorchEncoder(SentenceEncoder):
+    """PyTorch fp32 SentenceTransformer (referans backend)"""
+
+    name = "torch"
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        self.model = SentenceTransformer(model_path, device="cpu")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
+
+class QuantizedTorchEncoder(TorchEncoder):
+    """Linear katmanları dinamik int8 quantize edilmiş PyTorch modeli"""
+
+    name = "torch-int8"
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        super().__init__(model_path, num_threads=num_threads)
+        import torch
+
+        # Ağırlıklar int8'e çevrilir, aktivasyonlar çalışma anında quantize edilir
+        self.model = torch.quantization.quantize_dynamic(
+            self.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+class OnnxEncoder(SentenceEncoder):
+    """Export edilmiş transformer'ı ONNX Runtime CPU session'ı ile çalıştırır"""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, onnx_path: Optional[str] = None, num_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("ONNX backend için onnxruntime gerekli: pip install onnxruntime")
+        from transformers import AutoTokenizer
+
+        onnx_path = onnx_path or os.path.join(model_path, "onnx", "model.onnx")
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"ONNX model bulunamadı: {onnx_path} "
+                f"(python -m app.services.encoders --export-onnx {onnx_path})"
+            )
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.max_seq_length, self.pooling_mode = self._read_sentence_config(model_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            encoded = self.tokenizer(
+                chunk, padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {
+                name: value.astype(np.int64)
+                for name, value in encoded.items() if name in self.input_names
+            }
+            token_embeddings = self.session.run(None, feeds)[0]
+            outputs.append(self._pool(token_embeddings, encoded["attention_mask"]))
+        if not outputs:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack(outputs).astype(np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return int(self._dimension)
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """SentenceTransformer Pooling katmanının numpy karşılığı"""
+        if self.pooling_mode == "cls":
+            return token_embeddings[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return summed / counts
+
+    @staticmethod
+    def _read_sentence_config(model_path: str):
+        """max_seq_length ve pooling modunu SentenceTransformer config'inden okur"""
+        max_seq_length = 256
+        pooling_mode = "mean"
+
+        config_path = os.path.join(model_path, "sentence_bert_config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                max_seq_length = json.load(f).get("max_seq_length", max_seq_length)
+
+        pooling_path = os.path.join(model_path, "1_Pooling", "config.json")
+        if os.path.exists(pooling_path):
+            with open(pooling_path) as f:
+                if json.load(f).get("pooling_mode_cls_token"):
+                    pooling_mode = "cls"
+
+        return max_seq_length, pooling_mode
+
+ENCODER_BACKENDS = {
+    TorchEncoder.name: TorchEncoder,
+    QuantizedTorchEncoder.name: QuantizedTorchEncoder,
+    OnnxEncoder.name: OnnxEncoder
+}
+
+def encoder_model_path() -> str:
+    """Yüklenen model: ENCODER_MODEL_PATH, boşsa SENTENCE_TRANSFORMER_MODEL"""
+    return settings.ENCODER_MODEL_PATH or settings.SENTENCE_TRANSFORMER_MODEL
+
+def encoder_model_key() -> str:
+    """
+    Embedding'leri üreten model ve backend (cache namespace'i, embedding_model
+    alanı ve checkpoint anahtarı); model değişince eski embedding'ler geçersizdir
+    """
+    return f"{encoder_model_path()}:{settings.ENCODER_BACKEND}"
+
+def create_encoder(backend: str, model_path: str, onnx_path: Optional[str] = None,
+                   num_threads: int = 0) -> SentenceEncoder:
+    """Backend adına göre encoder oluşturur"""
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (options: {', '.join(ENCODER_BACKENDS)})")
+    if backend == OnnxEncoder.name:
+        return OnnxEncoder(model_path, onnx_path=onnx_path, num_threads=num_threads)
+    return ENCODER_BACKENDS[backend](model_path, num_threads=num_threads)
+
+def export_onnx(model_path: str, output_path: str, opset: int = 14):
+    """SentenceTransformer'ın transformer katmanını ONNX'e export eder"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_path, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            output_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """Satırları birim uzunluğa getirir (inner product = cosine similarity)"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+def check_backend_parity(corpus: List[str], model_path: str, backends: Optional[List[str]] = None,
+                         onnx_path: Optional[str] = None, tolerance: float = 0.01,
+                         batch_size: int = 32) -> Dict[str, Dict]:
+    """
+    Her backend'in fp32 PyTorch'a göre cosine sapmasını (1 - cos) ve hızını ölçer
+
+    Sonuç: backend -> {mean_drift, max_drift, texts_per_sec, within_tolerance}
+    """
+    backends = backends or list(ENCODER_BACKENDS)
+    report = {}
+
+    reference_encoder = TorchEncoder(model_path)
+    started = time.perf_counter()
+    reference = normalize_embeddings(reference_encoder.encode(corpus, batch_size=batch_size))
+    reference_seconds = time.perf_counter() - started
+
+    for backend in backends:
+        if backend == TorchEncoder.name:
+            embeddings, seconds = reference, reference_seconds
+        else:
+            try:
+                encoder = create_encoder(backend, model_path, onnx_path=onnx_path)
+            except Exception as e:
+                report[backend] = {'error': str(e)}
+                continue
+            started = time.perf_counter()
+            embeddings = normalize_embeddings(encoder.encode(corpus, batch_size=batch_size))
+            seconds = time.perf_counter() - started
+
+        drift = 1.0 - np.sum(reference * embeddings, axis=1)
+        report[backend] = {
+            'mean_drift': float(drift.mean()),
+            'max_drift': float(drift.max()),
+            'texts_per_sec': len(corpus) / seconds if seconds > 0 else 0.0,
+            'within_tolerance': bool(drift.max() <= tolerance)
+        }
+
+    return report
+
+SAMPLE_CORPUS = [
+    "Senior Python developer with 6 years of Django, FastAPI and PostgreSQL experience.",
+    "Frontend engineer skilled in React, TypeScript and modern CSS frameworks.",
+    "Data scientist experienced with machine learning, pandas and scikit-learn.",
+    "DevOps engineer managing Kubernetes clusters and CI/CD pipelines on AWS.",
+    "Mobil uygulama geliştirici, Flutter ve Kotlin ile 4 yıllık deneyim.",
+    "Proje yöneticisi, Agile ve Scrum süreçlerinde ekip liderliği.",
+    "Backend developer building microservices in Java and Spring Boot.",
+    "UX/UI designer creating prototypes in Figma and Adobe XD."
+]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encoder backend parity check")
+    parser.add_argument("--model-path", default=encoder_model_path())
+    parser.add_argument("--onnx-path", default=settings.ONNX_MODEL_PATH or None)
+    parser.add_argument("--corpus", help="Her satırda bir text olan dosya")
+    parser.add_argument("--backends", nargs="+", default=list(ENCODER_BACKENDS))
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--export-onnx", metavar="OUTPUT_PATH", help="Modeli ONNX'e export et ve çık")
+    args = parser.parse_args()
+
+    if args.export_onnx:
+        export_onnx(args.model_path, args.export_onnx)
+        print(f"✅ ONNX model kaydedildi: {args.export_onnx}")
+    else:
+        if args.corpus:
+            with open(args.corpus, encoding="utf-8") as f:
+                corpus = [line.strip() for line in f if line.strip()]
+        else:
+            corpus = SAMPLE_CORPUS
+
+        results = check_backend_parity(
+            corpus, args.model_path, backends=args.backends,
+            onnx_path=args.onnx_path, tolerance=args.tolerance
+        )
+        for backend, result in results.items():
+            print(f"{backend}: {json.dumps(result)}")
@@ -0,0 +1,238 @@
+"""
+FAISS index tipleri ve arama parametreleri
+
+- flat: IndexFlatIP, tam tarama (küçük koleksiyonlar için)
+- ivf:  IndexIVFFlat, sorguda nprobe kadar liste taranır (eğitim gerekir)
+- hnsw: IndexHNSWFlat, graf tabanlı arama, sorguda efSearch
+
+Sıkıştırılmış (kayıplı) codec'ler:
+- sqfp16: IndexScalarQuantizer fp16, boyut başına 2 byte
+- sq8:    IndexScalarQuantizer 8 bit, boyut başına 1 byte (eğitim gerekir)
+- ivfpq:  IndexIVFPQ, vektör başına pq_m byte (eğitim gerekir)
+
+Flat, HNSW ve SQ index'leri dokümanların int64 id'leri için IndexIDMap2 ile
+sarılır. IVF id'leri kendi listelerinde tuttuğu için sarılmaz (IDMap2 + IVF
+remove_ids sonrası yanlış id döndürür).
+
+IVF snapshot'ları memory-map ile (salt okunur) yüklenebilir; aynı makinedeki
+worker'lar listeleri page cache'te paylaşır. FAISS 1.7 Flat / SQ / HNSW
+index'lerini mmap ile açamaz, bunlar her zaman belleğe okunur.
+
+Kullanım (codec başına bellek tahmini):
+    python -m app.services.index_factory --dim 384 --count 500000
+"""
+
+import math
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ('flat', 'ivf', 'hnsw', 'sqfp16', 'sq8', 'ivfpq')
+# Kaydedilen vektörü yaklaşık tutan codec'ler (tam vektörlerle yeniden skorlanabilir)
+LOSSY_TYPES = ('sqfp16', 'sq8', 'ivfpq')
+# Bellek bütçesi aşıldığında denenecek codec'ler, en doğrudan en küçüğe
+COMPRESSION_ORDER = ('sqfp16', 'sq8', 'ivfpq')
+
+DEFAULT_INDEX_PARAMS = {
+    'nlist': 0,             # 0 = koleksiyon boyutuna göre otomatik
+    'nprobe': 16,
+    'hnsw_m': 32,
+    'ef_construction': 200,
+    'ef_search': 64,
+    'pq_m': 0               # 0 = boyut / 8 (vektör başına byte)
+}
+
+SQ_TYPES = {
+    'sqfp16': faiss.ScalarQuantizer.QT_fp16,
+    'sq8': faiss.ScalarQuantizer.QT_8bit
+}
+
+# IVF eğitiminde liste başına en az bu kadar vektör olmalı
+MIN_POINTS_PER_LIST = 39
+MAX_POINTS_PER_LIST = 256
+# PQ alt-quantizer'ları 256 merkezli (8 bit)
+PQ_CENTROIDS = 256
+ID_BYTES = 8
+
+def ivf_nlist(ntotal: int, requested: int = 0) -> int:
+    """IVF liste sayısı: verilmediyse ~4 * sqrt(n), eğitim için yeterli vektör kalacak şekilde"""
+    nlist = requested or int(4 * math.sqrt(max(ntotal, 1)))
+    return max(1, min(nlist, ntotal // MIN_POINTS_PER_LIST))
+
+def pq_m(dimension: int, requested: int = 0) -> int:
+    """PQ alt-vektör sayısı: boyutu tam bölen, hedefi geçmeyen en büyük değer"""
+    target = max(1, min(requested or dimension // 8, dimension))
+    return next(m for m in range(target, 0, -1) if dimension % m == 0)
+
+def min_training_vectors(index_type: str) -> int:
+    """Index tipinin kurulabilmesi için gereken en az vektör sayısı"""
+    if index_type == 'ivf':
+        return MIN_POINTS_PER_LIST
+    if index_type == 'ivfpq':
+        return PQ_CENTROIDS * MIN_POINTS_PER_LIST
+    return 1
+
+def bytes_per_vector(index_type: str, dimension: int, params: Optional[Dict] = None) -> int:
+    """Index tipinin vektör başına yaklaşık bellek kullanımı (kod + int64 id)"""
+    params = {**DEFAULT_INDEX_PARAMS, **(params or {})}
+    if index_type in ('flat', 'ivf'):
+        code = 4 * dimension
+    elif index_type == 'hnsw':
+        # Vektör + seviye 0'daki 2 * M komşu bağlantısı (int32)
+        code = 4 * dimension + 2 * params['hnsw_m'] * 4
+    elif index_type == 'sqfp16':
+        code = 2 * dimension
+    elif index_type == 'sq8':
+        code = dimension
+    elif index_type == 'ivfpq':
+        code = pq_m(dimension, params['pq_m'])
+    else:
+        raise ValueError(f"Unknown index type: {index_type} (options: {', '.join(INDEX_TYPES)})")
+    return code + ID_BYTES
+
+def select_index_type(preferred: str, dimension: int, ntotal: int, memory_budget: int,
+                      params: Optional[Dict] = None) -> str:
+    """
+    Bellek bütçesine sığan en doğru index tipini seçer: önce tercih edilen tip,
+    sığmazsa sırayla sqfp16, sq8, ivfpq. Hiçbiri sığmazsa en küçüğü döner.
+    Hiçbir tip kurulamıyorsa (boş index) flat döner.
+    """
+    if memory_budget <= 0:
+        return preferred
+    candidates = [preferred] + [codec for codec in COMPRESSION_ORDER if codec != preferred]
+    buildable = [index_type for index_type in candidates if ntotal >= min_training_vectors(index_type)]
+    for index_type in buildable:
+        if bytes_per_vector(index_type, dimension, params) * ntotal <= memory_budget:
+            return index_type
+    if not buildable:
+        return 'flat'
+    return min(buildable, key=lambda index_type: bytes_per_vector(index_type, dimension, params))
+
+def create_index(index_type: str, dimension: int, ntotal: int = 0,
+                 params: Optional[Dict] = None) -> faiss.Index:
+    """
+    Verilen tipte boş index oluşturur (ivf için henüz eğitilmemiş).
+    ntotal, IVF liste sayısını belirlemek için beklenen vektör sayısıdır.
+    """
+    params = {**DEFAULT_INDEX_PARAMS, **(params or {})}
+    if index_type == 'flat':
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+    if index_type == 'ivf':
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, ivf_nlist(ntotal, params['nlist']),
+                                   faiss.METRIC_INNER_PRODUCT)
+        # Quantizer index ile birlikte yaşasın
+        index.own_fields = True
+        quantizer.this.disown()
+        index.nprobe = params['nprobe']
+        return index
+    if index_type == 'ivfpq':
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, ivf_nlist(ntotal, params['nlist']),
+                                 pq_m(dimension, params['pq_m']), 8, faiss.METRIC_INNER_PRODUCT)
+        index.own_fields = True
+        quantizer.this.disown()
+        index.nprobe = params['nprobe']
+        return index
+    if index_type in SQ_TYPES:
+        return faiss.IndexIDMap2(faiss.IndexScalarQuantizer(
+            dimension, SQ_TYPES[index_type], faiss.METRIC_INNER_PRODUCT
+        ))
+    if index_type == 'hnsw':
+        inner = faiss.IndexHNSWFlat(dimension, params['hnsw_m'], faiss.METRIC_INNER_PRODUCT)
+        inner.hnsw.efConstruction = params['ef_construction']
+        inner.hnsw.efSearch = params['ef_search']
+        return faiss.IndexIDMap2(inner)
+    raise ValueError(f"Unknown index type: {index_type} (options: {', '.join(INDEX_TYPES)})")
+
+def train_index(index: faiss.Index, vectors: np.ndarray, seed: int = 1234):
+    """Eğitim gereken index'i vektörlerden bir örneklemle eğitir"""
+    if index.is_trained:
+        return
+    inner = base_index(index)
+    max_points = 65536
+    if isinstance(inner, faiss.IndexIVF):
+        max_points = max(inner.nlist, PQ_CENTROIDS) * MAX_POINTS_PER_LIST
+    sample_size = min(len(vectors), max_points)
+    if sample_size < len(vectors):
+        rows = np.random.default_rng(seed).choice(len(vectors), sample_size, replace=False)
+        vectors = vectors[np.sort(rows)]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+def read_index(path: str, mmap: bool = False) -> faiss.Index:
+    """Index'i okur; mmap ise IVF listeleri dosyadan salt okunur map edilir"""
+    if mmap:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    return faiss.read_index(path)
+
+def is_memory_mapped(index: faiss.Index) -> bool:
+    """IVF listeleri dosyadan map edilmiş (değiştirilemez) mi"""
+    inner = base_index(index)
+    return (isinstance(inner, faiss.IndexIVF) and
+            isinstance(faiss.downcast_InvertedLists(inner.invlists), faiss.OnDiskInvertedLists))
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """IndexIDMap2 ile sarılıysa içteki index'i döner"""
+    if isinstance(index, faiss.IndexIDMap2):
+        return faiss.downcast_index(index.index)
+    return index
+
+def index_type_of(index: faiss.Index) -> str:
+    inner = base_index(index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return 'ivfpq'
+    if isinstance(inner, faiss.IndexIVF):
+        return 'ivf'
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return 'sq8' if inner.sq.qtype == SQ_TYPES['sq8'] else 'sqfp16'
+    if isinstance(inner, faiss.IndexHNSW):
+        return 'hnsw'
+    return 'flat'
+
+def supports_removal(index: faiss.Index) -> bool:
+    """HNSW grafından vektör silinemez, compaction yeniden kurarak yapılır"""
+    return not isinstance(base_index(index), faiss.IndexHNSW)
+
+def supports_range_search(index: faiss.Index) -> bool:
+    """FAISS 1.7'de HNSW ve ScalarQuantizer range_search desteklemez"""
+    return isinstance(base_index(index), (faiss.IndexFlat, faiss.IndexIVF))
+
+def search_parameters(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                      selector: Optional[faiss.IDSelector] = None) -> Optional[faiss.SearchParameters]:
+    """
+    Sorgu bazlı nprobe / efSearch parametreleri ve id filtresi (index tipine
+    uymayan değer yok sayılır). Verilmeyen değerler index'in kendi ayarından gelir.
+    """
+    inner = base_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        if not nprobe and selector is None:
+            return None
+        params = faiss.SearchParametersIVF()
+        params.nprobe = int(nprobe or inner.nprobe)
+    elif isinstance(inner, faiss.IndexHNSW):
+        if not ef_search and selector is None:
+            return None
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = int(ef_search or inner.hnsw.efSearch)
+    elif selector is not None:
+        params = faiss.SearchParameters()
+    else:
+        return None
+    if selector is not None:
+        params.sel = selector
+    return params
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Approximate index memory per codec")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--pq-m", type=int, default=0)
+    args = parser.parse_args()
+
+    for index_type in INDEX_TYPES:
+        size = bytes_per_vector(index_type, args.dim, {'pq_m': args.pq_m})
+        print(f"{index_type:>7}: {size:5d} bytes/vector, "
+              f"{size * args.count / 1024 ** 2:10.1f} MB for {args.count} vectors")
@@ -0,0 +1,143 @@
+"""
+Sürümlü FAISS index dizinleri (blue/green geçiş)
+
+Offline kurulan index'ler FAISS_INDEX_PATH/versions/<sürüm>/ altına yazılır.
+Sürüm dizini cv_index / job_index dosyalarını ve manifest.json'ı içerir;
+manifest en son yazıldığı için manifest'i olmayan dizin yarımdır ve
+yüklenmez. FAISS_INDEX_PATH/CURRENT aktif sürümü tutar, restart'ta aynı
+sürüm açılır (dosya yoksa index'ler doğrudan FAISS_INDEX_PATH'tedir).
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+
+def versions_path(root: str) -> str:
+    return os.path.join(root, VERSIONS_DIR)
+
+def version_path(root: str, version: str) -> str:
+    return os.path.join(versions_path(root), version)
+
+def new_version(root: str) -> str:
+    """Zaman damgalı, sıralanabilir yeni sürüm adı (dizini oluşturur)"""
+    base = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    version, suffix = base, 1
+    while os.path.exists(version_path(root, version)):
+        suffix += 1
+        version = f"{base}-{suffix}"
+    os.makedirs(version_path(root, version))
+    return version
+
+def _write_atomic(path: str, content: str):
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+def write_manifest(directory: str, manifest: Dict):
+    """Manifest'i yazar; sürüm bundan sonra yüklenebilir"""
+    _write_atomic(os.path.join(directory, MANIFEST_FILE), json.dumps(manifest, indent=2))
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    """Sürümün manifest'i, yoksa / okunamıyorsa None"""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def list_versions(root: str) -> List[str]:
+    """Tamamlanmış (manifest'i olan) sürümler, eskiden yeniye"""
+    if not os.path.isdir(versions_path(root)):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_path(root))
+        if os.path.isfile(os.path.join(version_path(root, name), MANIFEST_FILE))
+    )
+
+def latest_version(root: str) -> Optional[str]:
+    versions = list_versions(root)
+    return versions[-1] if versions else None
+
+def read_current(root: str) -> Optional[str]:
+    """Aktif sürüm; CURRENT yoksa ya da sürüm silinmişse None"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version if version and read_manifest(version_path(root, version)) is not None else None
+
+def write_current(root: str, version: Optional[str]):
+    """Aktif sürümü kaydeder; None ise kök dizindeki index'lere dönülür"""
+    path = os.path.join(root, CURRENT_FILE)
+    if version is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(root, exist_ok=True)
+    _write_atomic(path, version + "\n")
+
+class IndexVersionWatcher:
+    """
+    versions dizinini yoklayan thread: aktif sürümden yeni bir sürüm
+    yayınlandığında on_new_version(sürüm) çağrılır. Yüklenemeyen ya da
+    geri alınan sürümler atlanır (skip), bir sonraki sürüm beklenir.
+    """
+
+    def __init__(self, root: str, current: Callable[[], Optional[str]],
+                 on_new_version: Callable[[str], object], poll_seconds: float = 30.0):
+        self.root = root
+        self.current = current
+        self.on_new_version = on_new_version
+        self.poll_seconds = poll_seconds
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._skipped: Set[str] = set()
+        self.reloads = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-version-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def skip(self, version: str):
+        """Sürüm otomatik olarak tekrar yüklenmesin"""
+        self._skipped.add(version)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.run_once()
+
+    def run_once(self) -> Optional[str]:
+        """Yeni sürüm varsa yükletir, yüklenen sürümü döner"""
+        version = latest_version(self.root)
+        current = self.current()
+        if version is None or version in self._skipped or (current is not None and version <= current):
+            return None
+        try:
+            self.on_new_version(version)
+            self.reloads += 1
+            return version
+        except Exception as e:
+            self.errors += 1
+            self.skip(version)
+            print(f"Index version {version} could not be loaded: {e}")
+            return None
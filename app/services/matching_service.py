@@ -1,13 +1,56 @@
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict, Optional, Sequence, Tuple
+from bson import ObjectId
 from app.services.nlp_service import nlp_service
+from app.services.skill_index import cv_skill_index, job_skill_index
 from app.models.cv import CVModel
 from app.models.job_posting import JobPosting
-from app.models.match import MatchCreate
+from app.models.match import MatchCreate, MatchResult
+from app.utils.skill_vocabulary import overlap_counts
 import numpy as np
 
+# İş deneyim seviyesine göre beklenen deneyim sayısı (bilinmeyen seviye = 1)
+EXPERIENCE_LEVEL_MAP = {
+    'Entry': 0,
+    'Mid': 2,
+    'Senior': 4
+}
+
+# İstenen sonuç başına her aday kaynağından (FAISS, beceri index'i) alınan aday
+MATCH_CANDIDATE_FACTOR = 5
+
+# Skorlama için MongoDB'den çekilen alanlar (raw_text gibi büyük alanlar gelmez)
+CV_MATCH_PROJECTION = {"full_name": 1, "email": 1, "skills": 1, "experience": 1, "embedding": 1}
+JOB_MATCH_PROJECTION = {"title": 1, "company": 1, "skills_required": 1, "experience_level": 1,
+                        "embedding": 1, "is_active": 1}
+
+def _cv_from_document(document: Dict) -> CVModel:
+    """Projeksiyonla çekilen CV dokümanından model (çekilmeyen zorunlu alanlar boş)"""
+    return CVModel(**{'full_name': '', 'email': '', 'raw_text': '', **document, '_id': str(document['_id'])})
+
+def _job_from_document(document: Dict) -> JobPosting:
+    return JobPosting(**{'title': '', 'company': '', 'description': '', 'raw_text': '',
+                         **document, '_id': str(document['_id'])})
+
+def _valid_ids(ids: Optional[List[str]]) -> Optional[List[str]]:
+    """Geçerli ObjectId'ler; liste verilmediyse (ya da boşsa) None = kısıt yok"""
+    if not ids:
+        return None
+    return [doc_id for doc_id in dict.fromkeys(ids) if ObjectId.is_valid(doc_id)]
+
+def _restrict(ids: List[str], allowed: Optional[List[str]], limit: int) -> List[str]:
+    """Adayları izin verilen id'lerle sınırlar, en fazla limit tane"""
+    if allowed is not None:
+        allowed = set(allowed)
+        ids = [doc_id for doc_id in ids if doc_id in allowed]
+    return ids[:limit]
+
 class MatchingService:
-    def __init__(self):
+    def __init__(self, db=None):
+        self.db = db
         self.nlp_service = nlp_service
+        self.cv_skill_index = cv_skill_index
+        self.job_skill_index = job_skill_index
         
         # Ağırlıklar
         self.weights = {
@@ -16,13 +59,79 @@ class MatchingService:
             'experience_match_score': 0.2
         }
     
-    def find_matching_jobs(self, cv: CVModel, limit: int = 10) -> List[Dict]:
-        """CV için uygun işleri bulur"""
-        if not cv.embedding:
+    async def find_matching_jobs(self, cv_id: str, job_ids: Optional[List[str]] = None, threshold: float = 0.0,
+                                 max_results: int = 10) -> List[MatchResult]:
+        """
+        CV için en uygun işler. CV projeksiyonla çekilir, adaylar FAISS ve beceri
+        index'inden (job_ids verildiyse onlarla sınırlı) bulunur, tek $in sorgusuyla
+        yüklenip toplu skorlanır. threshold overall_score'a uygulanır.
+        """
+        cv_document = await self.db.cvs.find_one({"_id": ObjectId(cv_id)}, CV_MATCH_PROJECTION)
+        if cv_document is None:
+            raise LookupError(f"CV not found: {cv_id}")
+        cv = _cv_from_document(cv_document)
+        job_ids = _valid_ids(job_ids)
+        if job_ids is not None and not job_ids:
+            return []
+        
+        # FAISS araması CPU'da çalışır, event loop bloklanmasın
+        loop = asyncio.get_running_loop()
+        candidate_ids = await loop.run_in_executor(
+            None, self.candidate_job_ids, cv, max_results * MATCH_CANDIDATE_FACTOR, job_ids
+        )
+        if not candidate_ids:
+            return []
+        documents = await self.db.jobs.find(
+            {"_id": {"$in": [ObjectId(job_id) for job_id in candidate_ids]}, "is_active": True},
+            JOB_MATCH_PROJECTION
+        ).to_list(length=len(candidate_ids))
+        jobs = [_job_from_document(document) for document in documents]
+        return [MatchResult(**match.model_dump())
+                for match in self.score_jobs_for_cv(cv, jobs, top_k=max_results, min_score=threshold)]
+    
+    async def find_matching_cvs(self, job_id: str, cv_ids: Optional[List[str]] = None, threshold: float = 0.0,
+                                max_results: int = 10) -> List[MatchResult]:
+        """İş ilanı için en uygun CV'ler (find_matching_jobs'un tersi)"""
+        job_document = await self.db.jobs.find_one({"_id": ObjectId(job_id)}, JOB_MATCH_PROJECTION)
+        if job_document is None:
+            raise LookupError(f"Job not found: {job_id}")
+        job = _job_from_document(job_document)
+        cv_ids = _valid_ids(cv_ids)
+        if cv_ids is not None and not cv_ids:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        candidate_ids = await loop.run_in_executor(
+            None, self.candidate_cv_ids, job, max_results * MATCH_CANDIDATE_FACTOR, cv_ids
+        )
+        if not candidate_ids:
+            return []
+        documents = await self.db.cvs.find(
+            {"_id": {"$in": [ObjectId(cv_id) for cv_id in candidate_ids]}},
+            CV_MATCH_PROJECTION
+        ).to_list(length=len(candidate_ids))
+        cvs = [_cv_from_document(document) for document in documents]
+        return [MatchResult(**match.model_dump())
+                for match in self.score_cvs_for_job(job, cvs, top_k=max_results, min_score=threshold)]
+    
+    async def batch_process_all_matches(self, top_k: Optional[int] = None, min_score: Optional[float] = None,
+                                        progress=None) -> Dict:
+        """
+        Tüm CV'leri tüm aktif ilanlara karşı bloklu olarak skorlar, CV başına en
+        iyi top_k eşleşmeyi matches koleksiyonuna yazar (bkz. batch_matching)
+        """
+        # batch_matching bu modülü import eder
+        from app.services.batch_matching import create_engine
+        
+        return await create_engine(self, self.db, top_k=top_k, min_score=min_score, progress=progress).run()
+    
+    def find_similar_jobs(self, cv: CVModel, limit: int = 10, job_ids: Optional[List[str]] = None) -> List[Dict]:
+        """CV'ye embedding'i en benzer işler (job_ids verilirse onlarla sınırlı)"""
+        if cv.embedding is None or len(cv.embedding) == 0:
             return []
         
         # Benzer işleri bul
-        similar_jobs = self.nlp_service.search_similar_jobs(cv.embedding, limit)
+        similar_jobs = self.nlp_service.search_similar_jobs(cv.embedding, limit, job_ids=job_ids)
         
         matches = []
         for job_match in similar_jobs:
@@ -35,13 +144,13 @@ class MatchingService:
         
         return matches
     
-    def find_matching_cvs(self, job: JobPosting, limit: int = 10) -> List[Dict]:
-        """İş için uygun CV'leri bulur"""
-        if not job.embedding:
+    def find_similar_cvs(self, job: JobPosting, limit: int = 10, cv_ids: Optional[List[str]] = None) -> List[Dict]:
+        """İşe embedding'i en benzer CV'ler (cv_ids verilirse onlarla sınırlı)"""
+        if job.embedding is None or len(job.embedding) == 0:
             return []
         
         # Benzer CV'leri bul
-        similar_cvs = self.nlp_service.search_similar_cvs(job.embedding, limit)
+        similar_cvs = self.nlp_service.search_similar_cvs(job.embedding, limit, cv_ids=cv_ids)
         
         matches = []
         for cv_match in similar_cvs:
@@ -54,6 +163,44 @@ class MatchingService:
         
         return matches
     
+    def find_skill_candidate_jobs(self, cv: CVModel, match_all: bool = False, min_overlap: int = 1,
+                                  limit: Optional[int] = 100) -> List[Dict]:
+        """CV'nin becerilerini isteyen aktif işler (beceri ters index'inden, embedding gerekmez)"""
+        return [
+            {'job_id': job_id, 'matched_skills_count': count, 'cv_id': str(cv.id)}
+            for job_id, count in self.job_skill_index.candidates(cv.skill_ids, match_all, min_overlap, limit)
+        ]
+    
+    def find_skill_candidate_cvs(self, job: JobPosting, match_all: bool = False, min_overlap: int = 1,
+                                 limit: Optional[int] = 100) -> List[Dict]:
+        """İşin gerekli becerilerine sahip CV'ler (match_all ise hepsine)"""
+        return [
+            {'cv_id': cv_id, 'matched_skills_count': count, 'job_id': str(job.id)}
+            for cv_id, count in self.cv_skill_index.candidates(job.skill_ids, match_all, min_overlap, limit)
+        ]
+    
+    def candidate_job_ids(self, cv: CVModel, limit: int = 10, job_ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Yoğun arama ve beceri index'i adaylarının birleşimi (önce FAISS sonuçları),
+        her kaynaktan en fazla limit aday. job_ids limit'ten azsa hepsi aday olur.
+        """
+        if job_ids is not None and len(job_ids) <= limit:
+            return list(dict.fromkeys(job_ids))
+        ids = [match['job_id'] for match in self.find_similar_jobs(cv, limit, job_ids)]
+        ids += _restrict([match['job_id'] for match in self.find_skill_candidate_jobs(
+            cv, limit=None if job_ids is not None else limit
+        )], job_ids, limit)
+        return list(dict.fromkeys(ids))
+    
+    def candidate_cv_ids(self, job: JobPosting, limit: int = 10, cv_ids: Optional[List[str]] = None) -> List[str]:
+        if cv_ids is not None and len(cv_ids) <= limit:
+            return list(dict.fromkeys(cv_ids))
+        ids = [match['cv_id'] for match in self.find_similar_cvs(job, limit, cv_ids)]
+        ids += _restrict([match['cv_id'] for match in self.find_skill_candidate_cvs(
+            job, limit=None if cv_ids is not None else limit
+        )], cv_ids, limit)
+        return list(dict.fromkeys(ids))
+    
     def calculate_detailed_match(self, cv: CVModel, job: JobPosting) -> MatchCreate:
         """CV ve iş arasında detaylı eşleştirme hesaplar"""
         
@@ -99,14 +246,127 @@ class MatchingService:
             match_details=match_details
         )
     
+    def score_jobs_for_cv(self, cv: CVModel, jobs: Sequence[JobPosting], top_k: int = 10,
+                          min_score: float = 0.0) -> List[MatchCreate]:
+        """
+        Bir CV'yi N işe karşı tek seferde skorlar (calculate_detailed_match ile
+        aynı skorlar). Skorlar matris işlemleriyle hesaplanır, MatchCreate
+        sadece overall_score'u min_score üstündeki en iyi top_k iş için oluşturulur.
+        """
+        if not jobs or top_k <= 0:
+            return []
+        similarity = self._batch_cosine_similarity(cv.embedding, [job.embedding for job in jobs])
+        skill = self._batch_skill_scores_for_cv(cv.skill_ids, [job.skill_ids for job in jobs])
+        required = np.array([EXPERIENCE_LEVEL_MAP.get(job.experience_level, 1) for job in jobs], dtype=np.float32)
+        experience = self._batch_experience_match(np.full(len(jobs), len(cv.experience), dtype=np.float32), required)
+        
+        top = self._top_matches(similarity, skill, experience, top_k, min_score)
+        return [self._match_result(cv, jobs[i], similarity[i], skill[i], experience[i]) for i in top]
+    
+    def score_cvs_for_job(self, job: JobPosting, cvs: Sequence[CVModel], top_k: int = 10,
+                          min_score: float = 0.0) -> List[MatchCreate]:
+        """Bir işi N CV'ye karşı tek seferde skorlar (score_jobs_for_cv'nin tersi)"""
+        if not cvs or top_k <= 0:
+            return []
+        similarity = self._batch_cosine_similarity(job.embedding, [cv.embedding for cv in cvs])
+        skill = self._batch_skill_scores_for_job(job.skill_ids, [cv.skill_ids for cv in cvs])
+        counts = np.array([len(cv.experience) for cv in cvs], dtype=np.float32)
+        required = np.full(len(cvs), EXPERIENCE_LEVEL_MAP.get(job.experience_level, 1), dtype=np.float32)
+        experience = self._batch_experience_match(counts, required)
+        
+        top = self._top_matches(similarity, skill, experience, top_k, min_score)
+        return [self._match_result(cvs[i], job, similarity[i], skill[i], experience[i]) for i in top]
+    
+    def _top_matches(self, similarity: np.ndarray, skill: np.ndarray, experience: np.ndarray,
+                     top_k: int, min_score: float) -> np.ndarray:
+        """overall_score'a göre en iyi top_k adayın indeksleri (skor sırasında)"""
+        overall = (
+            self.weights['similarity_score'] * similarity +
+            self.weights['skill_match_score'] * skill +
+            self.weights['experience_match_score'] * experience
+        )
+        candidates = np.flatnonzero(overall >= min_score)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-overall[candidates], top_k - 1)[:top_k]]
+        return candidates[np.argsort(-overall[candidates], kind="stable")]
+    
+    def _match_result(self, cv: CVModel, job: JobPosting, similarity_score: float,
+                      skill_match_score: float, experience_match_score: float) -> MatchCreate:
+        """Toplu skorlanan bir çift için MatchCreate (beceri listeleri sadece burada çıkarılır)"""
+        skill_match_result = self.nlp_service.calculate_skill_similarity(cv.skills, job.skills_required)
+        similarity_score = float(similarity_score)
+        skill_match_score = float(skill_match_score)
+        experience_match_score = float(experience_match_score)
+        overall_score = (
+            self.weights['similarity_score'] * similarity_score +
+            self.weights['skill_match_score'] * skill_match_score +
+            self.weights['experience_match_score'] * experience_match_score
+        )
+        return MatchCreate(
+            cv_id=str(cv.id),
+            job_id=str(job.id),
+            similarity_score=similarity_score,
+            skill_match_score=skill_match_score,
+            experience_match_score=experience_match_score,
+            overall_score=overall_score,
+            matched_skills=skill_match_result['matched_skills'],
+            missing_skills=skill_match_result['missing_skills'],
+            match_details={
+                'cv_skills_count': len(cv.skills),
+                'job_skills_count': len(job.skills_required),
+                'matched_skills_count': len(skill_match_result['matched_skills']),
+                'cv_experience_count': len(cv.experience),
+                'job_experience_level': job.experience_level
+            }
+        )
+    
+    @staticmethod
+    def _batch_cosine_similarity(embedding, embeddings: Sequence) -> np.ndarray:
+        """Bir embedding ile N embedding arasındaki cosine similarity (embedding'i olmayanlar 0)"""
+        scores = np.zeros(len(embeddings), dtype=np.float32)
+        if embedding is None or len(embedding) == 0:
+            return scores
+        query = np.asarray(embedding, dtype=np.float32)
+        rows = [i for i, vector in enumerate(embeddings) if vector is not None and len(vector) == len(query)]
+        if not rows:
+            return scores
+        matrix = np.vstack([embeddings[i] for i in rows]).astype(np.float32, copy=False)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        dots = matrix @ query
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(norms > 0, dots / norms, 0.0)
+        # Negatif değerler 0
+        scores[rows] = np.maximum(similarity, 0.0)
+        return scores
+    
+    @staticmethod
+    def _batch_skill_scores_for_cv(cv_skill_ids: np.ndarray, job_skill_ids: Sequence[np.ndarray]) -> np.ndarray:
+        """Her iş için CV'de bulunan gerekli beceri oranı (calculate_skill_similarity skoru)"""
+        lengths = np.fromiter((len(ids) for ids in job_skill_ids), dtype=np.int64, count=len(job_skill_ids))
+        matched_counts = overlap_counts(cv_skill_ids, job_skill_ids)
+        return np.where(lengths > 0, matched_counts / np.maximum(lengths, 1), 0.0).astype(np.float32)
+    
+    @staticmethod
+    def _batch_skill_scores_for_job(job_skill_ids: np.ndarray, cv_skill_ids: Sequence[np.ndarray]) -> np.ndarray:
+        """Her CV için işin gerekli becerilerinden sahip olunanların oranı"""
+        if len(job_skill_ids) == 0:
+            return np.zeros(len(cv_skill_ids), dtype=np.float32)
+        return (overlap_counts(job_skill_ids, cv_skill_ids) / len(job_skill_ids)).astype(np.float32)
+    
+    @staticmethod
+    def _batch_experience_match(counts: np.ndarray, required: np.ndarray) -> np.ndarray:
+        """_calculate_experience_match'in vektörel hali"""
+        partial = np.where(counts == 0, 0.0, counts / np.maximum(required, 1))
+        return np.where(counts >= required, 1.0, partial).astype(np.float32)
+    
     def _calculate_cosine_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """İki embedding arasında cosine similarity hesaplar"""
-        if not embedding1 or not embedding2:
+        if embedding1 is None or embedding2 is None or len(embedding1) == 0 or len(embedding2) == 0:
             return 0.0
         
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
+            vec1 = np.asarray(embedding1, dtype=np.float32)
+            vec2 = np.asarray(embedding2, dtype=np.float32)
             
             # Cosine similarity = dot product / (norm1 * norm2)
             dot_product = np.dot(vec1, vec2)
@@ -129,13 +389,7 @@ class MatchingService:
             cv_experience_count = len(cv.experience)
             
             # İş deneyim seviyesine göre puan ver
-            experience_level_map = {
-                'Entry': 0,
-                'Mid': 2,
-                'Senior': 4
-            }
-            
-            required_experience = experience_level_map.get(job.experience_level, 1)
+            required_experience = EXPERIENCE_LEVEL_MAP.get(job.experience_level, 1)
             
             if cv_experience_count >= required_experience:
                 return 1.0
@@ -1,165 +1,856 @@
+import asyncio
 import numpy as np
-import faiss
 import os
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 from app.config import settings
+from app.services.embedding_cache import EmbeddingCache
+from app.services.encoders import (
+    SentenceEncoder, create_encoder, encoder_model_key, encoder_model_path, normalize_embeddings
+)
+from app.services.dim_reduction import DimensionReducer, create_reducer
+from app.services.index_versions import (
+    IndexVersionWatcher, latest_version, read_current, read_manifest, version_path, write_current
+)
+from app.services.vector_index import IndexMaintainer, VectorIndex
+from app.utils.skill_vocabulary import skill_vocabulary
+
+# Job index'inde filtrelenebilen alanlar (arama sırasında FAISS içinde uygulanır).
+# Index'te sadece aktif ilanlar tutulur, pasifleşen ilan index'ten çıkarılır.
+JOB_FILTER_FIELDS = ('employment_type', 'location', 'experience_level')
+
+def location_bucket(location: Optional[str]) -> Optional[str]:
+    """Lokasyonu filtre kolonu için normalize eder: 'İstanbul, Türkiye' -> 'istanbul'"""
+    if not location:
+        return None
+    bucket = location.split(',')[0].strip().replace('İ', 'I').lower()
+    return bucket or None
+
+def job_index_attributes(job: Dict) -> Dict:
+    """Job dokümanından index öznitelikleri"""
+    return {
+        'employment_type': job.get('employment_type'),
+        'location': location_bucket(job.get('location')),
+        'experience_level': job.get('experience_level')
+    }
+
+class EmbeddingBatcher:
+    """
+    Eşzamanlı embedding isteklerini kısa bir pencere boyunca toplar ve
+    tek bir encode çağrısında işler (dinamik micro-batching).
+    
+    Pencere, kuyruğa ilk istek düştüğünde açılır; max_batch_size isteğe
+    ulaşıldığında ya da max_wait_ms dolduğunda kapanır.
+    """
+    
+    BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+    
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+    
+    def submit(self, text: str) -> Future:
+        """Text'i kuyruğa ekler, sonucu taşıyan Future döner"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+    
+    def encode(self, text: str) -> np.ndarray:
+        """Text'i bir sonraki batch ile encode eder ve sonucu bekler"""
+        return self.submit(text).result()
+    
+    def shutdown(self):
+        """Worker thread'ini durdurur (kuyruktaki istekler önce işlenir)"""
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                self._queue.put(None)
+                self._worker.join()
+            self._worker = None
+    
+    def get_stats(self) -> Dict:
+        """Batch boyutu ve kuyruk bekleme sayaçlarını döner"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['batch_size_histogram'] = dict(self._stats['batch_size_histogram'])
+        
+        batches = stats['batches']
+        requests = stats['requests']
+        stats['avg_batch_size'] = requests / batches if batches else 0.0
+        stats['avg_queue_wait_ms'] = stats['total_queue_wait_ms'] / requests if requests else 0.0
+        stats['avg_encode_ms'] = stats['total_encode_ms'] / batches if batches else 0.0
+        stats['queue_depth'] = self._queue.qsize()
+        return stats
+    
+    def _reset_stats(self):
+        self._stats = {
+            'batches': 0,
+            'requests': 0,
+            'errors': 0,
+            'max_batch_size_seen': 0,
+            'batch_size_histogram': {f"<={bucket}": 0 for bucket in self.BATCH_SIZE_BUCKETS},
+            'total_queue_wait_ms': 0.0,
+            'max_queue_wait_ms': 0.0,
+            'total_encode_ms': 0.0
+        }
+        self._stats['batch_size_histogram'][f">{self.BATCH_SIZE_BUCKETS[-1]}"] = 0
+    
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        """Kuyruktan batch'ler toplar ve encode eder"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        # Pencere kapandı, sadece hazır bekleyenleri al
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._process_batch(batch)
+    
+    def _process_batch(self, batch: List[tuple]):
+        started = time.perf_counter()
+        texts = [text for text, _, _ in batch]
+        failed = False
+        try:
+            embeddings = self.encode_fn(texts)
+        except Exception as e:
+            failed = True
+            for _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+        
+        encode_ms = (time.perf_counter() - started) * 1000
+        waits_ms = [(started - enqueued_at) * 1000 for _, _, enqueued_at in batch]
+        self._record(len(batch), waits_ms, encode_ms, failed)
+    
+    def _record(self, batch_size: int, waits_ms: List[float], encode_ms: float, failed: bool):
+        bucket = next(
+            (f"<={b}" for b in self.BATCH_SIZE_BUCKETS if batch_size <= b),
+            f">{self.BATCH_SIZE_BUCKETS[-1]}"
+        )
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['requests'] += batch_size
+            self._stats['errors'] += batch_size if failed else 0
+            self._stats['max_batch_size_seen'] = max(self._stats['max_batch_size_seen'], batch_size)
+            self._stats['batch_size_histogram'][bucket] += 1
+            self._stats['total_queue_wait_ms'] += sum(waits_ms)
+            self._stats['max_queue_wait_ms'] = max(self._stats['max_queue_wait_ms'], max(waits_ms))
+            self._stats['total_encode_ms'] += encode_ms
 
 class NLPService:
     def __init__(self):
-        self.model = SentenceTransformer(settings.SENTENCE_TRANSFORMER_MODEL)
-        self.cv_index = None
-        self.job_index = None
-        self.cv_embeddings = []
-        self.job_embeddings = []
-        self.cv_ids = []
-        self.job_ids = []
+        # Encoder ve FAISS index'leri ilk kullanımda (veya warm_up ile) yüklenir,
+        # böylece modülü import etmek ucuz kalır
+        self._encoder = None
+        self._indexes_loaded = False
+        self._reducer_loaded = False
+        self._load_lock = threading.RLock()
+        self.reducer: Optional[DimensionReducer] = None
+        self.cv_index: Optional[VectorIndex] = None
+        self.job_index: Optional[VectorIndex] = None
+        # Aktif index sürümü (None = FAISS_INDEX_PATH kökü) ve geri dönüş için önceki sürüm
+        self.index_version: Optional[str] = None
+        self.previous_index_version: Optional[str] = None
+        self._previous_indexes: Dict[str, VectorIndex] = {}
+        # Sürüm yüklenirken gelen index değişiklikleri, geçişten önce yeni sürüme uygulanır
+        self._reload_journal: Optional[List[Tuple[str, Callable]]] = None
+        self._version_lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self.version_watcher: Optional[IndexVersionWatcher] = None
+        # Index değişiklikleri log'a yazılır, snapshot ve compaction arka planda yapılır
+        self.maintainer = IndexMaintainer(
+            lambda: [self.cv_index, self.job_index, *self._previous_indexes.values()],
+            max_pending=settings.FAISS_CHECKPOINT_MAX_PENDING,
+            interval_seconds=settings.FAISS_CHECKPOINT_INTERVAL_SECONDS,
+            compaction_ratio=settings.FAISS_COMPACTION_TOMBSTONE_RATIO
+        )
+        
+        # Eşzamanlı embedding isteklerini tek encode çağrısında birleştir
+        self.batcher = None
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            self.batcher = EmbeddingBatcher(
+                self._encode_batch,
+                max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+                max_wait_ms=settings.EMBEDDING_MAX_WAIT_MS
+            )
         
-        # FAISS index dosyalarını yükle
-        self._load_indexes()
+        # Aynı text için modeli tekrar çalıştırmamak adına cache (disk katmanı warm_up'ta ya da ilk kullanımda açılır)
+        self.cache = None
+        if settings.EMBEDDING_CACHE_ENABLED:
+            disk_path = None
+            if settings.EMBEDDING_CACHE_DISK_ENABLED:
+                disk_path = os.path.join(settings.FAISS_INDEX_PATH, "embedding_cache.sqlite3")
+            # Yüklenen model ve backend anahtarda: ikisinden biri değişince eski kayıtlar kullanılmaz
+            self.cache = EmbeddingCache(
+                namespace=encoder_model_key(),
+                max_memory_items=settings.EMBEDDING_CACHE_SIZE,
+                disk_path=disk_path,
+                max_disk_items=settings.EMBEDDING_CACHE_DISK_MAX_ITEMS
+            )
+        
+        # Async API için encode thread havuzu (ilk kullanımda oluşturulur)
+        self._executor = None
+        self._executor_lock = threading.Lock()
     
-    def _load_indexes(self):
-        """FAISS index dosyalarını yükler"""
+    @property
+    def encoder(self) -> SentenceEncoder:
+        """Ayarlardaki backend ile encoder (ilk erişimde yüklenir)"""
+        if self._encoder is None:
+            self._load_encoder()
+        return self._encoder
+    
+    def _load_encoder(self):
+        with self._load_lock:
+            if self._encoder is None:
+                # torch/onnxruntime import'u da pahalı, sadece gerektiğinde yapılır
+                self._encoder = create_encoder(
+                    settings.ENCODER_BACKEND,
+                    encoder_model_path(),
+                    onnx_path=settings.ONNX_MODEL_PATH or None,
+                    num_threads=settings.ENCODER_NUM_THREADS
+                )
+    
+    def _ensure_indexes(self):
+        """FAISS index'leri henüz yüklenmediyse yükler"""
+        if self._indexes_loaded:
+            return
+        with self._load_lock:
+            if not self._indexes_loaded:
+                self._load_indexes()
+                self.maintainer.start()
+                self._indexes_loaded = True
+    
+    def warm_up(self):
+        """Modeli, index'leri ve embedding cache'ini yükler, ilk encode maliyetini önceden öder"""
         try:
-            cv_index_path = os.path.join(settings.FAISS_INDEX_PATH, "cv_index.faiss")
-            job_index_path = os.path.join(settings.FAISS_INDEX_PATH, "job_index.faiss")
+            if self.cache is not None:
+                self.cache.open()
+            self._load_encoder()
+            self._ensure_indexes()
+            self._encode_batch(["warm up"])
+        except Exception as e:
+            print(f"NLP warm-up error: {e}")
+    
+    def is_ready(self) -> bool:
+        """Model ve index'ler yüklendi mi"""
+        return self._encoder is not None and self._indexes_loaded
+    
+    def get_readiness(self) -> Dict:
+        """Readiness detaylarını döner"""
+        return {
+            'ready': self.is_ready(),
+            'model_loaded': self._encoder is not None,
+            'encoder_backend': settings.ENCODER_BACKEND,
+            'indexes_loaded': self._indexes_loaded,
+            'index_version': self.index_version,
+            'cv_index_size': self.cv_index.ntotal if self.cv_index is not None else 0,
+            'job_index_size': self.job_index.ntotal if self.job_index is not None else 0
+        }
+    
+    @property
+    def dimension(self) -> int:
+        """Yüklü modelin embedding boyutu"""
+        return self.encoder.dimension
+    
+    @property
+    def index_dimension(self) -> int:
+        """FAISS index'lerindeki vektör boyutu (indirgeme varsa indirgenmiş boyut)"""
+        self._ensure_reducer()
+        if self.reducer is not None and self.reducer.is_trained:
+            return self.reducer.output_dim
+        return self.dimension
+    
+    def _ensure_reducer(self):
+        """Boyut indirgeme dönüşümü henüz yüklenmediyse yükler (index'leri yüklemez)"""
+        if self._reducer_loaded:
+            return
+        with self._load_lock:
+            if not self._reducer_loaded:
+                self._load_reducer()
+                self._reducer_loaded = True
+    
+    def _load_reducer(self):
+        """Ayarlardaki boyut indirgeme dönüşümünü yükler"""
+        try:
+            self.reducer = create_reducer(
+                settings.EMBEDDING_REDUCTION,
+                self.dimension,
+                settings.EMBEDDING_REDUCED_DIM,
+                settings.FAISS_INDEX_PATH
+            )
+            if self.reducer is not None and not self.reducer.is_trained:
+                print("PCA transform not trained yet, indexing full-dimension vectors "
+                      "(python -m app.services.dim_reduction)")
+        except Exception as e:
+            print(f"Dimension reducer loading error: {e}")
+            self.reducer = None
+    
+    def _to_index_space(self, embeddings) -> np.ndarray:
+        """Embedding'leri index boyutuna getirir (float32, 2 boyutlu)"""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        if self.reducer is not None and self.reducer.is_trained:
+            return self.reducer.transform(vectors)
+        return vectors
+    
+    def _load_indexes(self):
+        """
+        FAISS index'lerini ve id eşlemelerini aktif sürümden (CURRENT) yükler,
+        yoksa boş index oluşturur
+        """
+        dimension = self.index_dimension
+        self.index_version = read_current(settings.FAISS_INDEX_PATH)
+        directory = self._index_directory(self.index_version)
+        self.cv_index = self._new_index("cv_index", dimension, directory)
+        self.job_index = self._new_index("job_index", dimension, directory)
+        
+        for index in (self.cv_index, self.job_index):
+            try:
+                index.load()
+            except Exception as e:
+                print(f"Index loading error ({index.name}): {e}")
+    
+    @staticmethod
+    def _index_directory(version: Optional[str]) -> str:
+        """Sürümün index dizini (None = FAISS_INDEX_PATH kökü)"""
+        if version is None:
+            return settings.FAISS_INDEX_PATH
+        return version_path(settings.FAISS_INDEX_PATH, version)
+    
+    def _new_index(self, name: str, dimension: int, directory: Optional[str] = None) -> VectorIndex:
+        return VectorIndex(name, dimension, directory or self._index_directory(self.index_version),
+                           **self._index_options())
+    
+    @staticmethod
+    def _index_options() -> Dict:
+        """Ayarlardaki index tipi, yükseltme eşiği, bellek bütçesi ve arama parametreleri"""
+        return {
+            'wal_fsync': settings.FAISS_WAL_FSYNC,
+            'index_type': settings.FAISS_INDEX_TYPE,
+            'promotion_threshold': settings.FAISS_PROMOTION_THRESHOLD,
+            'memory_budget': settings.FAISS_MEMORY_BUDGET_MB * 1024 * 1024,
+            'keep_vectors': settings.FAISS_KEEP_FULL_VECTORS,
+            'rerank_factor': settings.FAISS_RERANK_FACTOR,
+            'mmap': settings.FAISS_MMAP_INDEXES,
+            'index_params': {
+                'nlist': settings.FAISS_IVF_NLIST,
+                'nprobe': settings.FAISS_IVF_NPROBE,
+                'hnsw_m': settings.FAISS_HNSW_M,
+                'ef_construction': settings.FAISS_HNSW_EF_CONSTRUCTION,
+                'ef_search': settings.FAISS_HNSW_EF_SEARCH,
+                'pq_m': settings.FAISS_PQ_M
+            }
+        }
+    
+    def build_index(self, name: str, batches: Iterable[Tuple[List[str], np.ndarray]],
+                    directory: str) -> VectorIndex:
+        """
+        'cv' veya 'job' index'ini (id'ler, embedding'ler[, öznitelikler]) batch'lerinden
+        verilen dizinde bağımsız bir index olarak kurar ve kaydeder. Çalışan
+        index'ler yüklenmez ve değişmez; yeni sürüm CURRENT akışıyla devreye girer.
+        """
+        self._ensure_reducer()
+        index = VectorIndex.build(
+            f"{name}_index",
+            self.index_dimension,
+            directory,
+            ((ids, self._to_index_space(embeddings), *attributes) for ids, embeddings, *attributes in batches),
+            **self._index_options()
+        )
+        if index.should_promote():
+            index.promote()
+        index.save()
+        return index
+    
+    def reload_indexes(self, version: Optional[str] = None,
+                       document_counts: Optional[Dict[str, int]] = None) -> Dict:
+        """
+        Yayınlanmış bir index sürümünü (verilmezse en yenisini) arka planda
+        yükler, doğrular ve trafiği atomik olarak ona geçirir. Aktif sürüm
+        rollback için bellekte kalır.
+        document_counts: {'cv_index': n, 'job_index': n} - MongoDB'deki
+        embedding'li doküman sayıları; yeni sürüm bunlardan
+        FAISS_RELOAD_COUNT_TOLERANCE'tan fazla saparsa geçiş yapılmaz.
+        Doğrulama hatasında ValueError fırlatır.
+        """
+        self._ensure_indexes()
+        with self._reload_lock:
+            version = version or latest_version(settings.FAISS_INDEX_PATH)
+            if version is None:
+                raise ValueError("No published index version")
+            if version == self.index_version:
+                return self.get_version_info()
+            directory = self._index_directory(version)
+            manifest = read_manifest(directory)
+            if manifest is None:
+                raise ValueError(f"Index version {version} not found or incomplete")
             
-            if os.path.exists(cv_index_path):
-                self.cv_index = faiss.read_index(cv_index_path)
-            if os.path.exists(job_index_path):
-                self.job_index = faiss.read_index(job_index_path)
+            with self._version_lock:
+                self._reload_journal = []
+            try:
+                started = time.perf_counter()
+                indexes = self._load_version(version, manifest, document_counts)
+                try:
+                    with self._version_lock:
+                        # Yükleme sırasında aktif sürüme yapılan değişiklikler yeni sürüme de uygulanır
+                        for name, mutation in self._reload_journal:
+                            mutation(indexes[name])
+                        retired = self._switch_version(version, indexes)
+                except Exception:
+                    self._close_indexes(indexes.values())
+                    raise
+            finally:
+                with self._version_lock:
+                    self._reload_journal = None
+            self._close_indexes(retired)
+            print(f"Switched to index version {version} in {time.perf_counter() - started:.1f}s")
+            return self.get_version_info()
+    
+    def _load_version(self, version: str, manifest: Dict,
+                      document_counts: Optional[Dict[str, int]]) -> Dict[str, VectorIndex]:
+        """Sürümün index'lerini yükler; boyut ve vektör sayılarını doğrular"""
+        dimension = self.index_dimension
+        if manifest.get('dimension') != dimension:
+            raise ValueError(f"Index version {version} has dimension {manifest.get('dimension')}, "
+                             f"expected {dimension}")
+        
+        directory = self._index_directory(version)
+        indexes = {}
+        try:
+            for name in ('cv', 'job'):
+                index = self._new_index(f"{name}_index", dimension, directory)
+                indexes[name] = index
+                if not index.load():
+                    raise ValueError(f"Index version {version}: {index.name} could not be loaded")
                 
-        except Exception as e:
-            print(f"Index loading error: {e}")
-            self._create_empty_indexes()
+                expected = manifest.get('indexes', {}).get(index.name, {}).get('count')
+                if expected is not None and index.ntotal != expected:
+                    raise ValueError(f"Index version {version}: {index.name} has {index.ntotal} vectors, "
+                                     f"manifest says {expected}")
+                documents = (document_counts or {}).get(index.name)
+                if documents is not None and \
+                        abs(index.ntotal - documents) > settings.FAISS_RELOAD_COUNT_TOLERANCE * max(documents, 1):
+                    raise ValueError(f"Index version {version}: {index.name} has {index.ntotal} vectors "
+                                     f"for {documents} documents in MongoDB")
+        except Exception:
+            self._close_indexes(indexes.values())
+            raise
+        return indexes
+    
+    def _switch_version(self, version: Optional[str], indexes: Dict[str, VectorIndex]) -> List[VectorIndex]:
+        """
+        Trafiği verilen index'lere geçirir (version lock altında), aktif olanlar
+        önceki sürüm olarak tutulur. Kapatılması gereken index'leri döner.
+        """
+        retired = list(self._previous_indexes.values())
+        current = {'cv': self.cv_index, 'job': self.job_index}
+        self.cv_index, self.job_index = indexes['cv'], indexes['job']
+        self.previous_index_version, self.index_version = self.index_version, version
+        if settings.FAISS_KEEP_PREVIOUS_VERSION:
+            self._previous_indexes = current
+        else:
+            self._previous_indexes = {}
+            self.previous_index_version = None
+            retired += list(current.values())
+        write_current(settings.FAISS_INDEX_PATH, version)
+        return retired
+    
+    def rollback_indexes(self) -> Dict:
+        """Önceki index sürümüne geri döner (geri alınan sürüm otomatik olarak tekrar yüklenmez)"""
+        self._ensure_indexes()
+        with self._reload_lock, self._version_lock:
+            if not self._previous_indexes:
+                raise ValueError("No previous index version to roll back to")
+            abandoned = self.index_version
+            current = {'cv': self.cv_index, 'job': self.job_index}
+            self.cv_index, self.job_index = self._previous_indexes['cv'], self._previous_indexes['job']
+            self._previous_indexes = current
+            self.index_version, self.previous_index_version = self.previous_index_version, abandoned
+            write_current(settings.FAISS_INDEX_PATH, self.index_version)
+            if self.version_watcher is not None and abandoned is not None:
+                self.version_watcher.skip(abandoned)
+        print(f"Rolled back index version {abandoned} -> {self.index_version}")
+        return self.get_version_info()
+    
+    def get_version_info(self) -> Dict:
+        """Aktif, önceki ve yayınlanmış index sürümleri"""
+        return {
+            'current_version': self.index_version,
+            'previous_version': self.previous_index_version if self._previous_indexes else None,
+            'latest_version': latest_version(settings.FAISS_INDEX_PATH),
+            'cv_index_size': self.cv_index.ntotal if self.cv_index is not None else 0,
+            'job_index_size': self.job_index.ntotal if self.job_index is not None else 0
+        }
+    
+    def start_version_watcher(self, document_counts: Optional[Callable[[], Dict[str, int]]] = None):
+        """
+        Yeni index sürümlerini yoklayan thread'i başlatır; document_counts
+        verilirse her geçişten önce MongoDB sayıları ile doğrulanır
+        """
+        if self.version_watcher is None:
+            self.version_watcher = IndexVersionWatcher(
+                settings.FAISS_INDEX_PATH,
+                lambda: self.index_version,
+                lambda version: self.reload_indexes(version, document_counts() if document_counts else None),
+                poll_seconds=settings.FAISS_VERSION_POLL_SECONDS
+            )
+        self.version_watcher.start()
+    
+    @staticmethod
+    def _close_indexes(indexes: Iterable[VectorIndex]):
+        for index in indexes:
+            try:
+                index.close()
+            except Exception as e:
+                print(f"Index close error ({index.name}): {e}")
     
-    def _create_empty_indexes(self):
-        """Boş FAISS index'leri oluşturur"""
-        dimension = 384  # all-MiniLM-L6-v2 embedding dimension
-        self.cv_index = faiss.IndexFlatIP(dimension)  # Inner Product for cosine similarity
-        self.job_index = faiss.IndexFlatIP(dimension)
+    def _mutate(self, name: str, mutation: Callable[[VectorIndex], object]):
+        """
+        Değişikliği aktif index'e uygular; rollback için tutulan önceki sürüme
+        de uygulanır, yüklenmekte olan sürüm için kuyruğa alınır
+        """
+        self._ensure_indexes()
+        with self._version_lock:
+            result = mutation(getattr(self, f"{name}_index"))
+            previous = self._previous_indexes.get(name)
+            if previous is not None:
+                try:
+                    mutation(previous)
+                except Exception as e:
+                    print(f"Previous index version update error ({previous.name}): {e}")
+            if self._reload_journal is not None:
+                self._reload_journal.append((name, mutation))
+        return result
     
     def create_embedding(self, text: str) -> List[float]:
         """Text'i embedding'e çevirir"""
         try:
             # Text'i temizle
             clean_text = self._clean_text(text)
-            # Embedding oluştur
-            embedding = self.model.encode(clean_text)
-            # Normalize et (cosine similarity için)
-            embedding = embedding / np.linalg.norm(embedding)
+            # Daha önce hesaplandıysa cache'ten dön
+            if self.cache is not None:
+                cached = self.cache.get(clean_text)
+                if cached is not None:
+                    return cached.tolist()
+            # Embedding oluştur (eşzamanlı isteklerle aynı batch'te)
+            if self.batcher is not None:
+                embedding = self.batcher.encode(clean_text)
+            else:
+                embedding = self._encode_batch([clean_text])[0]
+            if self.cache is not None:
+                self.cache.put(clean_text, embedding)
             return embedding.tolist()
         except Exception as e:
             print(f"Embedding creation error: {e}")
-            return [0.0] * 384  # Default embedding
+            return [0.0] * self._fallback_dimension()  # Default embedding
+    
+    def _fallback_dimension(self) -> int:
+        try:
+            return self.dimension
+        except Exception:
+            return 0
+    
+    async def create_embedding_async(self, text: str) -> List[float]:
+        """
+        create_embedding'in async versiyonu - encode işlemini event loop
+        dışında, sınırlı bir thread havuzunda çalıştırır
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.create_embedding, text)
+    
+    async def create_embeddings_async(self, texts: List[str]) -> List[List[float]]:
+        """create_embeddings'in async versiyonu"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.create_embeddings, texts)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._executor_workers(),
+                        thread_name_prefix="embedding"
+                    )
+        return self._executor
+    
+    def _executor_workers(self) -> int:
+        """Thread havuzu boyutu"""
+        if settings.EMBEDDING_EXECUTOR_WORKERS > 0:
+            return settings.EMBEDDING_EXECUTOR_WORKERS
+        # Batching açıkken thread'ler sadece batch sonucunu bekler, bir batch'i
+        # dolduracak kadar thread gerekir. Kapalıyken her thread model çalıştırır.
+        if self.batcher is not None:
+            return self.batcher.max_batch_size
+        return min(4, os.cpu_count() or 1)
+    
+    def shutdown(self):
+        """Encode thread'lerini kapatır, bekleyen index değişikliklerini diske yazar"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.batcher is not None:
+            self.batcher.shutdown()
+        if self.cache is not None:
+            self.cache.close()
+        if self.version_watcher is not None:
+            self.version_watcher.stop()
+        self.maintainer.stop()
+        self._close_indexes(index for index in (self.cv_index, self.job_index, *self._previous_indexes.values())
+                            if index is not None)
+    
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Birden fazla text'i tek encode çağrısında embedding'e çevirir"""
+        if not texts:
+            return []
+        clean_texts = [self._clean_text(text) for text in texts]
+        if self.cache is None:
+            return self._encode_batch(clean_texts).tolist()
+        
+        embeddings = [self.cache.get(text) for text in clean_texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self._encode_batch([clean_texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                self.cache.put(clean_texts[i], embedding)
+                embeddings[i] = embedding
+        return [embedding.tolist() for embedding in embeddings]
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Text listesini encode eder ve normalize eder (cosine similarity için)"""
+        embeddings = self.encoder.encode_bucketed(texts, batch_size=settings.EMBEDDING_ENCODE_BATCH_SIZE)
+        return normalize_embeddings(embeddings)
+    
+    def get_embedding_stats(self) -> Dict:
+        """Embedding batching ve cache sayaçlarını döner"""
+        stats = {
+            'batching_enabled': self.batcher is not None,
+            'cache_enabled': self.cache is not None
+        }
+        if self.batcher is not None:
+            stats['batcher'] = self.batcher.get_stats()
+        if self.cache is not None:
+            stats['cache'] = self.cache.get_stats()
+        return stats
     
     def _clean_text(self, text: str) -> str:
-        """Text'i temizler"""
-        import re
-        # Gereksiz karakterleri temizle
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        # Çok uzun text'leri kısalt
-        if len(text) > 5000:
-            text = text[:5000]
-        return text
+        """Text'i temizler ve modelin token limitinde keser"""
+        return self.encoder.prepare(text)
     
     def add_cv_to_index(self, cv_id: str, embedding: List[float]):
         """CV embedding'ini index'e ekler"""
         try:
-            if self.cv_index is None:
-                self._create_empty_indexes()
-            
-            embedding_array = np.array([embedding], dtype=np.float32)
-            self.cv_index.add(embedding_array)
-            self.cv_ids.append(cv_id)
-            self.cv_embeddings.append(embedding)
-            
-            # Index'i kaydet
-            self._save_cv_index()
+            vector = self._to_index_space(embedding)
+            # Değişiklik log'a yazılır, snapshot arka planda alınır
+            self._mutate('cv', lambda index: index.add(cv_id, vector))
             
         except Exception as e:
             print(f"CV index addition error: {e}")
     
-    def add_job_to_index(self, job_id: str, embedding: List[float]):
-        """Job embedding'ini index'e ekler"""
+    def add_job_to_index(self, job_id: str, embedding: List[float], job: Optional[Dict] = None):
+        """Job embedding'ini (verilirse job dokümanının filtre alanlarıyla) index'e ekler"""
         try:
-            if self.job_index is None:
-                self._create_empty_indexes()
-            
-            embedding_array = np.array([embedding], dtype=np.float32)
-            self.job_index.add(embedding_array)
-            self.job_ids.append(job_id)
-            self.job_embeddings.append(embedding)
-            
-            # Index'i kaydet
-            self._save_job_index()
+            vector = self._to_index_space(embedding)
+            # Değişiklik log'a yazılır, snapshot arka planda alınır
+            attributes = job_index_attributes(job) if job is not None else None
+            self._mutate('job', lambda index: index.add(job_id, vector, attributes))
             
         except Exception as e:
             print(f"Job index addition error: {e}")
     
-    def search_similar_jobs(self, cv_embedding: List[float], k: int = 10) -> List[Dict]:
-        """CV embedding'ine benzer işleri bulur"""
+    def update_cv_in_index(self, cv_id: str, embedding: List[float]):
+        """CV'nin index'teki vektörünü yenisiyle değiştirir"""
         try:
-            if self.job_index is None or self.job_index.ntotal == 0:
-                return []
-            
-            query_vector = np.array([cv_embedding], dtype=np.float32)
-            scores, indices = self.job_index.search(query_vector, min(k, self.job_index.ntotal))
-            
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.job_ids):
-                    results.append({
-                        'job_id': self.job_ids[idx],
-                        'similarity_score': float(score)
-                    })
+            vector = self._to_index_space(embedding)
+            self._mutate('cv', lambda index: index.update(cv_id, vector))
+        except Exception as e:
+            print(f"CV index update error: {e}")
+    
+    def update_job_in_index(self, job_id: str, embedding: List[float], job: Optional[Dict] = None):
+        """Job'ın index'teki vektörünü yenisiyle değiştirir (job verilmezse filtre alanları korunur)"""
+        try:
+            vector = self._to_index_space(embedding)
+            attributes = job_index_attributes(job) if job is not None else None
+            self._mutate('job', lambda index: index.update(job_id, vector, attributes))
+        except Exception as e:
+            print(f"Job index update error: {e}")
+    
+    def update_job_attributes(self, job_id: str, job: Dict) -> bool:
+        """Job'ın index'teki filtre alanlarını (lokasyon, istihdam türü...) günceller; job'da olmayan alanlar korunur"""
+        try:
+            attributes = {field: value for field, value in job_index_attributes(job).items() if field in job}
+            return self._mutate('job', lambda index: index.set_attributes(job_id, attributes))
+        except Exception as e:
+            print(f"Job index attribute update error: {e}")
+            return False
+    
+    def remove_cv_from_index(self, cv_id: str) -> bool:
+        """CV'yi index'ten çıkarır (vektör compaction'a kadar tombstone olarak kalır)"""
+        try:
+            return self._mutate('cv', lambda index: index.remove(cv_id))
+        except Exception as e:
+            print(f"CV index removal error: {e}")
+            return False
+    
+    def remove_job_from_index(self, job_id: str) -> bool:
+        """Job'ı index'ten çıkarır (vektör compaction'a kadar tombstone olarak kalır)"""
+        try:
+            return self._mutate('job', lambda index: index.remove(job_id))
+        except Exception as e:
+            print(f"Job index removal error: {e}")
+            return False
+    
+    def search_similar_jobs(self, cv_embedding: List[float], k: int = 10,
+                            nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                            filters: Optional[Dict] = None, job_ids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        CV embedding'ine benzer işleri bulur (nprobe / ef_search: ANN index'lerde doğruluk-hız ayarı).
+        filters JOB_FILTER_FIELDS alanlarında olabilir (index'te sadece aktif ilanlar vardır).
+        job_ids verilirse arama bu ilanlarla sınırlanır.
+        """
+        try:
+            self._ensure_indexes()
+            query_vector = self._to_index_space(cv_embedding)
             
-            return results
+            return [
+                {'job_id': job_id, 'similarity_score': score}
+                for job_id, score in self.job_index.search(query_vector, k, nprobe=nprobe, ef_search=ef_search,
+                                                           filters=self._job_filters(filters), keys=job_ids)
+            ]
         except Exception as e:
             print(f"Job search error: {e}")
             return []
     
-    def search_similar_cvs(self, job_embedding: List[float], k: int = 10) -> List[Dict]:
-        """Job embedding'ine benzer CV'leri bulur"""
+    def range_search_jobs(self, embedding: List[float], threshold: float, max_results: int = 100,
+                          nprobe: Optional[int] = None, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Benzerliği threshold'un üstündeki tüm işleri (en fazla max_results,
+        skora göre sıralı) bulur. Filtreler search_similar_jobs ile aynıdır.
+        """
         try:
-            if self.cv_index is None or self.cv_index.ntotal == 0:
-                return []
+            self._ensure_indexes()
+            query_vector = self._to_index_space(embedding)
             
-            query_vector = np.array([job_embedding], dtype=np.float32)
-            scores, indices = self.cv_index.search(query_vector, min(k, self.cv_index.ntotal))
-            
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.cv_ids):
-                    results.append({
-                        'cv_id': self.cv_ids[idx],
-                        'similarity_score': float(score)
-                    })
+            return [
+                {'job_id': job_id, 'similarity_score': score}
+                for job_id, score in self.job_index.range_search(query_vector, threshold, max_results,
+                                                                 nprobe=nprobe, filters=self._job_filters(filters))
+            ]
+        except Exception as e:
+            print(f"Job range search error: {e}")
+            return []
+    
+    @staticmethod
+    def _job_filters(filters: Optional[Dict]) -> Dict:
+        """Lokasyon index'teki gibi normalize edilir"""
+        filters = dict(filters or {})
+        if filters.get('location') is not None:
+            filters['location'] = location_bucket(filters['location'])
+        return filters
+    
+    def search_similar_cvs(self, job_embedding: List[float], k: int = 10,
+                           nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                           cv_ids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Job embedding'ine benzer CV'leri bulur (nprobe / ef_search: ANN index'lerde doğruluk-hız ayarı).
+        cv_ids verilirse arama bu CV'lerle sınırlanır.
+        """
+        try:
+            self._ensure_indexes()
+            query_vector = self._to_index_space(job_embedding)
             
-            return results
+            return [
+                {'cv_id': cv_id, 'similarity_score': score}
+                for cv_id, score in self.cv_index.search(query_vector, k, nprobe=nprobe, ef_search=ef_search,
+                                                         keys=cv_ids)
+            ]
         except Exception as e:
             print(f"CV search error: {e}")
             return []
     
+    def search_similar_jobs_batch(self, cv_embeddings, k: int = 10, nprobe: Optional[int] = None,
+                                  ef_search: Optional[int] = None,
+                                  filters: Optional[Dict] = None) -> List[List[Dict]]:
+        """(n, d) CV embedding matrisinin her satırı için benzer işleri tek index aramasında bulur"""
+        try:
+            self._ensure_indexes()
+            query_vectors = self._to_index_space(cv_embeddings)
+            
+            return [
+                [{'job_id': job_id, 'similarity_score': score} for job_id, score in matches]
+                for matches in self.job_index.search_batch(query_vectors, k, nprobe=nprobe, ef_search=ef_search,
+                                                           filters=self._job_filters(filters))
+            ]
+        except Exception as e:
+            print(f"Job batch search error: {e}")
+            return [[] for _ in range(len(cv_embeddings))]
+    
+    def search_similar_cvs_batch(self, job_embeddings, k: int = 10, nprobe: Optional[int] = None,
+                                 ef_search: Optional[int] = None) -> List[List[Dict]]:
+        """(n, d) job embedding matrisinin her satırı için benzer CV'leri tek index aramasında bulur"""
+        try:
+            self._ensure_indexes()
+            query_vectors = self._to_index_space(job_embeddings)
+            
+            return [
+                [{'cv_id': cv_id, 'similarity_score': score} for cv_id, score in matches]
+                for matches in self.cv_index.search_batch(query_vectors, k, nprobe=nprobe, ef_search=ef_search)
+            ]
+        except Exception as e:
+            print(f"CV batch search error: {e}")
+            return [[] for _ in range(len(job_embeddings))]
+    
     def calculate_skill_similarity(self, cv_skills: List[str], job_skills: List[str]) -> Dict:
-        """Beceri benzerliğini hesaplar"""
-        cv_skills_lower = [skill.lower() for skill in cv_skills]
-        job_skills_lower = [skill.lower() for skill in job_skills]
+        """
+        Beceri benzerliğini hesaplar. Beceriler sözlük id'lerine çevrilip küme
+        olarak karşılaştırılır (büyük/küçük harf ve tekrarlar önemsizdir).
+        """
+        job_ids = skill_vocabulary.ordered_ids(job_skills)
+        matched = np.isin(job_ids, skill_vocabulary.encode(cv_skills), assume_unique=True)
         
-        matched_skills = []
-        missing_skills = []
-        
-        for job_skill in job_skills_lower:
-            if job_skill in cv_skills_lower:
-                matched_skills.append(job_skill)
-            else:
-                missing_skills.append(job_skill)
+        matched_skills = skill_vocabulary.decode(job_ids[matched])
+        missing_skills = skill_vocabulary.decode(job_ids[~matched])
         
         # Skill match score hesapla
-        if len(job_skills_lower) > 0:
-            skill_match_score = len(matched_skills) / len(job_skills_lower)
+        if len(job_ids) > 0:
+            skill_match_score = len(matched_skills) / len(job_ids)
         else:
             skill_match_score = 0.0
         
@@ -169,23 +860,29 @@ class NLPService:
             'skill_match_score': skill_match_score
         }
     
-    def _save_cv_index(self):
-        """CV index'ini dosyaya kaydeder"""
-        try:
-            os.makedirs(settings.FAISS_INDEX_PATH, exist_ok=True)
-            cv_index_path = os.path.join(settings.FAISS_INDEX_PATH, "cv_index.faiss")
-            faiss.write_index(self.cv_index, cv_index_path)
-        except Exception as e:
-            print(f"CV index save error: {e}")
-    
-    def _save_job_index(self):
-        """Job index'ini dosyaya kaydeder"""
-        try:
-            os.makedirs(settings.FAISS_INDEX_PATH, exist_ok=True)
-            job_index_path = os.path.join(settings.FAISS_INDEX_PATH, "job_index.faiss")
-            faiss.write_index(self.job_index, job_index_path)
-        except Exception as e:
-            print(f"Job index save error: {e}")
+    def get_index_stats(self) -> Dict:
+        """Index boyutları, checkpoint ve compaction sayaçlarını döner"""
+        stats = {
+            'index_version': self.index_version,
+            'previous_index_version': self.previous_index_version if self._previous_indexes else None,
+            'checkpoints': self.maintainer.checkpoints,
+            'compactions': self.maintainer.compactions,
+            'promotions': self.maintainer.promotions,
+            'maintenance_errors': self.maintainer.errors
+        }
+        for index in (self.cv_index, self.job_index):
+            if index is not None:
+                stats[index.name] = {
+                    'index_type': index.index_type,
+                    'size': index.ntotal,
+                    'tombstones': index.tombstone_count,
+                    'pending_mutations': index.pending_mutations,
+                    'delta_vectors': index.delta_count,
+                    'bytes_per_vector': index.bytes_per_vector,
+                    'estimated_memory_bytes': index.memory_bytes,
+                    'memory_mapped': index.memory_mapped
+                }
+        return stats
 
 # Global instance
 nlp_service = NLPService()
\ No newline at end of file
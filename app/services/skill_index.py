@@ -0,0 +1,120 @@
+"""
+Beceri ters index'i: beceri id -> o beceriye sahip CV / iş ilanı id'leri
+
+Yoğun (FAISS) aramaya ek ikinci aday kaynağıdır: "Kubernetes" isteyen bir
+ilan için bu beceriyi listeleyen tüm CV'ler posting listelerinin birleşimi
+(en az bir beceri) ya da kesişimiyle (tüm beceriler) bulunur. Index bellekte
+tutulur; CV / ilan yüklendiğinde, güncellendiğinde ve silindiğinde route'lar
+tarafından güncellenir, başlangıçta MongoDB'den doldurulur.
+"""
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.utils.skill_vocabulary import skill_vocabulary
+
+class SkillIndex:
+    """Thread-safe beceri -> doküman posting listeleri"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._postings: Dict[int, Set[str]] = {}
+        # Güncelleme / silmede eski posting'leri bulmak için doküman -> beceri id'leri
+        self._documents: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_id: str, skills: Iterable[str]):
+        """Dokümanın becerilerini index'ler (varsa eski beceriler değiştirilir)"""
+        skill_ids = skill_vocabulary.encode(skills)
+        with self._lock:
+            self._remove(doc_id)
+            self._documents[doc_id] = skill_ids
+            for skill_id in skill_ids.tolist():
+                self._postings.setdefault(skill_id, set()).add(doc_id)
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> bool:
+        skill_ids = self._documents.pop(doc_id, None)
+        if skill_ids is None:
+            return False
+        for skill_id in skill_ids.tolist():
+            posting = self._postings.get(skill_id)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[skill_id]
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+
+    def skill_ids(self, doc_id: str) -> Optional[np.ndarray]:
+        return self._documents.get(doc_id)
+
+    def posting_size(self, skill: str) -> int:
+        """Beceriye sahip doküman sayısı (bilinmeyen beceri sözlüğe eklenmez)"""
+        skill_id = skill_vocabulary.get_id(skill)
+        if skill_id is None:
+            return 0
+        with self._lock:
+            return len(self._postings.get(skill_id, ()))
+
+    def candidates(self, skill_ids: np.ndarray, match_all: bool = False, min_overlap: int = 1,
+                   limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Becerilerden en az min_overlap tanesine (match_all ise hepsine) sahip
+        dokümanlar, ortak beceri sayısına göre azalan sırada (doc_id, sayı).
+        """
+        skill_ids = skill_ids.tolist()
+        if not skill_ids:
+            return []
+        with self._lock:
+            postings = [self._postings.get(skill_id, set()) for skill_id in skill_ids]
+            if match_all:
+                # Kesişim en kısa listeden başlar
+                postings.sort(key=len)
+                matched = set(postings[0]).intersection(*postings[1:])
+                counts = Counter(dict.fromkeys(matched, len(skill_ids)))
+            else:
+                counts = Counter()
+                for posting in postings:
+                    counts.update(posting)
+        ranked = sorted(
+            ((doc_id, count) for doc_id, count in counts.items() if count >= min_overlap),
+            key=lambda item: (-item[1], item[0])
+        )
+        return ranked[:limit] if limit is not None else ranked
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            largest = max((len(posting) for posting in self._postings.values()), default=0)
+            return {
+                'documents': len(self._documents),
+                'skills': len(self._postings),
+                'largest_posting': largest
+            }
+
+async def load_skill_indexes(db):
+    """CV'lerin ve aktif iş ilanlarının becerilerini MongoDB'den index'ler"""
+    try:
+        async for cv in db.cvs.find({}, {"skills": 1}):
+            cv_skill_index.add(str(cv['_id']), cv.get('skills', []))
+        async for job in db.jobs.find({"is_active": True}, {"skills_required": 1}):
+            job_skill_index.add(str(job['_id']), job.get('skills_required', []))
+        print(f"Skill indexes loaded: {len(cv_skill_index)} CVs, {len(job_skill_index)} jobs")
+    except Exception as e:
+        print(f"Skill index loading error: {e}")
+
+# Global instances
+cv_skill_index = SkillIndex("cv_skills")
+job_skill_index = SkillIndex("job_skills")
@@ -0,0 +1,1222 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import faiss
+import numpy as np
+from bson import ObjectId
+
+from app.services.index_factory import (
+    DEFAULT_INDEX_PARAMS, LOSSY_TYPES, base_index, bytes_per_vector, create_index, index_type_of,
+    is_memory_mapped, read_index, search_parameters, select_index_type,
+    supports_range_search, supports_removal, train_index
+)
+
+# Mutation log kaydı: seq, işlem, payload uzunluğu, payload crc32
+WAL_HEADER = struct.Struct("<QBII")
+WAL_OP_ADD = 1
+WAL_OP_REMOVE = 2
+WAL_OP_ATTRIBUTES = 3
+
+class VectorStore:
+    """
+    Tam hassasiyetli (float32) vektörlerin diskteki kopyası. Satır numarası
+    vektörün int64 id'sidir; okumalar memory-map üzerinden yapılır, RAM'de
+    tutulmaz. Silinen id'lerin satırları dosyada kalır.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.row_bytes = dimension * 4
+        self._file = None
+        self._map = None
+
+    @property
+    def rows(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // self.row_bytes
+
+    def write(self, ids: np.ndarray, vectors: np.ndarray):
+        """Vektörleri id'lerinin satırlarına yazar"""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "r+b" if os.path.exists(self.path) else "w+b")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) and ids[-1] - ids[0] == len(ids) - 1:
+            # Ardışık id'ler (normal ekleme) tek yazımda
+            self._file.seek(int(ids[0]) * self.row_bytes)
+            self._file.write(vectors.tobytes())
+        else:
+            for internal_id, vector in zip(ids.tolist(), vectors):
+                self._file.seek(internal_id * self.row_bytes)
+                self._file.write(vector.tobytes())
+        self._file.flush()
+
+    def read(self, ids: np.ndarray) -> np.ndarray:
+        """Verilen id'lerin vektörlerini okur"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self._map is None or (len(ids) and ids.max() >= len(self._map)):
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r").reshape(-1, self.dimension)
+        return np.asarray(self._map[ids])
+
+    def sync(self):
+        """Yazılan satırları diske indirir (checkpoint öncesi)"""
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def publish(self, path: str):
+        """Ayrı dosyada kurulan vektörleri asıl yerine taşır (açık okuyucular eski dosyayı görür)"""
+        self.sync()
+        self.close()
+        os.replace(self.path, path)
+        self.path = path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._map = None
+
+class IndexGeneration:
+    """
+    Aramaların gördüğü değişmez index durumu. Yazıcılar değişikliği uygulayıp
+    yeni bir nesli tek atamayla yayınlar; arama başında nesli alan okuyucu
+    kilitsiz çalışır ve yazmalardan etkilenmez. Nesildeki diziler yerinde
+    değiştirilmez (yeni id'lerin satırları next_id'nin ötesine yazılır).
+
+    index         - base FAISS index'i (yayınlandıktan sonra değiştirilmez)
+    id_map        - IndexIDMap2'de pozisyon -> id dizisi, diğerlerinde None
+    delta_ids     - base'e henüz alınmamış vektörlerin id'leri
+    delta_vectors - bu vektörler (aramada brute-force taranır)
+    live          - id başına canlı maskesi
+    columns       - öznitelik kolonları
+    next_id       - nesildeki id sınırı
+    dead          - tombstone sayısı
+    """
+
+    __slots__ = ('index', 'id_map', 'delta_ids', 'delta_vectors', 'live', 'columns', 'next_id', 'dead')
+
+    def __init__(self, index: faiss.Index, id_map: Optional[np.ndarray], delta_ids: np.ndarray,
+                 delta_vectors: np.ndarray, live: np.ndarray, columns: Dict[str, np.ndarray],
+                 next_id: int, dead: int):
+        self.index = index
+        self.id_map = id_map
+        self.delta_ids = delta_ids
+        self.delta_vectors = delta_vectors
+        self.live = live
+        self.columns = columns
+        self.next_id = next_id
+        self.dead = dead
+
+    @property
+    def ntotal(self) -> int:
+        """Fiziksel olarak tutulan vektör sayısı (tombstone'lar dahil)"""
+        return self.index.ntotal + len(self.delta_ids)
+
+class VectorIndex:
+    """
+    Kalıcı id eşlemeli FAISS index'i
+
+    Vektörler IndexIDMap2 içinde sabit int64 id'lerle tutulur, id'lerin
+    MongoDB ObjectId karşılıkları index'in yanındaki sidecar dosyasında
+    saklanır. Böylece restart sonrası arama sonuçları doğru dokümana döner.
+
+    Her değişiklik önce append-only mutation log'a (WAL) yazılır; tam index
+    sadece checkpoint'te diske yazılır. Açılışta son snapshot yüklenir ve
+    log'un snapshot'tan sonraki kısmı tekrar uygulanır.
+
+    Aramalar kilitsizdir: her arama yayınlanmış bir IndexGeneration'ı
+    kullanır. Yeni vektörler base index'e değil delta dizisine eklenir ve
+    tam taranır; checkpoint delta'yı base'in bir kopyasına ekleyip yeni
+    base'i yayınlar. Base index yayınlandıktan sonra hiç değiştirilmez.
+
+    Silinen / güncellenen dokümanların eski vektörleri tombstone olarak
+    işaretlenir ve aramada atlanır; compact() bunları index'ten fiziksel
+    olarak çıkarır.
+
+    Boş index Flat olarak başlar; canlı vektör sayısı promotion_threshold'u
+    geçince index_type (ivf / hnsw) tipinde yeniden kurulur (promote).
+    memory_budget verilirse index bütçeye sığmadığında sıkıştırılmış bir
+    codec'e (sqfp16, sq8, ivfpq) geçilir. keep_vectors ile tam vektörler
+    diskte de tutulur; kayıplı codec'lerde en iyi adaylar bunlarla yeniden
+    skorlanır (rerank_factor * k aday).
+
+    Her vektörün filtrelenebilir öznitelikleri (ör. is_active, location) id
+    başına kodlanmış kolonlarda tutulur; search(filters=...) filtreyi FAISS'e
+    IDSelector bitmap'i olarak verir, uymayan vektörler hiç aday olmaz.
+
+    mmap=True ile IVF snapshot'ı salt okunur map edilir (worker'lar arasında
+    page cache paylaşılır). Değişiklikler delta'ya gittiği için map korunur,
+    her checkpoint'te yeni snapshot map edilir.
+
+    Dosyalar:
+        {name}.faiss          - FAISS index snapshot'ı
+        {name}.ids.npz        - int64 id'ler, 12 byte'lık ObjectId'ler, tombstone'lar,
+                                öznitelik kolonları, snapshot seq
+        {name}.wal            - snapshot sonrası değişiklikler
+        {name}.wal.checkpoint - checkpoint sürerken kapatılan log
+        {name}.{dim}d.f32     - tam vektörler (keep_vectors)
+    """
+
+    def __init__(self, name: str, dimension: int, directory: str, wal_fsync: bool = True,
+                 index_type: str = 'flat', promotion_threshold: int = 0,
+                 index_params: Optional[Dict] = None, memory_budget: int = 0,
+                 keep_vectors: bool = False, rerank_factor: int = 4, mmap: bool = False):
+        self.name = name
+        self.dimension = dimension
+        self.directory = directory
+        self.wal_fsync = wal_fsync
+        self.target_type = index_type
+        self.promotion_threshold = promotion_threshold
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+        self.memory_budget = memory_budget
+        self.rerank_factor = max(1, rerank_factor)
+        self.mmap = mmap
+        self.vector_store = VectorStore(self.vectors_path, dimension) if keep_vectors else None
+
+        self._set_base(create_index('flat', dimension))
+        # Base dosyadaki snapshot'tan farklı mı (checkpoint'te yazılmalı)
+        self._base_dirty = True
+        self._delta_ids = np.zeros(0, dtype=np.int64)
+        self._delta_vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._delta_count = 0
+        self._live = np.zeros(0, dtype=bool)
+        # id -> ObjectId; güncellenen / silinen id'ler eski nesilleri kullanan
+        # aramalar için index'ten fiziksel olarak çıkana kadar tutulur
+        self._id_to_key: Dict[int, str] = {}
+        self._key_to_id: Dict[str, int] = {}
+        self._tombstones: Set[int] = set()
+        self._next_id = 0
+        # Öznitelik kolonları: kolon -> id başına değer kodu (-1 = değer yok)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._vocab: Dict[str, Dict[str, int]] = {}
+
+        # Yazıcılar _lock'u alır; base'i değiştiren işlemler (checkpoint,
+        # compaction, rebuild) ayrıca _base_lock ile sıraya girer
+        self._lock = threading.RLock()
+        self._base_lock = threading.Lock()
+        self._wal = None
+        self._seq = 0
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+        self._publish()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.faiss")
+
+    @property
+    def ids_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.ids.npz")
+
+    @property
+    def wal_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.wal")
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.{self.dimension}d.f32")
+
+    @property
+    def index(self) -> faiss.Index:
+        """Yayınlanmış base index"""
+        return self._generation.index
+
+    @property
+    def ntotal(self) -> int:
+        """Index'teki canlı vektör sayısı"""
+        return len(self._key_to_id)
+
+    @property
+    def index_type(self) -> str:
+        return index_type_of(self._generation.index)
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """Mevcut codec'in vektör başına yaklaşık bellek kullanımı"""
+        return bytes_per_vector(self.index_type, self.dimension, self.index_params)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Index'in yaklaşık bellek kullanımı (tombstone'lar ve delta dahil)"""
+        generation = self._generation
+        return (self.bytes_per_vector * generation.index.ntotal +
+                len(generation.delta_ids) * (self.dimension * 4 + 8))
+
+    @property
+    def memory_mapped(self) -> bool:
+        return is_memory_mapped(self._generation.index)
+
+    @property
+    def rebuilding(self) -> bool:
+        """Base index değiştiriliyor mu (checkpoint, compaction ya da rebuild)"""
+        return self._base_lock.locked()
+
+    @property
+    def delta_count(self) -> int:
+        """Base index'e henüz alınmamış vektör sayısı"""
+        return len(self._generation.delta_ids)
+
+    @property
+    def tombstone_count(self) -> int:
+        """Index'te duran ama artık sonuç dönmeyen vektör sayısı"""
+        return len(self._tombstones)
+
+    @property
+    def tombstone_ratio(self) -> float:
+        total = self._generation.ntotal
+        return len(self._tombstones) / total if total else 0.0
+
+    @property
+    def pending_mutations(self) -> int:
+        """Son checkpoint'ten beri log'a yazılan değişiklik sayısı"""
+        return self._pending
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_to_id
+
+    def _set_base(self, index: faiss.Index):
+        self._base = index
+        self._base_id_map = faiss.vector_to_array(index.id_map) if isinstance(index, faiss.IndexIDMap2) else None
+
+    def _publish(self):
+        """Mevcut durumu yeni nesil olarak yayınlar (yazıcı kilidi altında)"""
+        count = self._delta_count
+        self._generation = IndexGeneration(
+            self._base, self._base_id_map, self._delta_ids[:count], self._delta_vectors[:count],
+            self._live, dict(self._columns), self._next_id, len(self._tombstones)
+        )
+
+    def _copy_base(self, index: faiss.Index) -> faiss.Index:
+        """
+        Base index'in değiştirilebilir kopyası. Map edilmiş base her zaman
+        index_path'teki snapshot'tır (ikisi de _base_lock altında değişir),
+        kopyası dosyadan belleğe okunur.
+        """
+        if is_memory_mapped(index):
+            return read_index(self.index_path)
+        return faiss.clone_index(index)
+
+    def _append_delta(self, ids: np.ndarray, vectors: np.ndarray):
+        """Vektörleri delta'nın sonuna ekler; dolunca yeni (büyük) diziye kopyalanır"""
+        count = self._delta_count + len(ids)
+        if count > len(self._delta_ids):
+            capacity = max(count, 2 * len(self._delta_ids), 256)
+            delta_ids = np.empty(capacity, dtype=np.int64)
+            delta_vectors = np.empty((capacity, self.dimension), dtype=np.float32)
+            delta_ids[:self._delta_count] = self._delta_ids[:self._delta_count]
+            delta_vectors[:self._delta_count] = self._delta_vectors[:self._delta_count]
+            self._delta_ids, self._delta_vectors = delta_ids, delta_vectors
+        self._delta_ids[self._delta_count:count] = ids
+        self._delta_vectors[self._delta_count:count] = vectors
+        self._delta_count = count
+
+    def _mark_live(self, ids: np.ndarray):
+        """Yeni id'leri canlı işaretler (yayınlanmış nesiller bu satırları görmez)"""
+        size = int(ids.max()) + 1
+        if len(self._live) < size:
+            live = np.zeros(max(size, 2 * len(self._live)), dtype=bool)
+            live[:len(self._live)] = self._live
+            self._live = live
+        self._live[ids] = True
+
+    def _mark_dead(self, ids: List[int]):
+        """Id'leri tombstone yapar; yayınlanmış maske kopyalanarak değiştirilir"""
+        if self._live is self._generation.live:
+            self._live = self._live.copy()
+        self._live[ids] = False
+        self._tombstones.update(ids)
+
+    def _swap_base(self, index: faiss.Index, merged: int, dropped: Set[int]):
+        """
+        Yeni base index'i yayınlar. Delta'nın ilk merged satırı yeni index'e
+        alınmıştır, sonradan eklenenler delta'da kalır. dropped yeni index'e
+        alınmayan tombstone'lardır, eşlemeleri silinir.
+        """
+        self._delta_ids = self._delta_ids[merged:self._delta_count].copy()
+        self._delta_vectors = self._delta_vectors[merged:self._delta_count].copy()
+        self._delta_count = len(self._delta_ids)
+        self._tombstones -= dropped
+        for internal_id in dropped:
+            self._id_to_key.pop(internal_id, None)
+        self._set_base(index)
+        self._publish()
+
+    def load(self) -> bool:
+        """
+        Snapshot'ı ve id eşlemesini yükler, ardından log'u tekrar uygular.
+        Kullanılabilir bir snapshot yoksa/uyumsuzsa False döner.
+        """
+        with self._lock:
+            loaded = self._load_snapshot()
+            if not loaded and os.path.exists(self.index_path):
+                # Log, kullanılamayan snapshot'ın üzerine yazılmış değişiklikler içerir
+                return False
+            replayed = self._replay_wal()
+            self._check_vector_store()
+            self._publish()
+            return loaded or replayed > 0
+
+    def _check_vector_store(self):
+        """Tam vektör dosyası eksikse index'ten tamamlar, mümkün değilse kapatır"""
+        if self.vector_store is None or self.vector_store.rows >= self._next_id or not self._id_to_key:
+            return
+        if self.index_type in LOSSY_TYPES or (self._base.ntotal and not isinstance(self._base, faiss.IndexIDMap2)):
+            print(f"{self.name}: full-precision vectors missing and can not be recovered from "
+                  f"{self.index_type} index, re-scoring disabled until rebuild")
+            self.vector_store.close()
+            self.vector_store = None
+            return
+        ids, vectors = self._index_vectors()
+        self.vector_store.write(ids, vectors)
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+
+        index = read_index(self.index_path, self.mmap)
+        if index.d != self.dimension:
+            print(f"{self.name}: index dimension {index.d} does not match expected "
+                  f"{self.dimension}, index must be rebuilt")
+            return False
+        if not isinstance(index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+            # Eski pozisyon tabanlı index'lerin id eşlemesi yok, kullanılamaz
+            print(f"{self.name}: index has no id mapping, index must be rebuilt")
+            return False
+        if not os.path.exists(self.ids_path):
+            print(f"{self.name}: id mapping file missing, index must be rebuilt")
+            return False
+
+        mapping = np.load(self.ids_path)
+        ids = mapping['ids']
+        keys = mapping['keys']
+        tombstones = mapping['tombstones'] if 'tombstones' in mapping.files else np.zeros(0, dtype=np.int64)
+        if len(ids) + len(tombstones) != index.ntotal:
+            print(f"{self.name}: id mapping has {len(ids)} entries for {index.ntotal} vectors, "
+                  f"index must be rebuilt")
+            return False
+
+        self._set_base(index)
+        self._base_dirty = False
+        # ObjectId'nin string hali 12 byte'ın hex'idir; tek seferde çevrilir
+        hex_keys = keys.tobytes().hex()
+        self._id_to_key = dict(zip(ids.tolist(), (hex_keys[start:start + 24]
+                                                  for start in range(0, len(hex_keys), 24))))
+        self._key_to_id = {key: i for i, key in self._id_to_key.items()}
+        self._tombstones = set(tombstones.tolist())
+        self._next_id = int(mapping['next_id'])
+        self._live = np.zeros(self._next_id, dtype=bool)
+        self._live[ids] = True
+        self._columns, self._vocab = {}, {}
+        if 'attributes' in mapping.files:
+            for column, values in json.loads(str(mapping['attributes'])).items():
+                self._vocab[column] = {value: code for code, value in enumerate(values)}
+                self._columns[column] = mapping[f"attr_{column}"].astype(np.int32)
+        self._seq = int(mapping['wal_seq']) if 'wal_seq' in mapping.files else 0
+        return True
+
+    def _replay_wal(self) -> int:
+        """Snapshot'tan sonraki log kayıtlarını uygular, uygulanan kayıt sayısını döner"""
+        replayed = 0
+        for path in (self.wal_path + ".checkpoint", self.wal_path):
+            if not os.path.exists(path):
+                continue
+            for seq, op, payload in self._read_wal(path):
+                if seq <= self._seq:
+                    continue
+                if op == WAL_OP_ADD:
+                    self._replay_add(payload)
+                elif op == WAL_OP_REMOVE:
+                    self._apply_remove(str(ObjectId(payload)))
+                elif op == WAL_OP_ATTRIBUTES:
+                    internal_id = struct.unpack_from("<q", payload)[0]
+                    self._apply_attributes([internal_id], [json.loads(payload[8:])])
+                self._seq = seq
+                self._pending += 1
+                replayed += 1
+        if replayed:
+            print(f"{self.name}: replayed {replayed} index mutations from log")
+        return replayed
+
+    def _read_wal(self, path: str):
+        """Log kayıtlarını okur; yarım yazılmış son kaydı keserek atar"""
+        valid_size = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(WAL_HEADER.size)
+                if len(header) < WAL_HEADER.size:
+                    break
+                seq, op, length, checksum = WAL_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                valid_size = f.tell()
+                yield seq, op, payload
+            truncated = f.seek(0, os.SEEK_END) != valid_size
+
+        if truncated:
+            print(f"{self.name}: dropping torn record at the end of {os.path.basename(path)}")
+            with open(path, "r+b") as f:
+                f.truncate(valid_size)
+
+    def _replay_add(self, payload: bytes):
+        internal_id = struct.unpack_from("<q", payload)[0]
+        key = str(ObjectId(payload[8:20]))
+        vector = np.frombuffer(payload, dtype=np.float32, offset=20).reshape(1, self.dimension)
+        self._apply_add([key], vector, np.array([internal_id], dtype=np.int64))
+        self._next_id = max(self._next_id, internal_id + 1)
+
+    def _append_wal(self, records: List[Tuple[int, bytes]]):
+        """Kayıtları log'a ekler (checkpoint'e kadar kalıcılık buradan gelir)"""
+        if self._wal is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._wal = open(self.wal_path, "ab")
+
+        chunks = []
+        for op, payload in records:
+            self._seq += 1
+            chunks.append(WAL_HEADER.pack(self._seq, op, len(payload), zlib.crc32(payload)))
+            chunks.append(payload)
+        self._wal.write(b"".join(chunks))
+        self._wal.flush()
+        if self.wal_fsync:
+            os.fsync(self._wal.fileno())
+        self._pending += len(records)
+
+    def _close_wal(self):
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    def add(self, key: str, vector: np.ndarray, attributes: Optional[Dict] = None) -> int:
+        """Vektörü yeni bir int64 id ile ekler, id'yi döner"""
+        return self.add_batch([key], np.asarray(vector, dtype=np.float32).reshape(1, -1),
+                              None if attributes is None else [attributes])[0]
+
+    def add_batch(self, keys: List[str], vectors: np.ndarray,
+                  attributes: Optional[List[Dict]] = None, log: bool = True) -> List[int]:
+        """
+        Birden fazla vektörü tek seferde ekler ve log'a yazar. attributes
+        verilmezse güncellenen dokümanın önceki öznitelikleri korunur.
+        """
+        # Geçersiz id'ler index'e girmeden reddedilsin
+        for key in keys:
+            if not ObjectId.is_valid(key):
+                raise ValueError(f"Invalid ObjectId: {key}")
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(keys), self.dimension)
+        with self._lock:
+            ids = np.arange(self._next_id, self._next_id + len(keys), dtype=np.int64)
+            if log:
+                records = [
+                    (WAL_OP_ADD, struct.pack("<q", internal_id) + ObjectId(key).binary + vector.tobytes())
+                    for key, internal_id, vector in zip(keys, ids.tolist(), vectors)
+                ]
+                if attributes is not None:
+                    records += [self._attributes_record(internal_id, item)
+                                for internal_id, item in zip(ids.tolist(), attributes)]
+                self._append_wal(records)
+            self._apply_add(keys, vectors, ids)
+            if attributes is not None:
+                self._apply_attributes(ids.tolist(), attributes)
+            self._next_id += len(keys)
+            self._publish()
+        return ids.tolist()
+
+    def set_attributes(self, key: str, attributes: Dict) -> bool:
+        """Dokümanın verilen özniteliklerini değiştirir (diğerleri korunur); index'te yoksa False"""
+        with self._lock:
+            internal_id = self._key_to_id.get(key)
+            if internal_id is None:
+                return False
+            self._append_wal([self._attributes_record(internal_id, attributes)])
+            self._apply_attributes([internal_id], [attributes])
+            self._publish()
+        return True
+
+    def get_attributes(self, key: str) -> Dict:
+        """Dokümanın index'teki öznitelikleri"""
+        with self._lock:
+            internal_id = self._key_to_id.get(key)
+            if internal_id is None:
+                return {}
+            attributes = {}
+            for column, codes in self._columns.items():
+                if internal_id < len(codes) and codes[internal_id] >= 0:
+                    token = next(token for token, code in self._vocab[column].items()
+                                 if code == codes[internal_id])
+                    attributes[column] = json.loads(token)
+            return attributes
+
+    @staticmethod
+    def _attributes_record(internal_id: int, attributes: Dict) -> Tuple[int, bytes]:
+        payload = json.dumps(attributes, separators=(",", ":")).encode("utf-8")
+        return WAL_OP_ATTRIBUTES, struct.pack("<q", internal_id) + payload
+
+    def _column(self, column: str, size: int, overwrite: bool = False) -> np.ndarray:
+        """
+        Kolonu (yoksa oluşturup) en az size uzunluğuna büyütür. overwrite,
+        yayınlanmış nesildeki satırlar değişecekse kolonu kopyalatır.
+        """
+        codes = self._columns.get(column)
+        if overwrite and codes is not None and codes is self._generation.columns.get(column):
+            self._columns[column] = codes = codes.copy()
+        if codes is None or len(codes) < size:
+            grown = np.full(max(size, 2 * len(codes) if codes is not None else size), -1, dtype=np.int32)
+            if codes is not None:
+                grown[:len(codes)] = codes
+            self._columns[column] = codes = grown
+            self._vocab.setdefault(column, {})
+        return codes
+
+    def _apply_attributes(self, ids: List[int], attributes: List[Dict]):
+        if not ids:
+            return
+        size = max(ids) + 1
+        overwrite = min(ids) < self._generation.next_id
+        for internal_id, item in zip(ids, attributes):
+            for column, value in item.items():
+                codes = self._column(column, size, overwrite)
+                if value is None:
+                    codes[internal_id] = -1
+                    continue
+                # JSON token'ı ile kodlanır (True ile 1 ayrı değerler)
+                vocab = self._vocab[column]
+                token = json.dumps(value)
+                if token not in vocab:
+                    vocab[token] = len(vocab)
+                codes[internal_id] = vocab[token]
+
+    def _apply_add(self, keys: List[str], vectors: np.ndarray, ids: np.ndarray):
+        self._append_delta(ids, vectors)
+        if self.vector_store is not None:
+            self.vector_store.write(ids, vectors)
+        self._mark_live(ids)
+        replaced = []
+        for key, internal_id in zip(keys, ids.tolist()):
+            previous = self._key_to_id.get(key)
+            if previous is not None:
+                # Aynı doküman tekrar eklendi (güncelleme), eski vektör artık sonuç dönmez
+                replaced.append(previous)
+                for column in list(self._columns):
+                    codes = self._column(column, internal_id + 1)
+                    codes[internal_id] = codes[previous]
+            self._id_to_key[internal_id] = key
+            self._key_to_id[key] = internal_id
+        if replaced:
+            self._mark_dead(replaced)
+
+    def update(self, key: str, vector: np.ndarray, attributes: Optional[Dict] = None) -> int:
+        """Dokümanın vektörünü değiştirir (eskisi tombstone olur), yoksa ekler"""
+        return self.add(key, vector, attributes)
+
+    def remove(self, key: str) -> bool:
+        """Dokümanı index'ten çıkarır; index'te yoksa False döner"""
+        with self._lock:
+            if key not in self._key_to_id:
+                return False
+            self._append_wal([(WAL_OP_REMOVE, ObjectId(key).binary)])
+            self._apply_remove(key)
+            self._publish()
+        return True
+
+    def _apply_remove(self, key: str):
+        internal_id = self._key_to_id.pop(key, None)
+        if internal_id is not None:
+            self._mark_dead([internal_id])
+
+    def search(self, vector: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None, filters: Optional[Dict] = None,
+               keys: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        En benzer k dokümanın (ObjectId, skor) listesini döner.
+        nprobe (ivf) / ef_search (hnsw) verilmezse index ayarları kullanılır.
+        filters: {kolon: değer ya da değer listesi}; None değerli kolonlar
+        filtrelenmez. Filtre index içinde uygulandığından Flat/SQ/HNSW'de
+        uyan k sonuç tek aramada döner; IVF'de seçici filtrelerde nprobe
+        büyütülür, eksik kalan sorgular tüm listelerde tekrar aranır.
+        keys verilirse arama bu dokümanlarla sınırlanır (filtreyle aynı şekilde).
+        """
+        return self.search_batch(vector, k, nprobe=nprobe, ef_search=ef_search, filters=filters, keys=keys)[0]
+
+    def search_batch(self, vectors: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None, filters: Optional[Dict] = None,
+                     keys: Optional[Iterable[str]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        (n, d) sorgu matrisi için tek FAISS çağrısında sorgu başına en benzer
+        k dokümanı döner (FAISS sorguları çekirdeklere dağıtır). Filtre tüm
+        sorgulara uygulanır. Kilit alınmaz, yayınlanmış nesilde aranır.
+        """
+        queries = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if self.ntotal == 0 or k <= 0 or len(queries) == 0:
+            return [[] for _ in range(len(queries))]
+        generation = self._generation
+        # Kayıplı codec'te fazladan aday alınıp tam vektörlerle yeniden skorlanır
+        rerank = self.vector_store is not None and index_type_of(generation.index) in LOSSY_TYPES
+        candidates = k * self.rerank_factor if rerank else k
+
+        mask = self._filter_mask(filters, generation, keys)
+        if mask is not None and not mask.any():
+            return [[] for _ in range(len(queries))]
+        results = self._search_base(generation, queries, candidates, mask, nprobe, ef_search)
+        if len(generation.delta_ids):
+            delta = self._search_delta(generation, queries, mask, limit=candidates)
+            results = [sorted(base + added, key=lambda result: -result[2])[:candidates]
+                       for base, added in zip(results, delta)]
+        if rerank:
+            results = [self._rerank(result, query) for result, query in zip(results, queries)]
+        return [[(key, score) for _, key, score in result[:k]] for result in results]
+
+    def _search_base(self, generation: IndexGeneration, queries: np.ndarray, candidates: int,
+                     mask: Optional[np.ndarray], nprobe: Optional[int],
+                     ef_search: Optional[int]) -> List[List[Tuple[int, str, float]]]:
+        """Base index'te k-NN araması"""
+        index = generation.index
+        if index.ntotal == 0:
+            return [[] for _ in range(len(queries))]
+        ef_search = ef_search or self.index_params['ef_search']
+        nprobe = nprobe or self.index_params['nprobe']
+        inner = base_index(index)
+        ivf = mask is not None and isinstance(inner, faiss.IndexIVF)
+        selector = bitmap = None
+        if mask is None:
+            # Tombstone'lar sonuçlardan düşeceği için o kadar fazla aday istenir
+            fetch = min(candidates + generation.dead, index.ntotal)
+        else:
+            # Tombstone'lar maskede elenir, fazladan aday gerekmez
+            fetch = min(candidates, index.ntotal)
+            selector, bitmap = self._selector(generation, mask)
+            ef_search = max(ef_search, fetch)
+        if ivf:
+            fetch = min(fetch, self._base_selected(generation, mask))
+            if fetch <= 0:
+                return [[] for _ in range(len(queries))]
+            nprobe = self._filtered_nprobe(generation, mask, nprobe)
+        params = search_parameters(index, nprobe=nprobe, ef_search=ef_search, selector=selector)
+        scores, ids = self._search_index(generation, queries, fetch, params)
+        if ivf and nprobe < inner.nlist:
+            # Yine de eksik dönen sorgular tüm listelerde, yani maske üzerinde tam aranır
+            short = np.flatnonzero((ids >= 0).sum(axis=1) < fetch)
+            if len(short):
+                params = search_parameters(index, nprobe=inner.nlist, selector=selector)
+                scores[short], ids[short] = self._search_index(generation, queries[short], fetch, params)
+        return [self._resolve(generation, scores[row], ids[row], candidates) for row in range(len(queries))]
+
+    def _base_selected(self, generation: IndexGeneration, mask: np.ndarray) -> int:
+        """Maskenin base index'teki (delta dışındaki) id sayısı"""
+        return int(mask.sum()) - int(mask[generation.delta_ids].sum())
+
+    def _filtered_nprobe(self, generation: IndexGeneration, mask: np.ndarray, nprobe: int) -> int:
+        """
+        Seçici filtrede taranan IVF listelerinde yeterli uyan vektör olmaz:
+        nprobe, filtrenin seçtiği oranla ters orantılı büyütülür (en fazla nlist)
+        """
+        nlist = base_index(generation.index).nlist
+        selected = self._base_selected(generation, mask)
+        if selected <= 0:
+            return nlist
+        return min(nlist, int(np.ceil(nprobe * generation.index.ntotal / selected)))
+
+    def _search_delta(self, generation: IndexGeneration, queries: np.ndarray, mask: Optional[np.ndarray],
+                      limit: Optional[int] = None,
+                      threshold: Optional[float] = None) -> List[List[Tuple[int, str, float]]]:
+        """
+        Base'e henüz alınmamış vektörlerde tam arama: sorgu başına en iyi
+        limit sonuç ya da skoru threshold'un üstündekiler
+        """
+        ids = generation.delta_ids
+        valid = generation.live[ids] if mask is None else mask[ids]
+        ids = ids[valid]
+        scores = queries @ generation.delta_vectors[valid].T
+        id_to_key = self._id_to_key
+        results = []
+        for row in scores:
+            if threshold is not None:
+                top = np.flatnonzero(row >= threshold)
+            elif len(row) > limit:
+                top = np.argpartition(-row, limit - 1)[:limit]
+            else:
+                top = np.arange(len(row))
+            top = top[np.argsort(-row[top], kind="stable")]
+            keys = [id_to_key.get(internal_id) for internal_id in ids[top].tolist()]
+            results.append([(internal_id, key, score)
+                            for internal_id, key, score in zip(ids[top].tolist(), keys, row[top].tolist())
+                            if key is not None])
+        return results
+
+    def range_search(self, vector: np.ndarray, threshold: float, max_results: int = 100,
+                     nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                     filters: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """
+        Skoru threshold'un üstündeki tüm dokümanları (en fazla max_results,
+        skora göre sıralı) döner. Flat / IVF index'lerde FAISS range_search
+        kullanılır; HNSW ve SQ desteklemediği için max_results'lık k-NN
+        aramasının eşik altı sonuçları atılır (aynı sonuç kümesi).
+        Kayıplı codec'lerde eşik yaklaşık skora uygulanır, tam vektör
+        varsa sonuçlar yeniden skorlanıp eşikle tekrar elenir.
+        """
+        if self.ntotal == 0 or max_results <= 0:
+            return []
+        generation = self._generation
+        if not supports_range_search(generation.index):
+            return [(key, score) for key, score in
+                    self.search(vector, max_results, nprobe=nprobe, ef_search=ef_search, filters=filters)
+                    if score >= threshold]
+
+        query = np.ascontiguousarray(vector, dtype=np.float32).reshape(1, self.dimension)
+        mask = self._filter_mask(filters, generation)
+        if mask is not None and not mask.any():
+            return []
+        results = []
+        if generation.index.ntotal:
+            selector = bitmap = None
+            nprobe = nprobe or self.index_params['nprobe']
+            if mask is not None:
+                selector, bitmap = self._selector(generation, mask)
+                if isinstance(base_index(generation.index), faiss.IndexIVF):
+                    nprobe = self._filtered_nprobe(generation, mask, nprobe)
+            params = search_parameters(generation.index, nprobe=nprobe, selector=selector)
+            limits, scores, ids = self._range_search_index(generation, query, threshold, params)
+            # range_search sonuçları sırasızdır
+            order = np.argsort(-scores, kind="stable")
+            results = self._resolve(generation, scores[order], ids[order], len(order))
+        if len(generation.delta_ids):
+            results = sorted(results + self._search_delta(generation, query, mask, threshold=threshold)[0],
+                             key=lambda result: -result[2])
+        if self.vector_store is not None and index_type_of(generation.index) in LOSSY_TYPES:
+            results = [result for result in self._rerank(results, query[0]) if result[2] >= threshold]
+        return [(key, score) for _, key, score in results[:max_results]]
+
+    def _resolve(self, generation: IndexGeneration, scores: np.ndarray, ids: np.ndarray,
+                 limit: int) -> List[Tuple[int, str, float]]:
+        """FAISS sonuçlarını (id, ObjectId, skor) listesine çevirir, tombstone'ları atlar"""
+        valid = ids >= 0
+        valid[valid] = generation.live[ids[valid]]
+        id_to_key = self._id_to_key
+        results = []
+        for score, internal_id in zip(scores[valid].tolist(), ids[valid].tolist()):
+            key = id_to_key.get(internal_id)
+            if key is not None:
+                results.append((internal_id, key, score))
+                if len(results) == limit:
+                    break
+        return results
+
+    def _rerank(self, results: List[Tuple[int, str, float]], query: np.ndarray) -> List[Tuple[int, str, float]]:
+        """Adayları diskteki tam vektörlerle yeniden skorlayıp sıralar"""
+        if not results:
+            return results
+        exact = self.vector_store.read([internal_id for internal_id, _, _ in results]) @ query
+        results = [(internal_id, key, float(score))
+                   for (internal_id, key, _), score in zip(results, exact)]
+        results.sort(key=lambda result: -result[2])
+        return results
+
+    def _filter_mask(self, filters: Optional[Dict], generation: IndexGeneration,
+                     keys: Optional[Iterable[str]] = None) -> Optional[np.ndarray]:
+        """Filtreye (ve verildiyse keys'e) uyan canlı id'lerin maskesi (uzunluk next_id); filtre yoksa None"""
+        filters = {column: value for column, value in (filters or {}).items() if value is not None}
+        if not filters and keys is None:
+            return None
+        size = generation.next_id
+        mask = generation.live[:size].copy()
+        if keys is not None:
+            ids = [self._key_to_id.get(key) for key in keys]
+            ids = np.array([internal_id for internal_id in ids if internal_id is not None and internal_id < size],
+                           dtype=np.int64)
+            selected = np.zeros(size, dtype=bool)
+            selected[ids] = True
+            mask &= selected
+        for column, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            vocab = self._vocab.get(column, {})
+            codes = [vocab[token] for token in map(json.dumps, values) if token in vocab]
+            column_codes = generation.columns.get(column)
+            if not codes or column_codes is None:
+                return np.zeros(size, dtype=bool)
+            # Kolon, değeri hiç verilmemiş son id'lerden kısa olabilir
+            filled = min(size, len(column_codes))
+            mask[:filled] &= np.isin(column_codes[:filled], codes)
+            mask[filled:] = False
+        return mask
+
+    def _selector(self, generation: IndexGeneration, mask: np.ndarray):
+        """
+        Maskeden FAISS IDSelectorBitmap'i oluşturur. IndexIDMap2'de içteki
+        index'te arandığı için bitmap id'ye değil pozisyona göre kurulur.
+        Bitmap dizisi arama bitene kadar tutulmalıdır.
+        """
+        if generation.id_map is not None:
+            mask = mask[generation.id_map]
+        bitmap = np.packbits(mask, bitorder="little")
+        return faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)), bitmap
+
+    def _search_index(self, generation: IndexGeneration, queries: np.ndarray, k: int, params=None):
+        """Base index'te arar, (skorlar, int64 id'ler) döner"""
+        if generation.id_map is None:
+            return generation.index.search(queries, k, params=params)
+        # IndexIDMap2 sorgu parametresi kabul etmez; içteki index'te aranıp
+        # pozisyonlar id'lere çevrilir
+        scores, positions = base_index(generation.index).search(queries, k, params=params)
+        ids = np.where(positions >= 0, generation.id_map[np.maximum(positions, 0)], -1)
+        return scores, ids
+
+    def _range_search_index(self, generation: IndexGeneration, queries: np.ndarray, threshold: float,
+                            params=None):
+        """Base index'te eşik üstü arama, (limitler, skorlar, int64 id'ler) döner"""
+        if generation.id_map is None:
+            return generation.index.range_search(queries, threshold, params=params)
+        limits, scores, positions = base_index(generation.index).range_search(queries, threshold, params=params)
+        return limits, scores, generation.id_map[positions]
+
+    def _merge_plan(self, remove_dead: bool = False):
+        """
+        Delta'nın base'e alınacak kısmı (yazıcı kilidi altında çağrılır):
+        (base, alınan delta satırı, atılan tombstone'lar, eklenecek id'ler ve
+        vektörler). remove_dead ise tüm tombstone'lar atılır.
+        """
+        merged = self._delta_count
+        delta_ids = self._delta_ids[:merged]
+        keep = self._live[delta_ids]
+        if remove_dead:
+            dropped = set(self._tombstones)
+        else:
+            dropped = set(delta_ids[~keep].tolist())
+        return self._base, merged, dropped, delta_ids[keep], self._delta_vectors[:merged][keep]
+
+    def _merge_index(self, base: faiss.Index, ids: np.ndarray, vectors: np.ndarray,
+                     removed: Optional[Set[int]] = None) -> faiss.Index:
+        """Base'in kopyasına vektörleri ekler (removed id'ler silinir); kilit dışında kurulur"""
+        index = self._copy_base(base)
+        if removed:
+            dead = np.fromiter(removed, dtype=np.int64, count=len(removed))
+            index.remove_ids(faiss.IDSelectorBatch(len(dead), faiss.swig_ptr(dead)))
+        if len(ids):
+            index.add_with_ids(vectors, ids)
+        return index
+
+    def compact(self) -> int:
+        """Tombstone'lu vektörleri index'ten fiziksel olarak siler, silinen sayıyı döner"""
+        if not supports_removal(self._base):
+            count = self.tombstone_count
+            self.rebuild()
+            return count
+
+        with self._base_lock:
+            with self._lock:
+                if not self._tombstones:
+                    return 0
+                base, merged, dropped, ids, vectors = self._merge_plan(remove_dead=True)
+            index = self._merge_index(base, ids, vectors, removed=dropped)
+            with self._lock:
+                self._swap_base(index, merged, dropped)
+                self._base_dirty = True
+                # Snapshot'ın da küçülmesi için bir sonraki turda checkpoint alınır
+                self._pending += 1
+        return len(dropped)
+
+    def desired_type(self) -> str:
+        """Koleksiyon boyutuna ve bellek bütçesine göre olması gereken index tipi"""
+        preferred = self.target_type if self.ntotal >= self.promotion_threshold else 'flat'
+        return select_index_type(preferred, self.dimension, self.ntotal,
+                                 self.memory_budget, self.index_params)
+
+    def should_promote(self) -> bool:
+        """
+        Flat index eşiği geçtiyse ya da index bellek bütçesine artık
+        sığmıyorsa daha uygun tipte yeniden kurulmalı
+        """
+        current = self.index_type
+        if self.desired_type() == current:
+            return False
+        over_budget = self.memory_budget > 0 and self.memory_bytes > self.memory_budget
+        if current == 'flat':
+            return over_budget or (self.promotion_threshold > 0 and
+                                   self.ntotal >= self.promotion_threshold)
+        return over_budget
+
+    def promote(self):
+        """Index'i boyuta ve bütçeye uygun tipte yeniden kurar"""
+        self.rebuild(self.desired_type())
+
+    def rebuild(self, index_type: Optional[str] = None):
+        """
+        Canlı vektörlerden verilen tipte yeni index kurar ve eskisiyle değiştirir.
+        Kurulum (eğitim dahil) kilit dışında yapılır, bu sırada gelen eklemeler
+        delta'da kalır. Tombstone'lar yeni index'e taşınmaz.
+        """
+        with self._base_lock:
+            with self._lock:
+                index_type = index_type or self.index_type
+                ids, vectors = self._live_vectors()
+                merged = self._delta_count
+                dropped = set(self._tombstones)
+
+            started = time.perf_counter()
+            index = create_index(index_type, self.dimension, len(ids), self.index_params)
+            train_index(index, vectors)
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+            del vectors
+
+            with self._lock:
+                # Kurulum sırasında silinen / güncellenen kayıtlar tombstone olarak kalır
+                self._swap_base(index, merged, dropped)
+                self._base_dirty = True
+                self._pending += 1
+            print(f"{self.name}: rebuilt as {index_type} with {len(ids)} vectors "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+    def _live_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Canlı kayıtların (id'ler, vektörler) dizileri, id sırasında. Tam vektör
+        dosyası varsa oradan, yoksa index'in kendisinden okunur.
+        """
+        live_ids = np.fromiter(self._key_to_id.values(), dtype=np.int64, count=len(self._key_to_id))
+        live_ids.sort()
+        if self.vector_store is not None:
+            return live_ids, np.ascontiguousarray(self.vector_store.read(live_ids), dtype=np.float32)
+        if self.index_type in LOSSY_TYPES:
+            # Sıkıştırılmış vektörlerden kurmak hatayı ikiye katlar
+            print(f"{self.name}: rebuilding from {self.index_type} codes, enable full vector "
+                  f"storage to keep full precision")
+
+        ids, vectors = self._index_vectors()
+        positions = np.searchsorted(ids, live_ids)
+        return live_ids, vectors[positions]
+
+    def _index_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Index'te ve delta'da saklanan tüm vektörler (tombstone'lar dahil), id sırasında"""
+        ids = [self._delta_ids[:self._delta_count]]
+        vectors = [self._delta_vectors[:self._delta_count]]
+        if self._base.ntotal:
+            if self._base_id_map is None:
+                raise ValueError(f"{self.name}: {self.index_type} index can not be rebuilt from itself, "
+                                 f"rebuild from stored embeddings instead")
+            ids.append(self._base_id_map)
+            vectors.append(base_index(self._base).reconstruct_n(0, self._base.ntotal))
+        ids = np.concatenate(ids)
+        order = np.argsort(ids, kind="stable")
+        return ids[order], np.ascontiguousarray(np.concatenate(vectors)[order], dtype=np.float32)
+
+    def needs_checkpoint(self, max_pending: int, max_age_seconds: float) -> bool:
+        """Bekleyen değişiklik sayısı veya son checkpoint'ten geçen süre eşiği aştı mı"""
+        if self._pending == 0:
+            return False
+        return (self._pending >= max_pending or
+                time.monotonic() - self._last_checkpoint >= max_age_seconds)
+
+    def checkpoint(self):
+        """
+        Index snapshot'ını atomik olarak (temp dosya + rename) yazar ve log'u sıfırlar.
+        Delta'daki vektörler base'in kopyasına eklenip yeni base olarak yayınlanır;
+        bu sırada yapılan eklemeler delta'da ve yeni log'da kalır.
+        """
+        with self._base_lock:
+            with self._lock:
+                if self.vector_store is not None:
+                    self.vector_store.sync()
+                self._rotate_wal()
+                write_index = self._base_dirty or self._delta_count > 0
+                id_to_key = {internal_id: key for key, internal_id in self._key_to_id.items()}
+                tombstones = set(self._tombstones)
+                next_id = self._next_id
+                seq = self._seq
+                pending = self._pending
+                columns = {column: codes[:next_id].copy() for column, codes in self._columns.items()}
+                vocab = {column: list(values) for column, values in self._vocab.items()}
+                if write_index:
+                    base, merged, dropped, ids, vectors = self._merge_plan()
+                    # Snapshot'a alınmayan delta satırları tombstone olarak da yazılmaz
+                    tombstones -= dropped
+
+            index = self._merge_index(base, ids, vectors) if write_index else None
+            self._write_snapshot(index, id_to_key, list(tombstones), next_id, seq, columns, vocab)
+            with self._lock:
+                if self.vector_store is not None and self.vector_store.path != self.vectors_path:
+                    self.vector_store.publish(self.vectors_path)
+                if index is not None:
+                    if self.mmap and isinstance(index, faiss.IndexIVF):
+                        # Bellek kopyası yerine yeni snapshot map edilir
+                        index = read_index(self.index_path, mmap=True)
+                    self._swap_base(index, merged, dropped)
+                    self._base_dirty = False
+
+            checkpoint_wal = self.wal_path + ".checkpoint"
+            if os.path.exists(checkpoint_wal):
+                os.remove(checkpoint_wal)
+            with self._lock:
+                self._pending -= pending
+                self._last_checkpoint = time.monotonic()
+
+    def save(self):
+        """Index'i hemen diske yazar (sıfırdan oluşturulan index'te eski log'lar da silinir)"""
+        self.checkpoint()
+
+    def _rotate_wal(self):
+        """Mevcut log'u checkpoint log'u olarak kenara alır, yeni eklemeler yeni log'a gider"""
+        self._close_wal()
+        if not os.path.exists(self.wal_path):
+            return
+        checkpoint_wal = self.wal_path + ".checkpoint"
+        if os.path.exists(checkpoint_wal):
+            # Önceki checkpoint yarım kalmış, kayıtlar birleştirilir
+            with open(checkpoint_wal, "ab") as target, open(self.wal_path, "rb") as source:
+                target.write(source.read())
+            os.remove(self.wal_path)
+        else:
+            os.replace(self.wal_path, checkpoint_wal)
+
+    def _write_snapshot(self, index, id_to_key: Dict[int, str], tombstones: List[int],
+                        next_id: int, seq: int, columns: Dict[str, np.ndarray],
+                        vocab: Dict[str, List[str]]):
+        os.makedirs(self.directory, exist_ok=True)
+
+        ids = np.fromiter(id_to_key.keys(), dtype=np.int64, count=len(id_to_key))
+        keys = np.zeros((len(ids), 12), dtype=np.uint8)
+        for row, internal_id in enumerate(ids.tolist()):
+            keys[row] = np.frombuffer(ObjectId(id_to_key[internal_id]).binary, dtype=np.uint8)
+
+        # index None ise base değişmemiştir, sadece eşleme yazılır
+        index_temp = self.index_path + ".tmp"
+        ids_temp = self.ids_path + ".tmp"
+        if index is not None:
+            faiss.write_index(index, index_temp)
+        with open(ids_temp, "wb") as f:
+            np.savez(f, ids=ids, keys=keys, tombstones=np.array(tombstones, dtype=np.int64),
+                     next_id=np.int64(next_id), wal_seq=np.int64(seq),
+                     attributes=np.array(json.dumps(vocab)),
+                     **{f"attr_{column}": codes for column, codes in columns.items()})
+        written = [index_temp, ids_temp] if index is not None else [ids_temp]
+        for path in written:
+            with open(path, "rb") as f:
+                os.fsync(f.fileno())
+
+        if index is not None:
+            os.replace(index_temp, self.index_path)
+        os.replace(ids_temp, self.ids_path)
+
+    def close(self):
+        """Bekleyen değişiklikleri checkpoint'ler ve log'u kapatır"""
+        if self._pending:
+            self.checkpoint()
+        with self._lock:
+            self._close_wal()
+            if self.vector_store is not None:
+                self.vector_store.close()
+
+    @classmethod
+    def build(cls, name: str, dimension: int, directory: str,
+              items: Iterable[Tuple], **kwargs) -> "VectorIndex":
+        """
+        (keys, vectors) ya da (keys, vectors, attributes) batch'lerinden
+        sıfırdan index oluşturur (log'a yazmadan)
+        """
+        vector_index = cls(name, dimension, directory, **kwargs)
+        if vector_index.vector_store is not None:
+            # Çalışan index'in vektör dosyası save() anına kadar değişmesin
+            build_path = vector_index.vectors_path + ".build"
+            if os.path.exists(build_path):
+                os.remove(build_path)
+            vector_index.vector_store.path = build_path
+        for keys, vectors, *attributes in items:
+            if keys:
+                vector_index.add_batch(keys, vectors, attributes[0] if attributes else None, log=False)
+        return vector_index
+
+class IndexMaintainer:
+    """
+    Index'lerin arka plan bakımını yapan thread:
+    - tombstone oranı compaction_ratio'yu aşınca compaction
+    - bekleyen değişiklik sayısı max_pending'e ulaşınca ya da interval_seconds
+      dolunca checkpoint (snapshot)
+    - eşiği geçen Flat index'in ayrı bir thread'de ivf / hnsw'ye yükseltilmesi
+    """
+
+    def __init__(self, indexes: Callable[[], List[VectorIndex]], max_pending: int = 1000,
+                 interval_seconds: float = 60.0, compaction_ratio: float = 0.2,
+                 poll_seconds: float = 1.0):
+        self.indexes = indexes
+        self.max_pending = max(1, max_pending)
+        self.interval_seconds = interval_seconds
+        self.compaction_ratio = compaction_ratio
+        self.poll_seconds = poll_seconds
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._promotions: Dict[VectorIndex, threading.Thread] = {}
+        self.checkpoints = 0
+        self.compactions = 0
+        self.promotions = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-maintainer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for thread in list(self._promotions.values()):
+            thread.join()
+        self._promotions.clear()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.run_once()
+
+    def run_once(self):
+        """Eşiği aşan index'leri compact eder ve checkpoint'ler"""
+        for index in self.indexes():
+            if index is None:
+                continue
+            try:
+                if index.rebuilding:
+                    # Yeniden kurulum bitince bakım devam eder
+                    continue
+                if index.should_promote():
+                    self._start_promotion(index)
+                    continue
+                if self.compaction_ratio > 0 and index.tombstone_ratio >= self.compaction_ratio:
+                    index.compact()
+                    self.compactions += 1
+                    index.checkpoint()
+                    self.checkpoints += 1
+                elif index.needs_checkpoint(self.max_pending, self.interval_seconds):
+                    index.checkpoint()
+                    self.checkpoints += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Index maintenance error ({index.name}): {e}")
+
+    def _start_promotion(self, index: VectorIndex):
+        # Aynı isimli index'in önceki sürümü de bakımda olabilir, index nesnesine göre tutulur
+        thread = self._promotions.get(index)
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=self._promote, args=(index,),
+                                  name=f"index-promotion-{index.name}", daemon=True)
+        self._promotions[index] = thread
+        thread.start()
+
+    def _promote(self, index: VectorIndex):
+        try:
+            index.promote()
+            index.checkpoint()
+            self.promotions += 1
+            self.checkpoints += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Index promotion error ({index.name}): {e}")
@@ -0,0 +1,124 @@
+"""
+Embedding'lerin MongoDB'de saklanma formatı
+
+BSON double dizisi (384 * 9 byte) yerine embedding'ler paketlenmiş
+float32 / float16 Binary olarak saklanabilir. Binary subtype'ı dtype'ı
+belirtir, okurken eski dizi formatı da aynı şekilde çözülür.
+"""
+
+from typing import Annotated, Dict, List, Optional, Union
+
+import numpy as np
+from bson import Binary
+from pydantic import PlainSerializer, PlainValidator, WithJsonSchema
+
+from app.config import settings
+
+# Kullanıcı tanımlı BSON binary subtype'ları (128-255 aralığı)
+FLOAT32_SUBTYPE = 0x80
+FLOAT16_SUBTYPE = 0x81
+
+STORAGE_FORMATS = {
+    'float32': (FLOAT32_SUBTYPE, np.float32),
+    'float16': (FLOAT16_SUBTYPE, np.float16)
+}
+SUBTYPE_DTYPES = {subtype: dtype for subtype, dtype in STORAGE_FORMATS.values()}
+
+def encode_embedding(embedding, storage_format: Optional[str] = None) -> Union[Binary, List[float]]:
+    """Embedding'i MongoDB'ye yazılacak formata çevirir"""
+    storage_format = storage_format or settings.EMBEDDING_STORAGE_FORMAT
+    if storage_format == 'array':
+        return np.asarray(embedding, dtype=np.float32).tolist()
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown embedding storage format: {storage_format}")
+
+    subtype, dtype = STORAGE_FORMATS[storage_format]
+    return Binary(np.asarray(embedding, dtype=dtype).tobytes(), subtype)
+
+def decode_embedding(value) -> Optional[np.ndarray]:
+    """MongoDB'deki embedding'i (Binary veya dizi) float32 numpy vektörüne çevirir"""
+    if value is None:
+        return None
+    if isinstance(value, np.ndarray):
+        return value.astype(np.float32, copy=False)
+    if isinstance(value, Binary):
+        dtype = SUBTYPE_DTYPES.get(value.subtype)
+        if dtype is None:
+            raise ValueError(f"Unknown embedding binary subtype: {value.subtype}")
+        return np.frombuffer(value, dtype=dtype).astype(np.float32, copy=False)
+    if isinstance(value, (bytes, bytearray)):
+        return np.frombuffer(value, dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+def is_stored_as(value, storage_format: str) -> bool:
+    """Embedding zaten istenen formatta mı"""
+    if storage_format == 'array':
+        return isinstance(value, list)
+    return isinstance(value, Binary) and value.subtype == STORAGE_FORMATS[storage_format][0]
+
+# Pydantic modellerinde embedding alanı: okurken numpy'a çözülür,
+# JSON response'ta float listesi olarak yazılır
+EmbeddingVector = Annotated[
+    np.ndarray,
+    PlainValidator(decode_embedding),
+    PlainSerializer(lambda value: value.tolist(), return_type=List[float], when_used='json'),
+    WithJsonSchema({'type': 'array', 'items': {'type': 'number'}})
+]
+
+def migrate_embeddings(database, collections=('cvs', 'jobs'), storage_format: Optional[str] = None,
+                       batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Mevcut dokümanların embedding'lerini verilen formata çevirir (pymongo Database ile)
+    Koleksiyon başına güncellenen doküman sayısını döner
+    """
+    from pymongo import UpdateOne
+
+    storage_format = storage_format or settings.EMBEDDING_STORAGE_FORMAT
+    result = {}
+
+    for name in collections:
+        collection = database[name]
+        if storage_format == 'array':
+            query = {'embedding': {'$type': 'binData'}}
+        else:
+            query = {'embedding': {'$type': ['array', 'binData']}}
+
+        migrated = 0
+        operations = []
+        cursor = collection.find(query, {'embedding': 1}).batch_size(batch_size)
+        for doc in cursor:
+            if is_stored_as(doc['embedding'], storage_format):
+                continue
+            embedding = decode_embedding(doc['embedding'])
+            operations.append(UpdateOne(
+                {'_id': doc['_id']},
+                {'$set': {'embedding': encode_embedding(embedding, storage_format)}}
+            ))
+            if len(operations) >= batch_size:
+                migrated += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            migrated += collection.bulk_write(operations, ordered=False).modified_count
+
+        result[name] = migrated
+
+    return result
+
+if __name__ == "__main__":
+    import argparse
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Embedding storage format migration")
+    parser.add_argument("--format", choices=['array'] + list(STORAGE_FORMATS),
+                        default=settings.EMBEDDING_STORAGE_FORMAT)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = MongoClient(settings.MONGODB_URL)
+    try:
+        counts = migrate_embeddings(client[settings.DATABASE_NAME], storage_format=args.format,
+                                    batch_size=args.batch_size)
+    finally:
+        client.close()
+    for name, count in counts.items():
+        print(f"✅ {name}: {count} embedding {args.format} formatına çevrildi")
@@ -0,0 +1,78 @@
+"""
+Beceri sözlüğü: normalize edilmiş beceri adı -> int id
+
+Beceriler küçük harfe çevrilip boşlukları sadeleştirilerek tek id'ye bağlanır.
+Bir CV'nin / ilanın becerileri sıralı, tekrarsız int dizisi olarak tutulur;
+eşleşen / eksik beceriler string karşılaştırması yerine dizi kesişimiyle,
+toplu skorlamada ise tek bir vektörel üyelik sorgusuyla bulunur.
+
+Id'ler süreç içinde sabittir (sözlük sadece büyür) ama süreçler arasında
+aynı değildir, bu yüzden MongoDB'ye yazılmaz.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+SKILL_ID_DTYPE = np.int32
+
+def normalize_skill(skill: str) -> str:
+    """Karşılaştırma için beceri adı: küçük harf, tek boşluk"""
+    return " ".join(skill.lower().split())
+
+class SkillVocabulary:
+    """Thread-safe, sadece eklenen beceri sözlüğü"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def skill_id(self, skill: str) -> int:
+        """Becerinin id'si (sözlükte yoksa eklenir)"""
+        name = normalize_skill(skill)
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._ids.get(name)
+                if skill_id is None:
+                    skill_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = skill_id
+        return skill_id
+
+    def get_id(self, skill: str) -> Optional[int]:
+        """Becerinin id'si, sözlükte yoksa None (sözlüğe eklemez)"""
+        return self._ids.get(normalize_skill(skill))
+
+    def ordered_ids(self, skills: Iterable[str]) -> np.ndarray:
+        """Tekrarsız id'ler, becerilerin ilk geçtiği sırada"""
+        ids = dict.fromkeys(self.skill_id(skill) for skill in skills if skill and skill.strip())
+        return np.fromiter(ids, dtype=SKILL_ID_DTYPE, count=len(ids))
+
+    def encode(self, skills: Iterable[str]) -> np.ndarray:
+        """Becerilerin sıralı, tekrarsız id dizisi"""
+        return np.sort(self.ordered_ids(skills))
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        return [self._names[skill_id] for skill_id in ids]
+
+def overlap_counts(query_ids: np.ndarray, id_arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Her id dizisinin query_ids ile kesişim boyutu. Diziler tek dizide
+    birleştirilip id -> üyelik tablosundan okunur, sahip dizi başına toplanır.
+    """
+    lengths = np.fromiter((len(ids) for ids in id_arrays), dtype=np.int64, count=len(id_arrays))
+    if len(query_ids) == 0 or lengths.sum() == 0:
+        return np.zeros(len(id_arrays), dtype=np.int64)
+    flat = np.concatenate([ids for ids in id_arrays if len(ids)])
+    member = np.zeros(max(int(flat.max()), int(query_ids.max())) + 1, dtype=bool)
+    member[query_ids] = True
+    owners = np.repeat(np.arange(len(id_arrays)), lengths)
+    return np.bincount(owners, weights=member[flat], minlength=len(id_arrays)).astype(np.int64)
+
+# Global instance
+skill_vocabulary = SkillVocabulary()
@@ -6,13 +6,14 @@ from nltk.tokenize import word_tokenize
 from nltk.stem import PorterStemmer
 import nltk
 
-# NLTK verilerini indir (ilk çalıştırmada)
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
+def _ensure_nltk_data():
+    """NLTK verilerini indirir (ilk kullanımda, import sırasında değil)"""
+    try:
+        nltk.data.find('tokenizers/punkt')
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('punkt')
+        nltk.download('stopwords')
 
 class TextProcessor:
     """
@@ -21,6 +22,7 @@ class TextProcessor:
     """
     
     def __init__(self):
+        _ensure_nltk_data()
         self.stemmer = PorterStemmer()
         self.stop_words = set(stopwords.words('english'))
         # Türkçe stop words (basit liste)
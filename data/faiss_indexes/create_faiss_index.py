@@ -1,65 +1,40 @@
+"""
+Boş FAISS index'lerini (cv_index, job_index) API'nin okuduğu VectorIndex
+formatında (id eşlemesiyle) oluşturur. Mevcut embedding'lerden index
+kurmak için bulk_embedding kullanılır:
+
+    python -m app.services.bulk_embedding --rebuild-index-only
+
+Kullanım (proje kökünden):
+    python -m data.faiss_indexes.create_faiss_index
+"""
+import os
+
+INDEX_NAMES = ("cv_index", "job_index")
+
 def create_faiss_indexes():
     """
-    FAISS indekslerini oluşturur (boş template)
+    Aktif index dizininde (CURRENT sürümü ya da FAISS_INDEX_PATH) olmayan
+    index'leri boş olarak kaydeder, mevcut index'lere dokunmaz
     """
-    import numpy as np
-    try:
-        import faiss
-        
-        # Örnek embedding boyutu (BERT base = 768)
-        dimension = 768
-        
-        # CV'ler için index
-        cv_index = faiss.IndexFlatIP(dimension)  # Inner Product (cosine similarity için)
-        
-        # Jobs için index
-        job_index = faiss.IndexFlatIP(dimension)
-        
-        # Kaydet
-        os.makedirs("data/faiss_indexes", exist_ok=True)
-        faiss.write_index(cv_index, "data/faiss_indexes/cv_index.faiss")
-        faiss.write_index(job_index, "data/faiss_indexes/job_index.faiss")
-        
-        print("✅ FAISS indeksleri oluşturuldu!")
-        
-    except ImportError:
-        print("⚠️ FAISS kurulu değil. pip install faiss-cpu")
-        # Boş dosyalar oluştur
-        with open("data/faiss_indexes/cv_index.faiss", "w") as f:
-            f.write("# FAISS index placeholder")
-        with open("data/faiss_indexes/job_index.faiss", "w") as f:
-            f.write("# FAISS index placeholder")
+    from app.config import settings
+    from app.services.index_versions import read_current, version_path
+    from app.services.nlp_service import nlp_service
+    from app.services.vector_index import VectorIndex
+    
+    # Index boyutu API'deki NLPService'ten (encoder ve boyut indirgeme ayarlarıyla)
+    dimension = nlp_service.index_dimension
+    version = read_current(settings.FAISS_INDEX_PATH)
+    directory = version_path(settings.FAISS_INDEX_PATH, version) if version else settings.FAISS_INDEX_PATH
+    
+    for name in INDEX_NAMES:
+        index = VectorIndex(name, dimension, directory, wal_fsync=settings.FAISS_WAL_FSYNC)
+        if os.path.exists(index.index_path):
+            print(f"⚠️ {name} zaten var, atlandı: {index.index_path}")
+        else:
+            index.save()
+            print(f"✅ {name} oluşturuldu ({dimension} boyut): {index.index_path}")
+        index.close()
 
 if __name__ == "__main__":
-    save_sample_data()
-    create_faiss_indexes()E-ticaret platformları geliştirdim. ML algoritmalarını production'a aldım."
-                },
-                {
-                    "company": "StartupX",
-                    "position": "Python Developer",
-                    "duration": "2019-2021",
-                    "description": "Web API'leri ve microservice'ler geliştirdim."
-                }
-            ],
-            "education": [
-                {
-                    "school": "İstanbul Teknik Üniversitesi",
-                    "degree": "Bilgisayar Mühendisliği",
-                    "year": "2019"
-                }
-            ],
-            "created_at": datetime.now().isoformat()
-        },
-        {
-            "id": "cv_002", 
-            "name": "Ayşe Demir",
-            "email": "ayse.demir@email.com",
-            "phone": "+90 555 987 6543",
-            "summary": "Frontend geliştirici ve UX/UI tasarımcısı. React ve Vue.js konularında deneyimli.",
-            "skills": ["React", "Vue.js", "JavaScript", "HTML5", "CSS3", "Figma", "Adobe XD"],
-            "experience": [
-                {
-                    "company": "Design Agency",
-                    "position": "Frontend Developer",
-                    "duration": "2022-2024",
-                    "description": "
\ No newline at end of file
+    create_faiss_indexes()
@@ -0,0 +1,164 @@
+"""
+Test modüllerinin ortak yardımcıları: rastgele birim vektörler, sabit boyutlu
+encoder, bellek içi MongoDB (pymongo / motor) koleksiyonları ve route istemcisi
+"""
+
+import asyncio
+import httpx
+import numpy as np
+from bson import Binary, ObjectId
+
+DIMENSION = 8
+
+def unit_vectors(count, dimension=DIMENSION, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+class FixedDimensionEncoder:
+    """Model yüklemeden DIMENSION boyutlu vektör üreten encoder"""
+
+    dimension = DIMENSION
+
+    def encode_bucketed(self, texts, batch_size=32):
+        return unit_vectors(len(texts))
+
+# $type sorgusunda kullanılan BSON tip adları
+BSON_TYPES = {'array': list, 'binData': Binary}
+
+def matches_query(document, query):
+    """Basit MongoDB filtresi: eşitlik, $in, $ne, $exists, $type"""
+    for field, value in query.items():
+        if isinstance(value, dict) and '$in' in value:
+            if document.get(field) not in value['$in']:
+                return False
+        elif isinstance(value, dict) and '$ne' in value:
+            if document.get(field) == value['$ne']:
+                return False
+        elif isinstance(value, dict) and '$exists' in value:
+            if (field in document) != value['$exists']:
+                return False
+        elif isinstance(value, dict) and '$type' in value:
+            names = value['$type'] if isinstance(value['$type'], list) else [value['$type']]
+            if field not in document or not isinstance(document[field], tuple(BSON_TYPES[name] for name in names)):
+                return False
+        elif document.get(field) != value:
+            return False
+    return True
+
+class FakeBulkResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+class FakeDeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+class FakeCursor:
+    """Hem senkron (pymongo) hem async (motor) iterasyonu destekleyen cursor"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, field, direction):
+        self.documents = sorted(self.documents, key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    async def to_list(self, length=None):
+        return self.documents[:length]
+
+    async def __aiter__(self):
+        for document in self.documents:
+            yield document
+
+class FakeSyncCollection:
+    """find / bulk_write / delete_many destekleyen senkron (pymongo) bellek içi koleksiyon"""
+
+    def __init__(self, documents=()):
+        self.documents = {document['_id']: document for document in documents}
+        self.queries = []
+        self.writes = []
+
+    def _select(self, query):
+        return [d for d in self.documents.values() if matches_query(d, query)]
+
+    def find_one(self, query, projection=None):
+        self.queries.append(query)
+        return next((dict(d) for d in self._select(query)), None)
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor([dict(d) for d in self._select(query)])
+
+    def count_documents(self, query):
+        return len(self._select(query))
+
+    def create_index(self, keys):
+        pass
+
+    def bulk_write(self, operations, ordered=True):
+        """UpdateOne listesi; eşleşmeyen filtre upsert gibi yeni doküman açar"""
+        self.writes.append(operations)
+        for operation in operations:
+            existing = next(iter(self._select(operation._filter)), None)
+            if existing is None:
+                existing = {'_id': ObjectId(), **operation._filter, **operation._doc.get('$setOnInsert', {})}
+                self.documents[existing['_id']] = existing
+            existing.update(operation._doc['$set'])
+        return FakeBulkResult(len(operations))
+
+    def delete_many(self, query):
+        doc_ids = [d['_id'] for d in self._select(query)]
+        for doc_id in doc_ids:
+            del self.documents[doc_id]
+        return FakeDeleteResult(len(doc_ids))
+
+class FakeCollection(FakeSyncCollection):
+    """Aynı koleksiyonun async (motor) arayüzü"""
+
+    async def find_one(self, query, projection=None):
+        return super().find_one(query, projection)
+
+    async def count_documents(self, query):
+        return super().count_documents(query)
+
+    async def create_index(self, keys):
+        pass
+
+    async def bulk_write(self, operations, ordered=True):
+        return super().bulk_write(operations, ordered)
+
+    async def delete_many(self, query):
+        return super().delete_many(query)
+
+class FakeDatabase:
+    """cvs / jobs / matches koleksiyonlu async veritabanı"""
+
+    def __init__(self, cvs=(), jobs=(), matches=()):
+        self.cvs = FakeCollection(cvs)
+        self.jobs = FakeCollection(jobs)
+        self.matches = FakeCollection(matches)
+
+class RouteClient:
+    """Uygulamayı ASGI üzerinden çağıran senkron istemci (event loop istek başına)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, url, **kwargs):
+        async def send():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
@@ -0,0 +1,109 @@
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from app.api import admin_routes
+from app.config import settings
+from app.services.bulk_embedding import build_index_version
+from app.services.index_versions import read_current
+from app.services.nlp_service import NLPService
+from app.utils.database import get_database
+from app.utils.embedding_codec import encode_embedding
+from helpers import FakeDatabase, FakeSyncCollection, FixedDimensionEncoder, RouteClient, unit_vectors
+
+class TestAdminIndexRoutes:
+    """
+    /api/admin/indexes: çevrimdışı kurulan sürümü yükleme, CURRENT ve rollback
+    """
+
+    @pytest.fixture
+    def documents(self):
+        cvs = [{'_id': ObjectId(), 'embedding': encode_embedding(vector)} for vector in unit_vectors(6)]
+        jobs = [{'_id': ObjectId(), 'embedding': encode_embedding(vector), 'is_active': True}
+                for vector in unit_vectors(4, seed=1)]
+        return {'cvs': cvs, 'jobs': jobs}
+
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path))
+        monkeypatch.setattr(settings, "EMBEDDING_REDUCTION", "none")
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+        service = NLPService()
+        service._encoder = FixedDimensionEncoder()
+        monkeypatch.setattr(admin_routes, "nlp_service", service)
+        yield service
+        service.shutdown()
+
+    @pytest.fixture
+    def db(self, documents):
+        return FakeDatabase(documents['cvs'], documents['jobs'])
+
+    @pytest.fixture
+    def client(self, db):
+        app = FastAPI()
+        app.include_router(admin_routes.router)
+        app.dependency_overrides[get_database] = lambda: db
+        return RouteClient(app)
+
+    def build(self, documents, service):
+        """Dokümanlardan bulk_embedding ile yeni sürüm kurar"""
+        database = {name: FakeSyncCollection(docs) for name, docs in documents.items()}
+        return build_index_version(database, batch_size=4, service=service)
+
+    def test_build_promote_and_rollback(self, client, service, documents, db, tmp_path):
+        first = self.build(documents, service)
+        assert read_current(str(tmp_path)) is None
+
+        response = client.post("/api/admin/indexes/reload")
+        assert response.status_code == 200
+        assert response.json()['current_version'] == first
+        assert response.json()['cv_index_size'] == 6
+        assert read_current(str(tmp_path)) == first
+
+        # Yeni CV ile ikinci sürüm; en yenisi yüklenir, önceki rollback için kalır
+        cv = {'_id': ObjectId(), 'embedding': encode_embedding(unit_vectors(1, seed=2)[0])}
+        documents['cvs'].append(cv)
+        db.cvs.documents[cv['_id']] = cv
+        second = self.build(documents, service)
+        info = client.post("/api/admin/indexes/reload").json()
+        assert info['current_version'] == second and info['previous_version'] == first
+        assert info['cv_index_size'] == 7
+        assert read_current(str(tmp_path)) == second
+
+        listing = client.get("/api/admin/indexes/versions").json()
+        assert listing['versions'] == [first, second]
+        assert listing['current_version'] == second
+
+        response = client.post("/api/admin/indexes/rollback")
+        assert response.status_code == 200
+        assert response.json()['current_version'] == first
+        assert response.json()['cv_index_size'] == 6
+        assert read_current(str(tmp_path)) == first
+
+        # Açıkça istenen sürüm yeniden yüklenebilir
+        info = client.post("/api/admin/indexes/reload", params={'version': second}).json()
+        assert info['current_version'] == second
+        assert read_current(str(tmp_path)) == second
+
+    def test_unknown_version_is_rejected(self, client, service, documents, tmp_path):
+        first = self.build(documents, service)
+        client.post("/api/admin/indexes/reload")
+
+        response = client.post("/api/admin/indexes/reload", params={'version': "20000101-000000"})
+        assert response.status_code == 409
+        assert "20000101-000000" in response.json()['detail']
+        assert service.index_version == first
+        assert read_current(str(tmp_path)) == first
+
+    def test_count_mismatch_keeps_current_version(self, client, service, documents, db, tmp_path):
+        """MongoDB sayılarıyla tutmayan sürüme geçilmez"""
+        self.build(documents, service)
+        for cv in documents['cvs'][:3]:
+            del db.cvs.documents[cv['_id']]
+
+        response = client.post("/api/admin/indexes/reload")
+        assert response.status_code == 409
+        assert service.index_version is None
+        assert read_current(str(tmp_path)) is None
+
+    def test_rollback_without_previous_version(self, client, service):
+        assert client.post("/api/admin/indexes/rollback").status_code == 409
@@ -0,0 +1,149 @@
+import os
+from collections import deque
+import pytest
+import numpy as np
+from bson import ObjectId
+from app.config import settings
+from app.services.bulk_embedding import (
+    THREAD_ENV_VARIABLES, BulkEmbeddingPipeline, _spawn_pool, build_index_version,
+    cv_embedding_text, job_embedding_text
+)
+from app.services.index_versions import read_current, read_manifest, version_path
+from app.services.nlp_service import NLPService
+from app.utils.embedding_codec import decode_embedding, encode_embedding
+from helpers import DIMENSION, FakeSyncCollection, FixedDimensionEncoder, unit_vectors
+
+class FakeResult:
+    """Worker'dan dönen AsyncResult yerine"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def get(self):
+        return self.embeddings
+
+class TestBulkEmbeddingPipeline:
+    """
+    Toplu embedding yazımı ve checkpoint'ten devam testleri
+    """
+
+    @pytest.fixture
+    def checkpoint_path(self, tmp_path):
+        return str(tmp_path / "bulk_embedding_cvs.checkpoint.json")
+
+    def make_pipeline(self, checkpoint_path, reports):
+        return BulkEmbeddingPipeline("cvs", workers=1, checkpoint_path=checkpoint_path,
+                                     progress=reports.append)
+
+    def start(self, pipeline, total):
+        pipeline._state = {'previously_processed': 0, 'done': 0, 'modified': 0, 'total': total, 'started': 0.0}
+
+    def test_write_oldest_writes_in_order_and_checkpoints(self, checkpoint_path):
+        reports = []
+        pipeline = self.make_pipeline(checkpoint_path, reports)
+        self.start(pipeline, 5)
+        collection = FakeSyncCollection()
+        ids = sorted(ObjectId() for _ in range(5))
+        vectors = unit_vectors(5)
+        pending = deque([(ids[:3], FakeResult(vectors[:3])), (ids[3:], FakeResult(vectors[3:]))])
+
+        pipeline._write_oldest(collection, pending)
+        assert len(pending) == 1
+        assert [operation._filter['_id'] for operation in collection.writes[0]] == ids[:3]
+        assert pipeline._load_checkpoint()['last_id'] == ids[2]
+
+        pipeline._write_oldest(collection, pending)
+        assert not pending
+        for doc_id, vector in zip(ids, vectors):
+            document = collection.documents[doc_id]
+            np.testing.assert_allclose(decode_embedding(document['embedding']), vector, rtol=1e-3)
+            assert document['embedding_model'] == pipeline.model_key
+        assert [report['done'] for report in reports] == [3, 5]
+        assert pipeline._state['modified'] == 5
+
+    def test_resume_from_checkpoint(self, checkpoint_path, monkeypatch):
+        pipeline = self.make_pipeline(checkpoint_path, [])
+        self.start(pipeline, 4)
+        ids = sorted(ObjectId() for _ in range(4))
+        pending = deque([(ids[:2], FakeResult(unit_vectors(2))), (ids[2:], FakeResult(unit_vectors(2, seed=1)))])
+        pipeline._write_oldest(FakeSyncCollection(), pending)
+
+        # Kesilen çalışma yeni pipeline'da son yazılan _id'den ve sayaçtan devam eder
+        resumed = self.make_pipeline(checkpoint_path, [])
+        checkpoint = resumed._load_checkpoint()
+        assert checkpoint['last_id'] == ids[1]
+        assert checkpoint['processed'] == 2
+
+        # Başka model ya da backend ile başlatılmış checkpoint kullanılmaz
+        monkeypatch.setattr(settings, "ENCODER_MODEL_PATH", "/models/fine-tuned")
+        assert self.make_pipeline(checkpoint_path, [])._load_checkpoint() is None
+        monkeypatch.setattr(settings, "ENCODER_MODEL_PATH", "")
+        assert self.make_pipeline(checkpoint_path, [])._load_checkpoint() is not None
+        monkeypatch.setattr(settings, "ENCODER_BACKEND", "other-backend")
+        assert self.make_pipeline(checkpoint_path, [])._load_checkpoint() is None
+
+        resumed.clear_checkpoint()
+        assert not os.path.exists(checkpoint_path)
+        assert resumed._load_checkpoint() is None
+
+    def test_text_builders_accept_null_fields(self):
+        """Mongo'da null olarak kalmış liste alanları batch'i düşürmez"""
+        assert cv_embedding_text({'summary': None, 'skills': None, 'raw_text': 'python'}).strip() == 'python'
+        text = job_embedding_text({'title': 'Backend', 'requirements': None, 'skills_required': None})
+        assert text.split() == ['Backend']
+
+    def test_pool_starts_with_thread_limits(self, monkeypatch):
+        """Worker'lar thread değişkenlerini parent ortamından alır, parent ortamı geri yüklenir"""
+        monkeypatch.setenv('OMP_NUM_THREADS', '8')
+        monkeypatch.delenv('MKL_NUM_THREADS', raising=False)
+        seen = {}
+
+        class RecordingContext:
+            def Pool(self, processes, initializer, initargs):
+                seen.update({variable: os.environ.get(variable) for variable in THREAD_ENV_VARIABLES})
+                return 'pool'
+
+        assert _spawn_pool(RecordingContext(), 2, 1, ()) == 'pool'
+        assert seen == {variable: '1' for variable in THREAD_ENV_VARIABLES}
+        assert os.environ['OMP_NUM_THREADS'] == '8'
+        assert 'MKL_NUM_THREADS' not in os.environ
+
+class TestIndexVersionBuild:
+    """
+    MongoDB embedding'lerinden çevrimdışı index sürümü kurma
+    """
+
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path))
+        monkeypatch.setattr(settings, "EMBEDDING_REDUCTION", "none")
+        service = NLPService()
+        service._encoder = FixedDimensionEncoder()
+        yield service
+        service.shutdown()
+
+    def test_builds_offline_version(self, service, tmp_path):
+        cv_vectors, job_vectors = unit_vectors(6), unit_vectors(5, seed=1)
+        cvs = [{'_id': ObjectId(), 'embedding': encode_embedding(vector)} for vector in cv_vectors]
+        cvs.append({'_id': ObjectId()})
+        jobs = [{'_id': ObjectId(), 'embedding': encode_embedding(vector), 'is_active': row != 0,
+                 'location': 'İzmir, Türkiye', 'employment_type': 'Full-time'}
+                for row, vector in enumerate(job_vectors)]
+        database = {'cvs': FakeSyncCollection(cvs), 'jobs': FakeSyncCollection(jobs)}
+
+        version = build_index_version(database, batch_size=2, service=service)
+        manifest = read_manifest(version_path(str(tmp_path), version))
+        assert manifest['indexes']['cv_index']['count'] == 6
+        # Pasif ilanlar index'e girmez
+        assert manifest['indexes']['job_index']['count'] == 4
+        assert manifest['dimension'] == DIMENSION
+
+        # Çalışan index'ler yüklenmez, CURRENT ve kök dizin değişmez
+        assert not service._indexes_loaded
+        assert read_current(str(tmp_path)) is None
+        assert not os.path.exists(tmp_path / "cv_index.faiss")
+
+        service.reload_indexes(version, {'cv_index': 6, 'job_index': 4})
+        assert read_current(str(tmp_path)) == version
+        results = service.search_similar_jobs(job_vectors[1].tolist(), k=10, filters={'location': 'izmir'})
+        assert {result['job_id'] for result in results} == {str(job['_id']) for job in jobs[1:]}
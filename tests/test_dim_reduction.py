@@ -0,0 +1,64 @@
+import os
+import pytest
+import numpy as np
+from app.services.dim_reduction import DimensionReducer, PCAReducer, TruncationReducer, create_reducer, pca_path
+from helpers import unit_vectors
+
+class TestDimensionReduction:
+    """
+    PCA / truncation boyut indirgeme testleri
+    """
+
+    def test_pca_round_trip(self, tmp_path):
+        """Eğitilen PCA kaydedilir, yeniden yüklenince aynı dönüşümü verir"""
+        vectors = unit_vectors(500, dimension=32)
+        path = pca_path(str(tmp_path), 32, 8)
+        reducer = PCAReducer(32, 8, path=path)
+        assert not reducer.is_trained
+        reducer.train(vectors)
+        assert os.path.exists(path)
+
+        loaded = create_reducer("pca", 32, 8, str(tmp_path))
+        assert loaded.is_trained
+        reduced = loaded.transform(vectors[:10])
+        assert reduced.shape == (10, 8)
+        np.testing.assert_allclose(reduced, reducer.transform(vectors[:10]), rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1.0, rtol=1e-5)
+
+    def test_pca_needs_enough_vectors(self):
+        with pytest.raises(ValueError):
+            PCAReducer(32, 8).train(unit_vectors(4, dimension=32))
+
+    def test_truncation_renormalizes(self):
+        """İlk boyutlar alınır ve birim uzunluğa getirilir"""
+        vectors = unit_vectors(20, dimension=32)
+        reduced = TruncationReducer(32, 8).transform(vectors)
+        np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1.0, rtol=1e-5)
+        expected = vectors[:, :8] / np.linalg.norm(vectors[:, :8], axis=1, keepdims=True)
+        np.testing.assert_allclose(reduced, expected, rtol=1e-5)
+
+    def test_mismatched_dimensions_are_rejected(self, tmp_path):
+        """Farklı boyutlarla eğitilmiş dönüşüm yüklenmez, hedef boyut modelinkini aşamaz"""
+        path = str(tmp_path / "pca.vt")
+        PCAReducer(32, 8, path=path).train(unit_vectors(500, dimension=32))
+
+        assert not PCAReducer(32, 16).load(path)
+        assert not PCAReducer(64, 8).load(path)
+        assert PCAReducer(32, 8).load(path)
+        with pytest.raises(ValueError):
+            TruncationReducer(8, 16)
+
+    def test_incomplete_reducer_fails_at_construction(self):
+        class IdentityReducer(DimensionReducer):
+            name = "identity"
+
+        with pytest.raises(TypeError):
+            IdentityReducer(32, 8)
+
+    def test_create_reducer_settings(self, tmp_path):
+        assert create_reducer("none", 32, 8, str(tmp_path)) is None
+        assert create_reducer("truncate", 32, 32, str(tmp_path)) is None
+        assert isinstance(create_reducer("truncate", 32, 8, str(tmp_path)), TruncationReducer)
+        assert not create_reducer("pca", 32, 8, str(tmp_path)).is_trained
+        with pytest.raises(ValueError):
+            create_reducer("svd", 32, 8, str(tmp_path))
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+from app.config import settings
+from app.services.nlp_service import EmbeddingBatcher, NLPService
+
+class RecordingEncoder:
+    """Her çağrının batch'ini kaydeder, text uzunluğunu embedding olarak döner"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+class SlowEncoder:
+    """Her encode çağrısında bekleyen, text uzunluğunu embedding olarak dönen encoder"""
+
+    dimension = 2
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def prepare(self, text):
+        return text.strip()
+
+    def encode_bucketed(self, texts, batch_size=32):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+class TestEmbeddingBatcher:
+    """
+    Dinamik micro-batching testleri
+    """
+
+    @pytest.fixture
+    def encoder(self):
+        return RecordingEncoder()
+
+    def test_concurrent_requests_share_a_batch(self, encoder):
+        """Pencere içinde gelen istekler tek encode çağrısında işlenir"""
+        batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=500)
+        texts = ["a" * (i + 1) for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(batcher.encode, texts))
+        batcher.shutdown()
+
+        assert len(encoder.batches) == 1
+        assert sorted(encoder.batches[0]) == sorted(texts)
+        # Her istek kendi sonucunu alır
+        assert [result[0] for result in results] == [len(text) for text in texts]
+
+    def test_max_batch_size_splits_batches(self, encoder):
+        batcher = EmbeddingBatcher(encoder, max_batch_size=4, max_wait_ms=200)
+        futures = [batcher.submit(f"text {i}") for i in range(10)]
+        assert [future.result(timeout=5)[0] for future in futures] == [len(f"text {i}") for i in range(10)]
+        batcher.shutdown()
+        assert [len(batch) for batch in encoder.batches] == [4, 4, 2]
+
+    def test_flushes_after_max_wait(self, encoder):
+        """Dolmayan batch max_wait_ms dolunca işlenir"""
+        batcher = EmbeddingBatcher(encoder, max_batch_size=32, max_wait_ms=50)
+        started = time.perf_counter()
+        result = batcher.encode("python")
+        elapsed = time.perf_counter() - started
+        batcher.shutdown()
+
+        assert result[0] == 6
+        assert encoder.batches == [["python"]]
+        assert 0.04 <= elapsed < 2.0
+
+    def test_encoder_error_reaches_every_future(self):
+        encoder = RecordingEncoder(error=RuntimeError("model failed"))
+        batcher = EmbeddingBatcher(encoder, max_batch_size=3, max_wait_ms=500)
+        futures = [batcher.submit(text) for text in ("a", "b", "c")]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model failed"):
+                future.result(timeout=5)
+
+        # Hata worker'ı durdurmaz, sonraki istekler işlenir
+        encoder.error = None
+        assert batcher.encode("next")[0] == 4
+        batcher.shutdown()
+        assert batcher.get_stats()['errors'] == 3
+
+    def test_stats_histogram(self, encoder):
+        batcher = EmbeddingBatcher(encoder, max_batch_size=3, max_wait_ms=200)
+        for future in [batcher.submit(text) for text in ("a", "b", "c")]:
+            future.result(timeout=5)
+        batcher.encode("d")
+        batcher.shutdown()
+
+        stats = batcher.get_stats()
+        assert stats['batches'] == 2
+        assert stats['requests'] == 4
+        assert stats['max_batch_size_seen'] == 3
+        assert stats['avg_batch_size'] == pytest.approx(2.0)
+        histogram = stats['batch_size_histogram']
+        assert histogram['<=1'] == 1 and histogram['<=4'] == 1
+        assert sum(histogram.values()) == 2
+        assert stats['queue_depth'] == 0
+        assert stats['max_queue_wait_ms'] >= stats['avg_queue_wait_ms'] > 0
+
+class TestAsyncEmbedding:
+    """
+    create_embedding_async: sync sonuçla aynı, encode event loop dışında
+    """
+
+    def make_service(self, tmp_path, monkeypatch, batching, delay=0.0, workers=0):
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path))
+        monkeypatch.setattr(settings, "EMBEDDING_REDUCTION", "none")
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+        monkeypatch.setattr(settings, "EMBEDDING_BATCHING_ENABLED", batching)
+        monkeypatch.setattr(settings, "EMBEDDING_MAX_BATCH_SIZE", 16)
+        monkeypatch.setattr(settings, "EMBEDDING_MAX_WAIT_MS", 20)
+        monkeypatch.setattr(settings, "EMBEDDING_EXECUTOR_WORKERS", workers)
+        service = NLPService()
+        service._encoder = SlowEncoder(delay)
+        return service
+
+    @pytest.mark.parametrize("batching", [False, True])
+    def test_matches_sync_result(self, tmp_path, monkeypatch, batching):
+        service = self.make_service(tmp_path, monkeypatch, batching)
+        try:
+            text = "  Python developer  "
+            assert asyncio.run(service.create_embedding_async(text)) == service.create_embedding(text)
+            texts = ["python", "go developer"]
+            assert asyncio.run(service.create_embeddings_async(texts)) == service.create_embeddings(texts)
+        finally:
+            service.shutdown()
+
+    def test_concurrent_calls_do_not_block_the_loop(self, tmp_path, monkeypatch):
+        """Eşzamanlı istekler havuzda tek batch'te encode edilir, loop bu sürede çalışmaya devam eder"""
+        service = self.make_service(tmp_path, monkeypatch, batching=True, delay=0.2)
+        texts = ["a" * (i + 1) for i in range(16)]
+
+        async def scenario():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticking = asyncio.ensure_future(ticker())
+            started = time.perf_counter()
+            results = await asyncio.gather(*(service.create_embedding_async(text) for text in texts))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await ticking
+            return results, elapsed, ticks
+
+        try:
+            results, elapsed, ticks = asyncio.run(scenario())
+            # Havuz bir batch'i dolduracak kadar büyük: 16 istek en fazla iki model çağrısı
+            assert service._get_executor()._max_workers == settings.EMBEDDING_MAX_BATCH_SIZE
+            assert service.encoder.calls <= 2
+            assert elapsed < 16 * 0.2 / 2
+            # Encode sürerken loop diğer işleri çalıştırdı
+            assert ticks >= 10
+            service.encoder.delay = 0.0
+            assert results == [service.create_embedding(text) for text in texts]
+        finally:
+            service.shutdown()
+
+    def test_executor_size_setting(self, tmp_path, monkeypatch):
+        service = self.make_service(tmp_path, monkeypatch, batching=False, workers=3)
+        try:
+            assert service._get_executor()._max_workers == 3
+        finally:
+            service.shutdown()
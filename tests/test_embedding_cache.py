@@ -0,0 +1,88 @@
+import os
+import pytest
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache:
+    """
+    İki katmanlı embedding cache testleri
+    """
+
+    @pytest.fixture
+    def disk_path(self, tmp_path):
+        return str(tmp_path / "embedding_cache.sqlite3")
+
+    def test_memory_hit_and_miss(self):
+        """Bellek katmanı hit/miss sayaçları"""
+        cache = EmbeddingCache("model-a", max_memory_items=10)
+        assert cache.get("python developer") is None
+
+        cache.put("python developer", np.array([0.6, 0.8]))
+        np.testing.assert_allclose(cache.get("python developer"), [0.6, 0.8])
+
+        stats = cache.get_stats()
+        assert stats['memory_hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == pytest.approx(0.5)
+
+    def test_lru_eviction(self):
+        """Boyut sınırı aşılınca en az kullanılan kayıt atılır"""
+        cache = EmbeddingCache("model-a", max_memory_items=2)
+        cache.put("a", np.array([1.0]))
+        cache.put("b", np.array([2.0]))
+        cache.get("a")  # "a" artık en yeni
+        cache.put("c", np.array([3.0]))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get_stats()['memory_evictions'] == 1
+
+    def test_disk_tier_survives_restart(self, disk_path):
+        """Disk katmanı yeni instance'ta da okunur"""
+        cache = EmbeddingCache("model-a", max_memory_items=10, disk_path=disk_path)
+        cache.put("java developer", np.array([0.1, 0.2, 0.3]))
+        cache.close()
+
+        reopened = EmbeddingCache("model-a", max_memory_items=10, disk_path=disk_path)
+        np.testing.assert_allclose(reopened.get("java developer"), [0.1, 0.2, 0.3], rtol=1e-6)
+        assert reopened.get_stats()['disk_hits'] == 1
+
+        # İkinci okuma bellekten gelir
+        reopened.get("java developer")
+        assert reopened.get_stats()['memory_hits'] == 1
+
+    def test_disk_tier_opens_lazily(self, disk_path):
+        """Oluşturma dosya açmaz; disk katmanı ilk kullanımda ya da open() ile açılır"""
+        cache = EmbeddingCache("model-a", disk_path=disk_path)
+        assert not os.path.exists(disk_path)
+        assert not cache.get_stats()['disk_enabled']
+
+        assert cache.get("text") is None
+        assert os.path.exists(disk_path)
+        assert cache.get_stats()['disk_enabled']
+        cache.put("text", np.array([1.0]))
+        cache.close()
+
+        reopened = EmbeddingCache("model-a", max_memory_items=0, disk_path=disk_path)
+        reopened.open()
+        assert reopened.get_stats()['disk_items'] == 1
+
+    def test_namespace_isolates_models(self, disk_path):
+        """Farklı model adı farklı anahtar üretir"""
+        cache_a = EmbeddingCache("model-a", disk_path=disk_path)
+        cache_a.put("same text", np.array([1.0, 0.0]))
+        cache_a.close()
+
+        cache_b = EmbeddingCache("model-b", disk_path=disk_path)
+        assert cache_b.get("same text") is None
+
+    def test_disk_eviction(self, disk_path):
+        """Disk sınırı aşılınca en eski kayıtlar silinir"""
+        cache = EmbeddingCache("model-a", max_memory_items=0, disk_path=disk_path, max_disk_items=2)
+        for i in range(4):
+            cache.put(f"text {i}", np.array([float(i)]))
+
+        stats = cache.get_stats()
+        assert stats['disk_items'] == 2
+        assert stats['disk_evictions'] == 2
+        assert cache.get("text 3") is not None
@@ -0,0 +1,115 @@
+import pytest
+import numpy as np
+from bson import Binary, ObjectId
+from app.utils.embedding_codec import encode_embedding, decode_embedding, is_stored_as, migrate_embeddings
+from app.models.job_posting import JobPosting
+from helpers import FakeSyncCollection, unit_vectors
+
+class TestEmbeddingCodec:
+    """
+    Embedding saklama formatı testleri
+    """
+
+    @pytest.fixture
+    def embedding(self):
+        vector = np.random.rand(384).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def test_float32_roundtrip(self, embedding):
+        stored = encode_embedding(embedding, 'float32')
+
+        assert isinstance(stored, Binary)
+        assert len(stored) == 384 * 4
+        np.testing.assert_array_equal(decode_embedding(stored), embedding)
+
+    def test_float16_roundtrip(self, embedding):
+        stored = encode_embedding(embedding, 'float16')
+
+        assert len(stored) == 384 * 2
+        decoded = decode_embedding(stored)
+        assert decoded.dtype == np.float32
+        assert float(np.dot(decoded, embedding)) == pytest.approx(1.0, abs=1e-3)
+
+    def test_legacy_array_is_decoded(self, embedding):
+        """Eski BSON double dizisi formatı da okunur"""
+        stored = encode_embedding(embedding, 'array')
+
+        assert isinstance(stored, list)
+        assert is_stored_as(stored, 'array')
+        np.testing.assert_allclose(decode_embedding(stored), embedding)
+
+    def test_model_decodes_binary_and_serializes_list(self, embedding):
+        """Model Binary'yi numpy'a çözer, JSON'da liste olarak yazar"""
+        job = JobPosting(
+            _id="665f1c2e8b3e4a1d2c3b4a59",
+            title="Python Developer",
+            company="TechCorp",
+            description="Backend geliştirme",
+            raw_text="Python Developer TechCorp",
+            embedding=encode_embedding(embedding, 'float32')
+        )
+
+        assert isinstance(job.embedding, np.ndarray)
+        assert len(job.model_dump(mode='json')['embedding']) == 384
+
+class TestEmbeddingMigration:
+    """
+    Mevcut dokümanların embedding formatını çeviren migration testleri
+    """
+
+    @pytest.fixture
+    def vectors(self):
+        return unit_vectors(4, dimension=384)
+
+    @pytest.fixture
+    def database(self, vectors):
+        cvs = [
+            {'_id': ObjectId(), 'embedding': vectors[0].tolist()},
+            {'_id': ObjectId(), 'embedding': vectors[1].tolist()},
+            {'_id': ObjectId(), 'embedding': encode_embedding(vectors[2], 'float16')},
+            # Embedding'i olmayan / null dokümanlar atlanır
+            {'_id': ObjectId(), 'full_name': 'No Embedding'},
+            {'_id': ObjectId(), 'embedding': None}
+        ]
+        jobs = [{'_id': ObjectId(), 'embedding': encode_embedding(vectors[3], 'float32')}]
+        return {'cvs': FakeSyncCollection(cvs), 'jobs': FakeSyncCollection(jobs)}
+
+    def embeddings(self, collection):
+        return [document.get('embedding') for document in collection.documents.values()]
+
+    def test_arrays_become_float32_binary(self, database, vectors):
+        counts = migrate_embeddings(database, storage_format='float32', batch_size=2)
+
+        # Zaten float32 olan ilan yazılmaz
+        assert counts == {'cvs': 3, 'jobs': 0}
+        assert database['jobs'].writes == []
+        # Küçük batch_size'da yazımlar bölünür
+        assert [len(operations) for operations in database['cvs'].writes] == [2, 1]
+
+        stored = self.embeddings(database['cvs'])
+        assert all(is_stored_as(value, 'float32') for value in stored[:3])
+        np.testing.assert_array_equal(decode_embedding(stored[0]), vectors[0])
+        np.testing.assert_array_equal(decode_embedding(stored[1]), vectors[1])
+        np.testing.assert_allclose(decode_embedding(stored[2]), vectors[2], atol=1e-3)
+        assert stored[3:] == [None, None]
+        assert 'embedding' not in list(database['cvs'].documents.values())[3]
+
+    def test_migration_is_idempotent(self, database):
+        migrate_embeddings(database, storage_format='float32')
+        writes = len(database['cvs'].writes)
+
+        assert migrate_embeddings(database, storage_format='float32') == {'cvs': 0, 'jobs': 0}
+        assert len(database['cvs'].writes) == writes
+
+    def test_float16_and_back_to_array(self, database, vectors):
+        assert migrate_embeddings(database, collections=('cvs',), storage_format='float16') == {'cvs': 2}
+        stored = self.embeddings(database['cvs'])
+        assert all(is_stored_as(value, 'float16') and len(value) == 384 * 2 for value in stored[:3])
+        np.testing.assert_allclose(decode_embedding(stored[0]), vectors[0], atol=1e-3)
+        # Sadece verilen koleksiyonlar çevrilir
+        assert is_stored_as(self.embeddings(database['jobs'])[0], 'float32')
+
+        assert migrate_embeddings(database, storage_format='array') == {'cvs': 3, 'jobs': 1}
+        stored = self.embeddings(database['cvs']) + self.embeddings(database['jobs'])
+        assert all(isinstance(value, list) for value in stored[:3] + stored[5:])
+        np.testing.assert_allclose(stored[5], vectors[3], rtol=1e-6)
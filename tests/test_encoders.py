@@ -0,0 +1,123 @@
+import pytest
+import numpy as np
+from app.services import encoders
+from app.config import settings
+from app.services.encoders import SentenceEncoder, check_backend_parity, encoder_model_key
+
+class LengthEncoder(SentenceEncoder):
+    """Text uzunluğunu vektöre yazan, çağrılan batch'leri kaydeden sahte encoder"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    @property
+    def dimension(self):
+        return 2
+
+class TestSentenceEncoder:
+    """
+    Encoder ortak davranışlarının testleri
+    """
+
+    @pytest.fixture
+    def encoder(self):
+        return LengthEncoder()
+
+    def test_bucketed_encoding_restores_order(self, encoder):
+        """Sıralanıp encode edilen sonuçlar orijinal sıraya döner"""
+        texts = ["a" * 50, "b", "c" * 10, "d" * 3, "e" * 40]
+        embeddings = encoder.encode_bucketed(texts, batch_size=2)
+
+        assert embeddings.shape == (5, 2)
+        np.testing.assert_array_equal(embeddings[:, 0], [len(text) for text in texts])
+
+    def test_buckets_group_similar_lengths(self, encoder):
+        """Kısa text'ler uzunlarla aynı batch'e düşmez"""
+        texts = ["x" * 500, "q", "y" * 480, "r"]
+        encoder.encode_bucketed(texts, batch_size=2)
+
+        assert encoder.batches == [["q", "r"], ["y" * 480, "x" * 500]]
+
+    def test_incomplete_backend_fails_at_construction(self):
+        class NoDimensionEncoder(SentenceEncoder):
+            def encode(self, texts, batch_size=32):
+                return np.zeros((len(texts), 2), dtype=np.float32)
+
+        with pytest.raises(TypeError):
+            NoDimensionEncoder()
+
+    def test_empty_input(self, encoder):
+        assert encoder.encode_bucketed([]).shape == (0, 2)
+
+    def test_truncate_without_tokenizer_uses_char_bound(self, encoder):
+        """Tokenizer yoksa kaba karakter sınırı uygulanır"""
+        text = "word " * 2000
+        assert len(encoder.truncate(text)) == encoder.max_chars
+
+class TestEncoderModelKey:
+    """
+    Cache ve checkpoint anahtarı yüklenen modelden türetilir
+    """
+
+    def test_key_follows_model_path(self, monkeypatch):
+        monkeypatch.setattr(settings, "SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+        monkeypatch.setattr(settings, "ENCODER_BACKEND", "onnx")
+        monkeypatch.setattr(settings, "ENCODER_MODEL_PATH", "")
+        assert encoder_model_key() == "all-MiniLM-L6-v2:onnx"
+        monkeypatch.setattr(settings, "ENCODER_MODEL_PATH", "/models/fine-tuned")
+        assert encoder_model_key() == "/models/fine-tuned:onnx"
+
+class StubBackend:
+    """Text'ten sabit vektör üreten, verilen oranda sapma ekleyen sahte backend"""
+
+    name = "torch"
+    drift = 0.0
+
+    def __init__(self, model_path, **kwargs):
+        self.model_path = model_path
+
+    def encode(self, texts, batch_size=32):
+        vectors = np.array([[len(text), 1.0, 0.0] for text in texts], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Sapma vektörü dik eksene doğru döndürür: 1 - cos = drift
+        cos = 1.0 - self.drift
+        return vectors * cos + np.array([0.0, 0.0, np.sqrt(1.0 - cos ** 2)], dtype=np.float32)
+
+class TestBackendParity:
+    """
+    Backend'lerin fp32 PyTorch'a göre sapma kontrolü
+    """
+
+    @pytest.fixture(autouse=True)
+    def stub_backends(self, monkeypatch):
+        def create_encoder(backend, model_path, onnx_path=None, num_threads=0):
+            drifts = {'onnx': 0.001, 'torch-int8': 0.05}
+            if backend not in drifts:
+                raise ValueError(f"Unknown encoder backend: {backend}")
+            return type("Stub", (StubBackend,), {'name': backend, 'drift': drifts[backend]})(model_path)
+
+        monkeypatch.setattr(encoders, "TorchEncoder", StubBackend)
+        monkeypatch.setattr(encoders, "create_encoder", create_encoder)
+
+    def test_drift_against_tolerance(self):
+        corpus = ["python developer", "react", "data scientist with pandas"]
+        report = check_backend_parity(corpus, "model", backends=["torch", "onnx", "torch-int8", "tpu"],
+                                      tolerance=0.01)
+
+        assert report['torch']['max_drift'] == pytest.approx(0.0, abs=1e-6)
+        assert report['torch']['within_tolerance']
+        assert report['onnx']['max_drift'] == pytest.approx(0.001, abs=1e-4)
+        assert report['onnx']['within_tolerance']
+        assert report['torch-int8']['mean_drift'] == pytest.approx(0.05, abs=1e-4)
+        assert not report['torch-int8']['within_tolerance']
+        assert 'error' in report['tpu']
+        assert report['onnx']['texts_per_sec'] > 0
+
+        relaxed = check_backend_parity(corpus, "model", backends=["torch-int8"], tolerance=0.1)
+        assert relaxed['torch-int8']['within_tolerance']
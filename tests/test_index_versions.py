@@ -0,0 +1,136 @@
+import pytest
+import numpy as np
+from bson import ObjectId
+from app.config import settings
+from app.services.index_versions import (
+    IndexVersionWatcher, latest_version, list_versions, new_version, read_current, version_path,
+    write_current, write_manifest
+)
+from app.services.nlp_service import NLPService
+from app.services.vector_index import VectorIndex
+from helpers import DIMENSION, FixedDimensionEncoder, unit_vectors
+
+def publish(root, cv_count, job_count, seed=0):
+    """Verilen sayıda vektörle yeni bir index sürümü yayınlar"""
+    version = new_version(root)
+    directory = version_path(root, version)
+    indexes = {}
+    for name, count in (("cv_index", cv_count), ("job_index", job_count)):
+        index = VectorIndex.build(name, DIMENSION, directory,
+                                  [([str(ObjectId()) for _ in range(count)], unit_vectors(count, seed=seed))])
+        index.save()
+        index.close()
+        indexes[name] = {'count': count}
+    write_manifest(directory, {'version': version, 'dimension': DIMENSION, 'indexes': indexes})
+    return version
+
+class TestIndexVersions:
+    """
+    Sürümlü index dizinleri ve sürüm watcher'ı
+    """
+
+    def test_incomplete_versions_are_ignored(self, tmp_path):
+        root = str(tmp_path)
+        assert latest_version(root) is None
+        first = publish(root, 3, 2)
+        # Manifest'i yazılmamış (yarım) sürüm
+        new_version(root)
+        assert list_versions(root) == [first]
+
+        write_current(root, first)
+        assert read_current(root) == first
+        write_current(root, None)
+        assert read_current(root) is None
+
+    def test_watcher_loads_newer_version_once(self, tmp_path):
+        root = str(tmp_path)
+        current = {'version': None}
+        loaded, broken = [], set()
+
+        def load(version):
+            if version in broken:
+                raise ValueError("count mismatch")
+            loaded.append(version)
+            current['version'] = version
+
+        watcher = IndexVersionWatcher(root, lambda: current['version'], load)
+        assert watcher.run_once() is None
+        first = publish(root, 3, 2)
+        assert watcher.run_once() == first
+        assert watcher.run_once() is None
+
+        # Yüklenemeyen sürüm tekrar denenmez
+        broken.add(publish(root, 3, 2))
+        assert watcher.run_once() is None
+        assert watcher.run_once() is None
+        assert watcher.errors == 1
+        assert loaded == [first]
+
+class TestIndexReload:
+    """
+    NLPService'in index sürümleri arasında restart'sız geçişi
+    """
+
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path))
+        monkeypatch.setattr(settings, "EMBEDDING_REDUCTION", "none")
+        service = NLPService()
+        service._encoder = FixedDimensionEncoder()
+        yield service
+        service.shutdown()
+
+    def test_construction_does_no_io(self, tmp_path, monkeypatch):
+        """Servis oluşturmak dosya açmaz; cache ve index'ler warm_up'ta yüklenir"""
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path / "indexes"))
+        monkeypatch.setattr(settings, "EMBEDDING_REDUCTION", "none")
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_DISK_ENABLED", True)
+        service = NLPService()
+        assert not (tmp_path / "indexes").exists()
+
+        service._encoder = FixedDimensionEncoder()
+        service.warm_up()
+        try:
+            assert (tmp_path / "indexes" / "embedding_cache.sqlite3").exists()
+            assert service.is_ready()
+        finally:
+            service.shutdown()
+
+    def test_reload_switches_and_rolls_back(self, service, tmp_path):
+        root = str(tmp_path)
+        first = publish(root, 5, 4)
+        info = service.reload_indexes(document_counts={'cv_index': 5, 'job_index': 4})
+        assert info['current_version'] == first
+        assert service.cv_index.ntotal == 5
+        assert read_current(root) == first
+
+        second = publish(root, 7, 4, seed=1)
+        service.reload_indexes(second)
+        assert service.index_version == second
+        assert service.previous_index_version == first
+
+        # Değişiklikler rollback için önceki sürüme de uygulanır
+        cv_id = str(ObjectId())
+        service.add_cv_to_index(cv_id, unit_vectors(1, seed=2)[0].tolist())
+        assert service.cv_index.ntotal == 8
+
+        info = service.rollback_indexes()
+        assert info['current_version'] == first
+        assert service.cv_index.ntotal == 6
+        assert cv_id in service.cv_index
+        assert read_current(root) == first
+
+    def test_invalid_version_is_rejected(self, service, tmp_path):
+        root = str(tmp_path)
+        first = publish(root, 5, 4)
+        service.reload_indexes(first)
+
+        second = publish(root, 2, 4)
+        with pytest.raises(ValueError):
+            service.reload_indexes(second, document_counts={'cv_index': 5, 'job_index': 4})
+        assert service.index_version == first
+        assert service.cv_index.ntotal == 5
+
+        with pytest.raises(ValueError):
+            service.reload_indexes("20000101-000000")
@@ -0,0 +1,126 @@
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from app.api import matching_routes
+from app.config import settings
+from app.services.nlp_service import NLPService
+from app.utils.database import get_database
+from app.utils.embedding_codec import encode_embedding
+from helpers import FakeDatabase, FixedDimensionEncoder, RouteClient, unit_vectors
+
+def make_cv(vector, skills=('Python',)):
+    return {'_id': ObjectId(), 'skills': list(skills), 'experience': [], 'embedding': encode_embedding(vector)}
+
+def make_job(vector, skills=('Python',), is_active=True):
+    return {'_id': ObjectId(), 'skills_required': list(skills), 'experience_level': 'Mid',
+            'is_active': is_active, 'embedding': encode_embedding(vector)}
+
+class TestMatchingRoutes:
+    """
+    /api/matching bulk ve batch-process endpoint'leri (bellek içi veritabanıyla)
+    """
+
+    @pytest.fixture
+    def data(self):
+        cvs = [make_cv(vector) for vector in unit_vectors(4, seed=1)]
+        cvs.append({'_id': ObjectId(), 'skills': [], 'experience': []})
+        jobs = [make_job(vector) for vector in unit_vectors(6, seed=2)]
+        return cvs, jobs
+
+    @pytest.fixture
+    def service(self, data, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path))
+        monkeypatch.setattr(settings, "EMBEDDING_REDUCTION", "none")
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+        service = NLPService()
+        service._encoder = FixedDimensionEncoder()
+        cvs, jobs = data
+        for cv in cvs[:4]:
+            service.add_cv_to_index(str(cv['_id']), unit_vectors(1, seed=3)[0].tolist())
+        for job, vector in zip(jobs, unit_vectors(6, seed=2)):
+            service.add_job_to_index(str(job['_id']), vector.tolist())
+        monkeypatch.setattr(matching_routes, "nlp_service", service)
+        yield service
+        service.shutdown()
+
+    @pytest.fixture
+    def db(self, data):
+        return FakeDatabase(*data)
+
+    @pytest.fixture
+    def client(self, db):
+        app = FastAPI()
+        app.include_router(matching_routes.router)
+        app.dependency_overrides[get_database] = lambda: db
+        return RouteClient(app)
+
+    def test_bulk_rejects_invalid_requests(self, client, service):
+        cv_id = str(ObjectId())
+        assert client.post("/api/matching/bulk", json={}).status_code == 400
+        assert client.post("/api/matching/bulk", json={'cv_ids': [cv_id], 'job_ids': [cv_id]}).status_code == 400
+        response = client.post("/api/matching/bulk", json={'cv_ids': ["not-an-id"]})
+        assert response.status_code == 400 and "not-an-id" in response.json()['detail']
+        # Pydantic sınırları: sorgu sayısı, max_results ve threshold aralığı
+        too_many = [cv_id] * (matching_routes.BULK_MATCH_MAX_QUERIES + 1)
+        assert client.post("/api/matching/bulk", json={'cv_ids': too_many}).status_code == 422
+        assert client.post("/api/matching/bulk", json={'cv_ids': [cv_id], 'max_results': 0}).status_code == 422
+        assert client.post("/api/matching/bulk", json={'cv_ids': [cv_id], 'threshold': 2}).status_code == 422
+
+    def test_bulk_matches_cvs_to_jobs(self, client, service, data):
+        cvs, jobs = data
+        missing_id = str(ObjectId())
+        cv_ids = [str(cv['_id']) for cv in cvs]
+        response = client.post("/api/matching/bulk", json={'cv_ids': cv_ids + [missing_id], 'max_results': 3})
+        assert response.status_code == 200
+        body = response.json()
+
+        # Embedding'i olmayan ve bulunamayan CV'ler missing'de, diğerleri istek sırasında
+        assert body['missing'] == sorted([cv_ids[4], missing_id])
+        assert [result['cv_id'] for result in body['results']] == cv_ids[:4]
+        expected = service.search_similar_jobs_batch(unit_vectors(4, seed=1), 3)
+        for result, matches in zip(body['results'], expected):
+            assert [match['job_id'] for match in result['matches']] == [match['job_id'] for match in matches]
+            assert set(result['matches'][0]) == {'job_id', 'similarity_score'}
+
+        # threshold altındaki eşleşmeler elenir (2. ve 3. skorun ortası: ilk iki eşleşme kalır)
+        scores = [match['similarity_score'] for match in body['results'][0]['matches']]
+        threshold = (scores[1] + scores[2]) / 2
+        response = client.post("/api/matching/bulk", json={'cv_ids': cv_ids[:1], 'threshold': threshold})
+        assert all(match['similarity_score'] >= threshold for match in response.json()['results'][0]['matches'])
+        assert len(response.json()['results'][0]['matches']) == 2
+
+    def test_bulk_matches_jobs_to_cvs(self, client, service, data):
+        _, jobs = data
+        response = client.post("/api/matching/bulk", json={'job_ids': [str(jobs[0]['_id'])], 'max_results': 10})
+        body = response.json()
+        assert body['missing'] == []
+        assert len(body['results'][0]['matches']) == 4
+        assert set(body['results'][0]) == {'job_id', 'matches'}
+        assert set(body['results'][0]['matches'][0]) == {'cv_id', 'similarity_score'}
+
+    def test_batch_process_deletes_only_stale_batch_matches(self, client, db, data):
+        cvs, jobs = data
+        cv_id, job_id = str(cvs[0]['_id']), str(jobs[0]['_id'])
+        stale = {'_id': ObjectId(), 'cv_id': cv_id, 'job_id': str(ObjectId()), 'source': 'batch'}
+        manual = {'_id': ObjectId(), 'cv_id': cv_id, 'job_id': job_id, 'overall_score': 0.9}
+        # Bu çalışmada işlenmeyen CV'nin toplu eşleşmesi
+        unrelated = {'_id': ObjectId(), 'cv_id': str(ObjectId()), 'job_id': job_id, 'source': 'batch'}
+        for match in (stale, manual, unrelated):
+            db.matches.documents[match['_id']] = dict(match)
+
+        response = client.get("/api/matching/batch-process", params={'top_k': 2, 'min_score': 0.0})
+        assert response.status_code == 200
+        processed = response.json()['processed']
+        assert processed['cvs'] == len(cvs) and processed['jobs'] == len(jobs)
+
+        assert stale['_id'] not in db.matches.documents
+        assert db.matches.documents[manual['_id']] == manual
+        assert db.matches.documents[unrelated['_id']] == unrelated
+        written = [match for match in db.matches.documents.values()
+                   if match.get('source') == 'batch' and match['_id'] != unrelated['_id']]
+        assert processed['matches_written'] == len(written)
+        assert all(sum(match['cv_id'] == str(cv['_id']) for match in written) <= 2 for cv in cvs)
+
+    def test_batch_process_validates_query(self, client):
+        assert client.get("/api/matching/batch-process", params={'top_k': 0}).status_code == 422
+        assert client.get("/api/matching/batch-process", params={'min_score': 1.5}).status_code == 422
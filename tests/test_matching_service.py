@@ -0,0 +1,243 @@
+import asyncio
+import time
+import pytest
+import numpy as np
+from bson import ObjectId
+from app.models.cv import CVModel, Experience
+from app.models.job_posting import JobPosting
+from app.models.match import MatchResult
+from app.services.batch_matching import create_engine
+from app.services.matching_service import MATCH_CANDIDATE_FACTOR, MatchingService
+from app.services.skill_index import SkillIndex
+from app.utils.skill_vocabulary import skill_vocabulary
+from helpers import FakeDatabase
+
+SKILLS = ['Python', 'Django', 'SQL', 'Docker', 'React', 'AWS', 'Java', 'Go', 'Kubernetes', 'Linux']
+LEVELS = ['Entry', 'Mid', 'Senior', None]
+
+def make_cv(rng, dimension=32):
+    return CVModel(
+        _id=str(ObjectId()),
+        full_name="Test",
+        email="test@example.com",
+        raw_text="",
+        skills=list(rng.choice(SKILLS, rng.integers(0, 6), replace=False)),
+        experience=[Experience(company="A", position="Dev") for _ in range(rng.integers(0, 5))],
+        embedding=rng.normal(size=dimension).astype(np.float32)
+    )
+
+def make_job(rng, dimension=32):
+    return JobPosting(
+        _id=str(ObjectId()),
+        title="Developer",
+        company="Company",
+        description="",
+        raw_text="",
+        # Büyük/küçük harf farkı ve tekrar eden beceriler de skorlanır
+        skills_required=[skill.lower() if rng.random() < 0.3 else skill
+                         for skill in rng.choice(SKILLS, rng.integers(0, 5))],
+        experience_level=LEVELS[rng.integers(0, len(LEVELS))],
+        embedding=rng.normal(size=dimension).astype(np.float32) if rng.random() > 0.05 else None
+    )
+
+class TestBatchScoring:
+    """
+    Tek CV'ye karşı N iş (ve tersi) toplu skorlama testleri
+    """
+
+    @pytest.fixture
+    def service(self):
+        return MatchingService()
+
+    @pytest.fixture
+    def rng(self):
+        return np.random.default_rng(7)
+
+    def assert_same_match(self, batch, detailed):
+        assert batch.cv_id == detailed.cv_id and batch.job_id == detailed.job_id
+        for field in ('similarity_score', 'skill_match_score', 'experience_match_score', 'overall_score'):
+            assert getattr(batch, field) == pytest.approx(getattr(detailed, field), abs=1e-5)
+        assert batch.matched_skills == detailed.matched_skills
+        assert batch.missing_skills == detailed.missing_skills
+        assert batch.match_details == detailed.match_details
+
+    def test_jobs_for_cv_matches_detailed_scores(self, service, rng):
+        cv = make_cv(rng)
+        jobs = [make_job(rng) for _ in range(300)]
+        detailed = sorted((service.calculate_detailed_match(cv, job) for job in jobs),
+                          key=lambda match: -match.overall_score)
+
+        batch = service.score_jobs_for_cv(cv, jobs, top_k=20)
+        assert len(batch) == 20
+        for match, expected in zip(batch, detailed[:20]):
+            assert match.overall_score == pytest.approx(expected.overall_score, abs=1e-5)
+        by_job = {match.job_id: match for match in detailed}
+        for match in batch:
+            self.assert_same_match(match, by_job[match.job_id])
+
+    def test_skill_ids_are_encoded_once(self, rng):
+        job = make_job(rng)
+        job.skills_required = ['Python', 'SQL']
+        first = job.skill_ids
+        assert job.skill_ids is first
+        job.skills_required = ['Python', 'SQL', 'Docker']
+        assert set(skill_vocabulary.decode(job.skill_ids)) == {'python', 'sql', 'docker'}
+
+    def test_cvs_for_job_matches_detailed_scores(self, service, rng):
+        job = make_job(rng)
+        job.skills_required = ['Python', 'python', 'SQL', 'Docker']
+        cvs = [make_cv(rng) for _ in range(300)]
+        by_cv = {cv.id: service.calculate_detailed_match(cv, job) for cv in cvs}
+
+        batch = service.score_cvs_for_job(job, cvs, top_k=300, min_score=0.3)
+        assert [match.cv_id for match in batch] == [
+            match.cv_id for match in sorted(by_cv.values(), key=lambda match: -match.overall_score)
+            if match.overall_score >= 0.3
+        ]
+        for match in batch:
+            self.assert_same_match(match, by_cv[match.cv_id])
+
+    def test_scores_thousands_of_jobs_quickly(self, service, rng):
+        cv = make_cv(rng, dimension=384)
+        jobs = [make_job(rng, dimension=384) for _ in range(5000)]
+        service.score_jobs_for_cv(cv, jobs, top_k=10)
+
+        started = time.perf_counter()
+        results = service.score_jobs_for_cv(cv, jobs, top_k=10)
+        assert len(results) == 10
+        assert time.perf_counter() - started < 0.5
+
+def to_document(model):
+    document = model.model_dump(by_alias=True)
+    document['_id'] = ObjectId(document['_id'])
+    return document
+
+class TestMatchingPipeline:
+    """
+    Id tabanlı async eşleştirme: projeksiyon, aday üretimi, tek $in yüklemesi ve toplu skorlama
+    """
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(5)
+        cvs = [make_cv(rng) for _ in range(20)]
+        jobs = [make_job(rng) for _ in range(200)]
+        for job in jobs[::10]:
+            job.is_active = False
+        return cvs, jobs
+
+    @pytest.fixture
+    def service(self, data, monkeypatch):
+        cvs, jobs = data
+        service = MatchingService(FakeDatabase([to_document(cv) for cv in cvs], [to_document(job) for job in jobs]))
+        service.job_skill_index = SkillIndex("test_job_skills")
+        service.cv_skill_index = SkillIndex("test_cv_skills")
+        for job in jobs:
+            if job.is_active:
+                service.job_skill_index.add(job.id, job.skills_required)
+        for cv in cvs:
+            service.cv_skill_index.add(cv.id, cv.skills)
+
+        def exact_search(documents, embedding, k, ids):
+            allowed = set(ids) if ids is not None else None
+            scores = [(doc.id, float(np.dot(doc.embedding, embedding))) for doc in documents
+                      if doc.embedding is not None and getattr(doc, 'is_active', True)
+                      and (allowed is None or doc.id in allowed)]
+            return sorted(scores, key=lambda item: -item[1])[:k]
+
+        monkeypatch.setattr(service.nlp_service, "search_similar_jobs", lambda embedding, k, job_ids=None: [
+            {'job_id': job_id, 'similarity_score': score} for job_id, score in exact_search(jobs, embedding, k, job_ids)
+        ])
+        monkeypatch.setattr(service.nlp_service, "search_similar_cvs", lambda embedding, k, cv_ids=None: [
+            {'cv_id': cv_id, 'similarity_score': score} for cv_id, score in exact_search(cvs, embedding, k, cv_ids)
+        ])
+        return service
+
+    def test_jobs_for_cv_scores_union_of_candidates(self, service, data):
+        cvs, jobs = data
+        cv = cvs[0]
+        results = asyncio.run(service.find_matching_jobs(cv.id, threshold=0.2, max_results=5))
+
+        candidates = set(service.candidate_job_ids(cv, 5 * MATCH_CANDIDATE_FACTOR))
+        expected = service.score_jobs_for_cv(cv, [job for job in jobs if job.id in candidates and job.is_active],
+                                             top_k=5, min_score=0.2)
+        assert [match.job_id for match in results] == [match.job_id for match in expected]
+        assert all(isinstance(match, MatchResult) and match.overall_score >= 0.2 for match in results)
+        # Adaylar tek $in sorgusuyla, sadece aktif ilanlardan yüklenir
+        assert len(service.db.jobs.queries) == 1 and service.db.jobs.queries[0]['is_active'] is True
+
+    def test_skill_index_adds_candidates(self, service, data):
+        cvs, jobs = data
+        cv = cvs[1]
+        dense = {match['job_id'] for match in service.find_similar_jobs(cv, 10)}
+        skill = {match['job_id'] for match in service.find_skill_candidate_jobs(cv, limit=10)}
+        assert set(service.candidate_job_ids(cv, 10)) == dense | skill
+        assert all(job.is_active for job in jobs if job.id in skill)
+
+    def test_restricted_to_given_ids(self, service, data):
+        cvs, jobs = data
+        allowed = [job.id for job in jobs[:40]]
+        results = asyncio.run(service.find_matching_jobs(cvs[2].id, job_ids=allowed + ["invalid"], max_results=100))
+        assert results and {match.job_id for match in results} <= set(allowed)
+        assert asyncio.run(service.find_matching_jobs(cvs[2].id, job_ids=["invalid"])) == []
+
+        job = jobs[1]
+        results = asyncio.run(service.find_matching_cvs(job.id, cv_ids=[cv.id for cv in cvs[:3]], max_results=10))
+        assert {match.cv_id for match in results} == {cv.id for cv in cvs[:3]}
+
+    def test_missing_document(self, service):
+        with pytest.raises(LookupError):
+            asyncio.run(service.find_matching_jobs(str(ObjectId())))
+
+class TestBatchProcessing:
+    """
+    Bloklu all-pairs eşleştirme motoru testleri
+    """
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(9)
+        cvs = [make_cv(rng) for _ in range(45)]
+        cvs[3].embedding = None
+        jobs = [make_job(rng) for _ in range(100)]
+        for job in jobs[::9]:
+            job.is_active = False
+        return cvs, jobs
+
+    def test_matches_per_pair_scores(self, data):
+        cvs, jobs = data
+        stale = {'_id': ObjectId(), 'cv_id': cvs[0].id, 'job_id': jobs[0].id, 'overall_score': 1.0,
+                 'source': 'batch'}
+        # Başka akışların yazdığı eşleşmeler silinmez
+        other = {'_id': ObjectId(), 'cv_id': cvs[0].id, 'job_id': jobs[0].id, 'overall_score': 0.9}
+        db = FakeDatabase([to_document(cv) for cv in cvs], [to_document(job) for job in jobs], [stale, other])
+        service = MatchingService(db)
+        reports = []
+        engine = create_engine(service, db, top_k=5, min_score=0.3, cv_block_size=16, job_tile_size=30,
+                               progress=reports.append)
+        result = asyncio.run(engine.run())
+
+        active = [job for job in jobs if job.is_active]
+        by_id = {job.id: job for job in active}
+        assert result['cvs'] == len(cvs) and result['jobs'] == len(active)
+        assert result['pairs_scored'] == len(cvs) * len(active)
+        assert [report['done'] for report in reports] == [16, 32, 45]
+
+        written = [match for match in db.matches.documents.values() if match.get('source') == 'batch']
+        assert result['matches_written'] == len(written)
+        assert stale['_id'] not in db.matches.documents
+        assert db.matches.documents[other['_id']] == other
+        for cv in cvs:
+            expected = service.score_jobs_for_cv(cv, active, top_k=5, min_score=0.3)
+            matches = sorted((match for match in written if match['cv_id'] == cv.id),
+                             key=lambda match: -match['overall_score'])
+            # Eşit skorlu ilanlar farklı sırada seçilebilir, skorlar ve çift bazında alanlar aynı olmalı
+            assert [match['overall_score'] for match in matches] == pytest.approx(
+                [match.overall_score for match in expected], abs=1e-5)
+            for match in matches:
+                detailed = service.calculate_detailed_match(cv, by_id[match['job_id']])
+                assert match['overall_score'] == pytest.approx(detailed.overall_score, abs=1e-5)
+                assert match['similarity_score'] == pytest.approx(detailed.similarity_score, abs=1e-5)
+                assert set(match['matched_skills']) == set(detailed.matched_skills)
+                assert set(match['missing_skills']) == set(detailed.missing_skills)
+                assert match['match_details'] == detailed.match_details
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from app.services.skill_index import SkillIndex
+from app.utils.skill_vocabulary import skill_vocabulary
+
+class TestSkillIndex:
+    """
+    Beceri ters index'i: artımlı güncelleme ve aday üretimi testleri
+    """
+
+    @pytest.fixture
+    def index(self):
+        index = SkillIndex("test_skills")
+        index.add("cv-1", ["Python", "Kubernetes", "Docker"])
+        index.add("cv-2", ["kubernetes", "Go"])
+        index.add("cv-3", ["Java"])
+        return index
+
+    def test_union_ranks_by_overlap(self, index):
+        query = skill_vocabulary.encode(["Kubernetes", "Docker"])
+        assert index.candidates(query) == [("cv-1", 2), ("cv-2", 1)]
+        assert index.candidates(query, min_overlap=2) == [("cv-1", 2)]
+        assert index.candidates(query, limit=1) == [("cv-1", 2)]
+        assert index.candidates(skill_vocabulary.encode([])) == []
+
+    def test_intersection(self, index):
+        assert index.candidates(skill_vocabulary.encode(["Kubernetes", "Go"]), match_all=True) == [("cv-2", 2)]
+        assert index.candidates(skill_vocabulary.encode(["Java", "Go"]), match_all=True) == []
+
+    def test_update_and_remove_maintain_postings(self, index):
+        index.add("cv-2", ["Java"])
+        assert index.posting_size("Kubernetes") == 1
+
+        # Bilinmeyen beceri sorgusu sözlüğü büyütmez
+        size = len(skill_vocabulary)
+        assert index.posting_size("never seen skill") == 0
+        assert len(skill_vocabulary) == size
+        assert index.candidates(skill_vocabulary.encode(["Java"])) == [("cv-2", 1), ("cv-3", 1)]
+
+        assert index.remove("cv-3")
+        assert not index.remove("cv-3")
+        assert len(index) == 2
+        assert index.candidates(skill_vocabulary.encode(["Java"])) == [("cv-2", 1)]
+        assert index.get_stats()['skills'] == 4
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(11)
+        skills = [f"skill-{i}" for i in range(40)]
+        documents = {f"doc-{i}": list(rng.choice(skills, rng.integers(0, 6))) for i in range(500)}
+        index = SkillIndex("random_skills")
+        for doc_id, doc_skills in documents.items():
+            index.add(doc_id, doc_skills)
+        for doc_id in list(documents)[::7]:
+            index.remove(doc_id)
+            del documents[doc_id]
+
+        query = list(rng.choice(skills, 3, replace=False))
+        expected = {
+            doc_id: len({s.lower() for s in query} & {s.lower() for s in doc_skills})
+            for doc_id, doc_skills in documents.items()
+        }
+        assert dict(index.candidates(skill_vocabulary.encode(query))) == {
+            doc_id: count for doc_id, count in expected.items() if count > 0
+        }
+        assert {doc_id for doc_id, _ in index.candidates(skill_vocabulary.encode(query), match_all=True)} == {
+            doc_id for doc_id, count in expected.items() if count == len(query)
+        }
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from app.utils.skill_vocabulary import SkillVocabulary, normalize_skill, overlap_counts
+
+class TestSkillVocabulary:
+    """
+    Beceri sözlüğü ve id dizisi kesişim testleri
+    """
+
+    @pytest.fixture
+    def vocabulary(self):
+        return SkillVocabulary()
+
+    def test_normalized_skills_share_ids(self, vocabulary):
+        assert normalize_skill("  Machine   Learning ") == "machine learning"
+        assert vocabulary.skill_id("Python") == vocabulary.skill_id("python ")
+        assert vocabulary.skill_id("Machine Learning") == vocabulary.skill_id("machine  learning")
+        assert len(vocabulary) == 2
+        assert vocabulary.get_id(" PYTHON") == vocabulary.skill_id("python")
+        assert vocabulary.get_id("Rust") is None
+        assert len(vocabulary) == 2
+
+    def test_encode_is_sorted_and_unique(self, vocabulary):
+        vocabulary.encode(["Docker", "SQL"])
+        ids = vocabulary.encode(["SQL", "python", "Docker", "sql", ""])
+        assert ids.tolist() == sorted(set(ids.tolist()))
+        assert vocabulary.decode(ids) == ["docker", "sql", "python"]
+        assert vocabulary.decode(vocabulary.ordered_ids(["SQL", "python", "Docker"])) == ["sql", "python", "docker"]
+
+    def test_overlap_counts_match_set_intersection(self, vocabulary):
+        rng = np.random.default_rng(3)
+        skills = [f"skill-{i}" for i in range(50)]
+        query = vocabulary.encode(rng.choice(skills, 10))
+        arrays = [vocabulary.encode(rng.choice(skills, rng.integers(0, 8))) for _ in range(200)]
+
+        expected = [len(set(query.tolist()) & set(ids.tolist())) for ids in arrays]
+        assert overlap_counts(query, arrays).tolist() == expected
+        assert overlap_counts(vocabulary.encode([]), arrays).tolist() == [0] * len(arrays)
+        assert overlap_counts(query, []).tolist() == []
@@ -0,0 +1,574 @@
+import os
+import threading
+import pytest
+import numpy as np
+from bson import ObjectId
+from app.services.index_factory import bytes_per_vector, select_index_type
+from app.services.vector_index import IndexMaintainer, VectorIndex
+from helpers import unit_vectors
+
+class TestVectorIndex:
+    """
+    Kalıcı id eşlemeli FAISS index testleri
+    """
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        return VectorIndex("job_index", 8, str(tmp_path))
+
+    def test_search_returns_object_ids(self, index):
+        keys = [str(ObjectId()) for _ in range(5)]
+        vectors = unit_vectors(5)
+        index.add_batch(keys, vectors)
+
+        results = index.search(vectors[3], k=2)
+        assert results[0][0] == keys[3]
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    def test_mapping_survives_reload(self, index, tmp_path):
+        """Restart sonrası sonuçlar aynı dokümanlara döner"""
+        keys = [str(ObjectId()) for _ in range(10)]
+        vectors = unit_vectors(10)
+        index.add_batch(keys, vectors)
+        index.save()
+
+        reloaded = VectorIndex("job_index", 8, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.ntotal == 10
+        assert reloaded.search(vectors[7], k=1)[0][0] == keys[7]
+
+        # Yeni id'ler eskileriyle çakışmaz
+        new_key = str(ObjectId())
+        assert reloaded.add(new_key, unit_vectors(1, seed=1)[0]) == 10
+
+    def test_update_replaces_previous_vector(self, index):
+        key = str(ObjectId())
+        index.add(key, unit_vectors(1, seed=1)[0])
+        index.update(key, unit_vectors(1, seed=2)[0])
+
+        results = index.search(unit_vectors(1, seed=1)[0], k=5)
+        assert index.ntotal == 1
+        assert [result_key for result_key, _ in results] == [key]
+
+    def test_dimension_mismatch_is_not_loaded(self, index, tmp_path):
+        index.add(str(ObjectId()), unit_vectors(1)[0])
+        index.save()
+
+        assert not VectorIndex("job_index", 4, str(tmp_path)).load()
+
+    def test_invalid_object_id_rejected(self, index):
+        with pytest.raises(ValueError):
+            index.add("not-an-id", unit_vectors(1)[0])
+        assert index.ntotal == 0
+
+    def test_log_replayed_without_checkpoint(self, index, tmp_path):
+        """Checkpoint alınmadan kapanan process'in eklemeleri log'dan geri gelir"""
+        keys = [str(ObjectId()) for _ in range(3)]
+        vectors = unit_vectors(3)
+        index.add_batch(keys[:2], vectors[:2])
+        index.save()
+        index.add(keys[2], vectors[2])
+        assert not os.path.exists(index.index_path + ".tmp")
+
+        reloaded = VectorIndex("job_index", 8, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.ntotal == 3
+        assert reloaded.pending_mutations == 1
+        assert reloaded.search(vectors[2], k=1)[0][0] == keys[2]
+
+    def test_checkpoint_truncates_log(self, index, tmp_path):
+        index.add(str(ObjectId()), unit_vectors(1)[0])
+        assert index.needs_checkpoint(max_pending=1, max_age_seconds=3600)
+
+        index.checkpoint()
+        assert index.pending_mutations == 0
+        assert not os.path.exists(index.wal_path + ".checkpoint")
+        assert not index.needs_checkpoint(max_pending=1, max_age_seconds=0)
+
+    def test_torn_log_record_is_dropped(self, index, tmp_path):
+        """Yazılırken kesilen son kayıt atlanır ve log'dan kırpılır"""
+        index.add_batch([str(ObjectId()) for _ in range(2)], unit_vectors(2))
+        index.add(str(ObjectId()), unit_vectors(1, seed=3)[0])
+        index.close()
+        intact_size = os.path.getsize(index.wal_path) if os.path.exists(index.wal_path) else 0
+
+        index.add(str(ObjectId()), unit_vectors(1, seed=4)[0])
+        with open(index.wal_path, "r+b") as f:
+            f.truncate(os.path.getsize(index.wal_path) - 5)
+
+        reloaded = VectorIndex("job_index", 8, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.ntotal == 3
+        assert os.path.getsize(index.wal_path) == intact_size
+
+    def test_removed_document_not_returned(self, index, tmp_path):
+        """Silinen doküman restart sonrası da sonuç dönmez"""
+        keys = [str(ObjectId()) for _ in range(4)]
+        vectors = unit_vectors(4)
+        index.add_batch(keys, vectors)
+        index.save()
+
+        assert index.remove(keys[1])
+        assert not index.remove(keys[1])
+        results = index.search(vectors[1], k=4)
+        assert keys[1] not in [key for key, _ in results]
+        assert len(results) == 3
+
+        reloaded = VectorIndex("job_index", 8, str(tmp_path))
+        assert reloaded.load()
+        assert keys[1] not in reloaded
+        assert reloaded.tombstone_count == 1
+
+    def test_compaction_drops_tombstones(self, index, tmp_path):
+        keys = [str(ObjectId()) for _ in range(10)]
+        vectors = unit_vectors(10)
+        index.add_batch(keys, vectors)
+        for key in keys[:3]:
+            index.remove(key)
+        assert index.tombstone_ratio == pytest.approx(0.3)
+
+        maintainer = IndexMaintainer(lambda: [index], compaction_ratio=0.2)
+        maintainer.run_once()
+
+        assert maintainer.compactions == 1
+        assert index.tombstone_count == 0
+        assert index.index.ntotal == 7
+        assert index.search(vectors[5], k=1)[0][0] == keys[5]
+
+        reloaded = VectorIndex("job_index", 8, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.index.ntotal == 7
+
+class TestIndexPromotion:
+    """
+    Flat index'in ivf / hnsw'ye yükseltilmesi testleri
+    """
+
+    @pytest.fixture
+    def data(self):
+        keys = [str(ObjectId()) for _ in range(2000)]
+        return keys, unit_vectors(2000, dimension=16, seed=7)
+
+    @pytest.mark.parametrize("index_type", ["ivf", "hnsw"])
+    def test_promotion_keeps_results_and_ids(self, tmp_path, data, index_type):
+        keys, vectors = data
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type=index_type,
+                            promotion_threshold=1000)
+        index.add_batch(keys[:500], vectors[:500])
+        assert not index.should_promote()
+        index.add_batch(keys[500:], vectors[500:])
+        assert index.should_promote()
+
+        index.promote()
+        assert index.index_type == index_type
+        assert index.ntotal == 2000
+        assert index.search(vectors[42], k=1, nprobe=8, ef_search=32)[0][0] == keys[42]
+
+        index.save()
+        reloaded = VectorIndex("cv_index", 16, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.index_type == index_type
+        assert reloaded.search(vectors[1999], k=1)[0][0] == keys[1999]
+
+    @pytest.mark.parametrize("index_type", ["ivf", "hnsw"])
+    def test_removal_after_promotion(self, tmp_path, data, index_type):
+        """IVF remove_ids ve HNSW yeniden kurulumu sonrası id'ler doğru kalır"""
+        keys, vectors = data
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type=index_type)
+        index.add_batch(keys, vectors)
+        index.promote()
+
+        for key in keys[:300]:
+            index.remove(key)
+        index.compact()
+
+        assert index.tombstone_count == 0
+        assert index.index.ntotal == 1700
+        for row in (300, 1000, 1999):
+            assert index.search(vectors[row], k=1, nprobe=64)[0][0] == keys[row]
+
+    def test_maintainer_promotes_in_background(self, tmp_path, data):
+        keys, vectors = data
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type="ivf",
+                            promotion_threshold=1000)
+        index.add_batch(keys, vectors)
+
+        maintainer = IndexMaintainer(lambda: [index])
+        maintainer.run_once()
+        maintainer.stop()
+
+        assert maintainer.promotions == 1
+        assert index.index_type == "ivf"
+        assert index.pending_mutations == 0
+
+class TestIndexCompression:
+    """
+    Bellek bütçesine göre sıkıştırılmış codec seçimi ve tam vektörle yeniden skorlama testleri
+    """
+
+    def test_codec_selected_from_budget(self):
+        megabyte = 1024 * 1024
+        assert bytes_per_vector("flat", 384) == 1544
+        assert bytes_per_vector("sq8", 384) == 392
+        assert select_index_type("ivf", 384, 100000, 0) == "ivf"
+        assert select_index_type("ivf", 384, 100000, 200 * megabyte) == "ivf"
+        assert select_index_type("ivf", 384, 100000, 100 * megabyte) == "sqfp16"
+        assert select_index_type("ivf", 384, 100000, 20 * megabyte) == "ivfpq"
+        # IVF-PQ eğitimi için vektör yetersizse kurulabilen en küçük codec
+        assert select_index_type("ivf", 384, 5000, 1024) == "sq8"
+        # Boş index'te kurulabilen tip yoksa flat kalır
+        assert select_index_type("ivf", 384, 0, 1024) == "flat"
+        assert select_index_type("hnsw", 384, 0, 200 * megabyte) == "flat"
+
+    def test_empty_index_with_budget_checkpoints(self, tmp_path):
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type="ivf",
+                            promotion_threshold=0, memory_budget=50000)
+        assert index.desired_type() == "flat"
+        assert not index.should_promote()
+        IndexMaintainer(lambda: [index], max_pending=0, interval_seconds=0).run_once()
+
+        built = VectorIndex.build("job_index", 16, str(tmp_path), [], memory_budget=50000)
+        assert built.ntotal == 0 and not built.should_promote()
+        built.save()
+
+    def test_sq8_promotion_reranks_with_full_vectors(self, tmp_path):
+        keys = [str(ObjectId()) for _ in range(2000)]
+        vectors = unit_vectors(2000, dimension=16, seed=3)
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type="flat",
+                            memory_budget=50000, keep_vectors=True)
+        index.add_batch(keys, vectors)
+        assert index.should_promote()
+
+        index.promote()
+        assert index.index_type == "sq8"
+        assert index.memory_bytes <= 50000
+        results = index.search(vectors[7], k=5)
+        assert results[0][0] == keys[7]
+        expected = vectors[[keys.index(key) for key, _ in results]] @ vectors[7]
+        assert np.allclose([score for _, score in results], expected, atol=1e-6)
+
+        index.save()
+        reloaded = VectorIndex("cv_index", 16, str(tmp_path), keep_vectors=True)
+        assert reloaded.load()
+        assert reloaded.index_type == "sq8"
+        assert reloaded.search(vectors[1500], k=1)[0][1] == pytest.approx(1.0, abs=1e-6)
+
+    def test_ivfpq_under_tight_budget(self, tmp_path):
+        keys = [str(ObjectId()) for _ in range(10000)]
+        vectors = unit_vectors(10000, dimension=16, seed=5)
+        index = VectorIndex("job_index", 16, str(tmp_path), index_type="ivf",
+                            promotion_threshold=5000, memory_budget=100000, keep_vectors=True)
+        index.add_batch(keys, vectors)
+        index.promote()
+
+        assert index.index_type == "ivfpq"
+        for row in (0, 4321, 9999):
+            key, score = index.search(vectors[row], k=3, nprobe=256)[0]
+            assert key == keys[row]
+            assert score == pytest.approx(1.0, abs=1e-6)
+
+        # Tam vektörler diskte olduğu için kayıplı index'ten de yeniden kurulabilir
+        for key in keys[:100]:
+            index.remove(key)
+        index.rebuild("sq8")
+        assert index.ntotal == 9900
+        assert index.search(vectors[100], k=1)[0][0] == keys[100]
+
+    def test_build_publishes_vectors_on_save(self, tmp_path):
+        keys = [str(ObjectId()) for _ in range(50)]
+        vectors = unit_vectors(50, seed=9)
+        index = VectorIndex.build("cv_index", 8, str(tmp_path), [(keys, vectors)], keep_vectors=True)
+        assert not os.path.exists(index.vectors_path)
+
+        index.save()
+        assert os.path.exists(index.vectors_path)
+        assert not os.path.exists(index.vectors_path + ".build")
+        assert np.allclose(index.vector_store.read([3]), vectors[3])
+
+class TestFilteredSearch:
+    """
+    Öznitelik filtreli (IDSelector) arama testleri
+    """
+
+    @pytest.fixture
+    def data(self):
+        keys = [str(ObjectId()) for _ in range(1000)]
+        attributes = [
+            {'is_active': row % 10 == 0, 'location': 'istanbul' if row % 20 == 0 else 'ankara'}
+            for row in range(1000)
+        ]
+        return keys, unit_vectors(1000, dimension=16, seed=11), attributes
+
+    def test_filter_returns_exactly_k_matches(self, tmp_path, data):
+        keys, vectors, attributes = data
+        index = VectorIndex("job_index", 16, str(tmp_path))
+        index.add_batch(keys, vectors, attributes)
+
+        results = index.search(vectors[1], k=10, filters={'is_active': True})
+        assert len(results) == 10
+        assert all(keys.index(key) % 10 == 0 for key, _ in results)
+
+        istanbul = index.search(vectors[1], k=100, filters={'is_active': True, 'location': 'istanbul'})
+        assert len(istanbul) == 50
+        both = index.search(vectors[1], k=100, filters={'location': ['istanbul', 'ankara'], 'is_active': None})
+        assert len(both) == 100
+        assert index.search(vectors[1], k=5, filters={'location': 'izmir'}) == []
+
+    def test_attributes_survive_update_and_reload(self, tmp_path, data):
+        keys, vectors, attributes = data
+        index = VectorIndex("job_index", 16, str(tmp_path))
+        index.add_batch(keys[:10], vectors[:10], attributes[:10])
+        index.checkpoint()
+
+        # Vektör güncellemesi öznitelikleri korur, set_attributes sadece verilen alanı değiştirir
+        index.update(keys[0], vectors[500])
+        assert index.set_attributes(keys[1], {'is_active': True})
+        assert not index.set_attributes(str(ObjectId()), {'is_active': True})
+        index.remove(keys[2])
+
+        reloaded = VectorIndex("job_index", 16, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.get_attributes(keys[0]) == {'is_active': True, 'location': 'istanbul'}
+        assert reloaded.get_attributes(keys[1]) == {'is_active': True, 'location': 'ankara'}
+        active = reloaded.search(vectors[500], k=10, filters={'is_active': True})
+        assert [key for key, _ in active] == [keys[0], keys[1]]
+
+    def test_search_restricted_to_keys(self, tmp_path, data):
+        keys, vectors, attributes = data
+        index = VectorIndex("job_index", 16, str(tmp_path))
+        index.add_batch(keys[:500], vectors[:500], attributes[:500])
+        index.checkpoint()
+        index.add_batch(keys[500:], vectors[500:], attributes[500:])
+        index.remove(keys[7])
+
+        # Silinmiş ve index'te olmayan anahtarlar atlanır
+        allowed = keys[::7] + [str(ObjectId())]
+        results = index.search(vectors[0], k=1000, keys=allowed)
+        assert {key for key, _ in results} == set(keys[::7]) - {keys[7]}
+        active = index.search(vectors[0], k=1000, keys=allowed, filters={'is_active': True})
+        assert {key for key, _ in active} == {key for key in keys[::70]}
+        assert index.search(vectors[0], k=10, keys=[]) == []
+
+    @pytest.mark.parametrize("index_type", ["ivf", "hnsw", "sq8"])
+    def test_filter_after_promotion(self, tmp_path, data, index_type):
+        keys, vectors, attributes = data
+        index = VectorIndex("job_index", 16, str(tmp_path), index_type=index_type)
+        index.add_batch(keys, vectors, attributes)
+        index.promote()
+        index.remove(keys[0])
+
+        results = index.search(vectors[0], k=10, nprobe=64, filters={'is_active': True})
+        assert len(results) == 10
+        assert keys[0] not in [key for key, _ in results]
+        assert all(keys.index(key) % 10 == 0 for key, _ in results)
+
+    @pytest.mark.parametrize("selectivity", [100, 10])
+    def test_selective_filter_on_ivf(self, tmp_path, selectivity):
+        count = 20000
+        keys = [str(ObjectId()) for _ in range(count)]
+        vectors = unit_vectors(count, dimension=16, seed=5)
+        index = VectorIndex("job_index", 16, str(tmp_path), index_type="ivf")
+        index.add_batch(keys, vectors, [{'location': 'izmir' if row % selectivity == 0 else 'ankara'}
+                                        for row in range(count)])
+        index.promote()
+        assert index.index_type == "ivf"
+
+        # Varsayılan nprobe ile de her sorgu filtreye uyan k sonucu döner
+        queries = unit_vectors(200, dimension=16, seed=6)
+        results = index.search_batch(queries, k=10, filters={'location': 'izmir'})
+        assert all(len(result) == 10 for result in results)
+        assert all(keys.index(key) % selectivity == 0 for result in results for key, _ in result)
+
+        selected = np.arange(0, count, selectivity)
+        exact = np.argsort(-(queries[:20] @ vectors[selected].T), axis=1)[:, :10]
+        for result, expected in zip(results, exact):
+            found = {key for key, _ in result}
+            assert len(found & {keys[row] for row in selected[expected]}) >= 9
+
+class TestRangeSearch:
+    """
+    Eşik tabanlı (range_search) arama testleri
+    """
+
+    @pytest.fixture
+    def data(self):
+        keys = [str(ObjectId()) for _ in range(1000)]
+        return keys, unit_vectors(1000, dimension=16, seed=13)
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw", "sq8"])
+    def test_returns_all_above_threshold(self, tmp_path, data, index_type):
+        keys, vectors = data
+        index = VectorIndex("job_index", 16, str(tmp_path), index_type=index_type, keep_vectors=True)
+        index.add_batch(keys, vectors)
+        if index_type != "flat":
+            index.promote()
+        index.remove(keys[1])
+
+        scores = vectors @ vectors[0]
+        scores[1] = -1.0
+        expected = {keys[row] for row in np.flatnonzero(scores >= 0.6)}
+
+        results = index.range_search(vectors[0], 0.6, max_results=1000, nprobe=64, ef_search=1000)
+        assert {key for key, _ in results} == expected
+        assert all(score >= 0.6 for _, score in results)
+        assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+        capped = index.range_search(vectors[0], 0.6, max_results=3, nprobe=64, ef_search=1000)
+        assert capped == results[:3]
+
+    def test_range_search_with_filter(self, tmp_path, data):
+        keys, vectors = data
+        index = VectorIndex("job_index", 16, str(tmp_path))
+        index.add_batch(keys, vectors, [{'is_active': row % 2 == 0} for row in range(1000)])
+
+        results = index.range_search(vectors[0], 0.5, filters={'is_active': False})
+        assert results
+        assert all(keys.index(key) % 2 == 1 for key, _ in results)
+        assert index.range_search(vectors[0], 1.5) == []
+
+class TestBatchSearch:
+    """
+    Çok sorgulu (batch) arama testleri
+    """
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "sq8"])
+    def test_batch_matches_single_queries(self, tmp_path, index_type):
+        keys = [str(ObjectId()) for _ in range(1000)]
+        vectors = unit_vectors(1000, dimension=16, seed=17)
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type=index_type, keep_vectors=True)
+        index.add_batch(keys, vectors, [{'is_active': row % 3 != 0} for row in range(1000)])
+        if index_type != "flat":
+            index.promote()
+        index.remove(keys[5])
+
+        queries = vectors[:20]
+        batch = index.search_batch(queries, k=5, nprobe=8)
+        assert len(batch) == 20
+        for query, results in zip(queries, batch):
+            single = index.search(query, k=5, nprobe=8)
+            assert [key for key, _ in results] == [key for key, _ in single]
+            assert np.allclose([score for _, score in results], [score for _, score in single], atol=1e-5)
+
+        filtered = index.search_batch(queries, k=5, filters={'is_active': False})
+        assert all(keys.index(key) % 3 == 0 for results in filtered for key, _ in results)
+        assert index.search_batch(np.zeros((0, 16), dtype=np.float32)) == []
+
+class TestMemoryMappedIndex:
+    """
+    mmap ile salt okunur yüklenen IVF snapshot testleri
+    """
+
+    @pytest.fixture
+    def saved(self, tmp_path):
+        keys = [str(ObjectId()) for _ in range(2000)]
+        vectors = unit_vectors(2000, dimension=16, seed=19)
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type="ivf")
+        index.add_batch(keys, vectors)
+        index.promote()
+        index.save()
+        index.close()
+        return keys, vectors
+
+    def test_mmap_load_and_writes(self, tmp_path, saved):
+        keys, vectors = saved
+        index = VectorIndex("cv_index", 16, str(tmp_path), mmap=True)
+        assert index.load()
+        assert index.memory_mapped
+        assert index.search(vectors[3], k=1, nprobe=64)[0][0] == keys[3]
+        assert index.range_search(vectors[3], 0.99, nprobe=64)[0][0] == keys[3]
+
+        # Eklemeler delta'ya gider, map korunur; checkpoint yeni snapshot'ı map eder
+        new_key = str(ObjectId())
+        index.add(new_key, vectors[0])
+        index.remove(keys[3])
+        assert index.memory_mapped
+        assert new_key in [key for key, _ in index.search(vectors[0], k=2, nprobe=64)]
+        index.checkpoint()
+        assert index.memory_mapped
+        assert index.delta_count == 0
+        assert index.ntotal == 2000
+        assert new_key in [key for key, _ in index.search(vectors[0], k=2, nprobe=64)]
+
+        index.compact()
+        assert not index.memory_mapped
+        assert index.index.ntotal == 2000
+
+    def test_non_ivf_index_loads_into_memory(self, tmp_path):
+        keys = [str(ObjectId()) for _ in range(10)]
+        index = VectorIndex("job_index", 8, str(tmp_path))
+        index.add_batch(keys, unit_vectors(10))
+        index.save()
+
+        reloaded = VectorIndex("job_index", 8, str(tmp_path), mmap=True)
+        assert reloaded.load()
+        assert not reloaded.memory_mapped
+        assert reloaded.ntotal == 10
+
+class TestConcurrentAccess:
+    """
+    Yayınlanmış nesil üzerinde kilitsiz arama
+    """
+
+    def test_writes_are_staged_until_checkpoint(self, tmp_path):
+        keys = [str(ObjectId()) for _ in range(200)]
+        vectors = unit_vectors(200, dimension=16)
+        index = VectorIndex("cv_index", 16, str(tmp_path), index_type='ivf', promotion_threshold=100,
+                            index_params={'nlist': 4, 'nprobe': 4})
+        index.add_batch(keys[:150], vectors[:150])
+        index.promote()
+        index.add_batch(keys[150:], vectors[150:])
+        index.remove(keys[160])
+        index.update(keys[10], vectors[170])
+
+        assert index.delta_count == 51
+        assert index.index.ntotal == 150
+        assert index.search(vectors[180], k=1)[0][0] == keys[180]
+        assert keys[160] not in [key for key, _ in index.search(vectors[160], k=5)]
+        assert {key for key, _ in index.range_search(vectors[170], 0.99)} == {keys[10], keys[170]}
+
+        index.checkpoint()
+        assert index.delta_count == 0
+        assert index.index.ntotal == 200
+        assert index.search(vectors[180], k=1)[0][0] == keys[180]
+
+        reloaded = VectorIndex("cv_index", 16, str(tmp_path))
+        assert reloaded.load()
+        assert reloaded.ntotal == 199
+        assert reloaded.search(vectors[170], k=2) == index.search(vectors[170], k=2)
+
+    def test_readers_see_consistent_generation(self, tmp_path):
+        vectors = unit_vectors(400, dimension=16)
+        keys = [str(ObjectId()) for _ in range(len(vectors))]
+        index = VectorIndex("cv_index", 16, str(tmp_path), wal_fsync=False)
+        index.add_batch(keys[:200], vectors[:200])
+        index.save()
+        stop = threading.Event()
+        errors = []
+
+        def write():
+            try:
+                for row in range(200, 400):
+                    index.add(keys[row], vectors[row])
+                    index.remove(keys[row - 200])
+                    if row % 50 == 0:
+                        index.checkpoint()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                stop.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        searches = 0
+        while not stop.is_set() or searches == 0:
+            row = searches % 200
+            results = index.search(vectors[row + 200], k=3)
+            # Her arama tek bir nesil görür: canlı doküman ya bulunur ya hiç eklenmemiştir
+            assert len({key for key, _ in results}) == len(results)
+            assert all(key in keys for key, _ in results)
+            searches += 1
+        writer.join()
+
+        assert not errors
+        assert index.ntotal == 200
+        assert index.search(vectors[399], k=1)[0][0] == keys[399]